@@ -0,0 +1,168 @@
+"""
+Local stand-in for ``google.generativeai.GenerativeModel``.
+
+Replays the recorded replies in ``responses/`` with sampled latency and response
+size, so the trips API can be load-tested without spending Gemini quota. Install it
+process-wide with ``install()``; ``trips.client.ModelRegistry`` then hands it to every
+AI helper (sync, async and streaming paths).
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import math
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List
+
+from trips.client import get_model_registry
+from trips.jsonstream import extract_json
+
+RESPONSES_DIR = Path(__file__).resolve().parent / "responses"
+
+# Substring of each prompt in trips/ai.py -> recorded reply used for it.
+PROMPT_ROUTES = (
+    ("revising a single day", "itinerary_day"),
+    ("updating an existing itinerary", "itinerary_update"),
+    ("expert travel planner", "itinerary"),
+    ("JSON ARRAY", "suggestions"),
+    ("travel guide expert", "recommendations"),
+    ("packing list", "packing_list"),
+    ("budget breakdown", "budget_analysis"),
+)
+DEFAULT_ROUTE = "chat"
+
+
+def parse_distribution(spec: str) -> Callable[[random.Random], float]:
+    """
+    Parse ``fixed:X``, ``uniform:LOW,HIGH``, ``normal:MEAN,STDDEV`` or
+    ``lognormal:MEDIAN,SIGMA`` into a sampler. Negative samples are clamped to 0.
+    """
+    kind, _, args = spec.partition(":")
+    try:
+        values = [float(v) for v in args.split(",") if v.strip()] if args else []
+    except ValueError:
+        raise ValueError(f"Unsupported distribution '{spec}'") from None
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "normal" and len(values) == 2:
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "lognormal" and len(values) == 2:
+        mu = math.log(values[0]) if values[0] > 0 else 0.0
+        return lambda rng: rng.lognormvariate(mu, values[1]) if values[0] > 0 else 0.0
+    raise ValueError(f"Unsupported distribution '{spec}'")
+
+
+def load_recordings(directory: Path = RESPONSES_DIR) -> Dict[str, str]:
+    return {path.stem: path.read_text() for path in directory.glob("*.txt")}
+
+
+def _resize(value: Any, factor: float) -> Any:
+    """Grow or shrink the lists in a reply by ``factor``, cycling the recorded items."""
+    if isinstance(value, list) and value:
+        count = max(1, round(len(value) * factor))
+        return list(itertools.islice(itertools.cycle(value), count))
+    if isinstance(value, dict):
+        return {k: _resize(v, factor) for k, v in value.items()}
+    return value
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+        self.candidates: List[Any] = []
+
+
+class FakeGenerativeModel:
+    """
+    Implements the parts of ``GenerativeModel`` trips/ai.py uses:
+    ``generate_content`` (optionally ``stream=True``) and ``generate_content_async``.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "fake-gemini",
+        generation_config: Dict[str, Any] | None = None,
+        latency: str = "fixed:0",
+        size: str = "fixed:1",
+        stream_chunks: int = 8,
+        recordings: Dict[str, str] | None = None,
+        seed: int | None = None,
+    ):
+        self.model_name = model_name
+        self.generation_config = generation_config
+        self.stream_chunks = max(1, stream_chunks)
+        self._latency = parse_distribution(latency)
+        self._size = parse_distribution(size)
+        self._recordings = recordings if recordings is not None else load_recordings()
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.calls = 0
+
+    def _sample(self) -> tuple[float, float]:
+        with self._rng_lock:
+            self.calls += 1
+            return self._latency(self._rng), self._size(self._rng)
+
+    def _reply(self, contents: Any, size: float) -> str:
+        prompt = contents if isinstance(contents, str) else "\n".join(str(part) for part in contents)
+        route = next((name for marker, name in PROMPT_ROUTES if marker in prompt), DEFAULT_ROUTE)
+        text = self._recordings[route]
+        if size == 1:
+            return text
+        try:
+            return json.dumps(_resize(extract_json(text), size))
+        except ValueError:
+            # Plain-text reply (chat): repeat or trim it.
+            length = max(1, round(len(text) * size))
+            return (text * (int(size) + 1))[:length]
+
+    def generate_content(self, contents: Any, generation_config: Dict[str, Any] | None = None, stream: bool = False, **kwargs):
+        latency, size = self._sample()
+        text = self._reply(contents, size)
+        if stream:
+            return self._stream(text, latency)
+        time.sleep(latency)
+        return FakeResponse(text)
+
+    def _stream(self, text: str, latency: float) -> Iterator[FakeResponse]:
+        step = -(-len(text) // self.stream_chunks)
+        for start in range(0, len(text), step):
+            time.sleep(latency / self.stream_chunks)
+            yield FakeResponse(text[start : start + step])
+
+    async def generate_content_async(self, contents: Any, generation_config: Dict[str, Any] | None = None, **kwargs):
+        latency, size = self._sample()
+        await asyncio.sleep(latency)
+        return FakeResponse(self._reply(contents, size))
+
+
+def install(latency: str = "fixed:0", size: str = "fixed:1", seed: int | None = None, **kwargs) -> List[FakeGenerativeModel]:
+    """Route every model the registry builds to a fake; returns the models created so far."""
+    recordings = load_recordings()
+    models: List[FakeGenerativeModel] = []
+
+    def factory(model_name: str, generation_config: Dict[str, Any] | None):
+        model = FakeGenerativeModel(
+            model_name,
+            generation_config,
+            latency=latency,
+            size=size,
+            recordings=recordings,
+            seed=None if seed is None else seed + len(models),
+            **kwargs,
+        )
+        models.append(model)
+        return model
+
+    get_model_registry().install_factory(factory)
+    return models
+
+
+def uninstall() -> None:
+    get_model_registry().install_factory(None)
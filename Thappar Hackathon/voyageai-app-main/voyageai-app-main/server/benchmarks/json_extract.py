@@ -0,0 +1,94 @@
+"""
+Micro-benchmark for pulling JSON out of Gemini replies.
+
+Compares the old greedy ``re.search(r"\\{.*\\}")`` + ``json.loads`` against
+``trips.jsonstream.extract_json`` over the recorded replies in ``responses/`` at a
+few sizes, plus truncated and unbalanced inputs. Run from ``server/``:
+
+    python -m benchmarks.json_extract [--repeat 200] [--json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import statistics
+import time
+from pathlib import Path
+
+from trips.jsonstream import extract_json
+
+RESPONSES_DIR = Path(__file__).resolve().parent / "responses"
+
+
+def legacy_extract(text: str):
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    return json.loads(match.group(0) if match else text)
+
+
+def load_cases() -> dict[str, str]:
+    suggestions = (RESPONSES_DIR / "suggestions.txt").read_text()
+    itinerary = (RESPONSES_DIR / "itinerary.txt").read_text()
+
+    parsed = extract_json(itinerary)
+    large = dict(parsed, days=[dict(day, day=i + 1) for i in range(40) for day in parsed["days"][:1]])
+    huge = dict(parsed, days=[dict(day, day=i + 1) for i in range(400) for day in parsed["days"][:1]])
+    return {
+        "suggestions_array_fenced": suggestions,
+        "itinerary_10kb": itinerary,
+        "itinerary_80kb": "Sure!\n" + json.dumps(large, indent=2),
+        "itinerary_800kb": json.dumps(huge),
+        "itinerary_truncated": itinerary[: int(len(itinerary) * 0.7)],
+        "unbalanced_braces_20kb": "{ " * 10_000,
+    }
+
+
+def measure(fn, text: str, repeat: int) -> dict:
+    ok = True
+    try:
+        fn(text)
+    except ValueError:
+        ok = False
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        try:
+            fn(text)
+        except ValueError:
+            pass
+        timings.append((time.perf_counter() - started) * 1000)
+    return {"ok": ok, "medianMs": round(statistics.median(timings), 4), "maxMs": round(max(timings), 4)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args()
+
+    report = {}
+    for name, text in load_cases().items():
+        # The legacy regex is quadratic on unbalanced input; keep that case short.
+        repeat = 3 if name.startswith("unbalanced") else args.repeat
+        report[name] = {
+            "bytes": len(text),
+            "legacy": measure(legacy_extract, text, repeat),
+            "extract_json": measure(extract_json, text, repeat),
+        }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{'case':<28}{'bytes':>9}  {'legacy ms':>12}  {'extract_json ms':>16}")
+    for name, row in report.items():
+        legacy, new = row["legacy"], row["extract_json"]
+        print(
+            f"{name:<28}{row['bytes']:>9}  "
+            f"{legacy['medianMs']:>10.3f}{'' if legacy['ok'] else ' x':>2}  "
+            f"{new['medianMs']:>14.3f}{'' if new['ok'] else ' x':>2}"
+        )
+    print("x = failed to parse")
+
+
+if __name__ == "__main__":
+    main()
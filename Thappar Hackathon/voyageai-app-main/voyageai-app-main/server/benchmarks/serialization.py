@@ -0,0 +1,93 @@
+"""
+Trip list serialization: full ``TripSerializer`` vs ``TripSerializer`` limited to the feed
+fields vs the ``.values()`` fast path used by the discover feed. Run from ``server/``:
+
+    python -m benchmarks.serialization [--trips 500] [--repeat 5]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework.request import Request  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from benchmarks.fake_gemini import load_recordings  # noqa: E402
+from trips.jsonstream import extract_json  # noqa: E402
+from trips.models import Trip  # noqa: E402
+from trips.serializers import (  # noqa: E402
+    TRIP_LIST_FIELDS,
+    TripSerializer,
+    trip_rows_to_data,
+    trip_values,
+)
+from users.models import User  # noqa: E402
+
+
+def seed(count: int) -> None:
+    owner = User.objects.create_user(email="bench@example.com", username="bench", name="Bench", password="bench-pass-123")
+    itinerary = extract_json(load_recordings()["itinerary"])
+    Trip.objects.bulk_create(
+        Trip(owner=owner, title=f"Trip {i}", location="Lisbon", budget_cents=100_000, itinerary=itinerary, accessibility={"wheelchair": False})
+        for i in range(count)
+    )
+
+
+def run(label: str, fn, repeat: int) -> dict:
+    timings, queries, size = [], 0, 0
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            data = fn()
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = len(captured.captured_queries)
+        size = len(json.dumps(data, default=str))
+    return {"case": label, "medianMs": round(statistics.median(timings), 2), "queries": queries, "payloadKb": round(size / 1024, 1)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trips", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    db_path = settings.DATABASES["default"]["NAME"]
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    call_command("migrate", verbosity=0)
+    seed(args.trips)
+
+    # Querysets are rebuilt per call so no case reuses another's result cache.
+    def ordered():
+        return Trip.objects.order_by("-created_at", "-id")
+
+    list_context = {"request": Request(APIRequestFactory().get("/", {"fields": ",".join(TRIP_LIST_FIELDS)}))}
+    cases = [
+        ("TripSerializer", lambda: TripSerializer(ordered(), many=True).data),
+        ("TripSerializer+select_related", lambda: TripSerializer(ordered().select_related("owner"), many=True).data),
+        (
+            "TripSerializer(list fields)+defer",
+            lambda: TripSerializer(
+                ordered().select_related("owner").defer("itinerary", "accessibility"), many=True, context=list_context
+            ).data,
+        ),
+        ("values() fast path", lambda: trip_rows_to_data(trip_values(ordered(), TRIP_LIST_FIELDS), TRIP_LIST_FIELDS)),
+    ]
+    print(json.dumps([run(label, fn, args.repeat) for label, fn in cases], indent=2))
+
+
+if __name__ == "__main__":
+    main()
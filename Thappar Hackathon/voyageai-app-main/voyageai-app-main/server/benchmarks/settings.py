@@ -0,0 +1,19 @@
+"""Settings for ``benchmarks.trips_api``: the app settings on a throwaway SQLite database."""
+import os
+import tempfile
+
+os.environ.setdefault("GEMINI_WARMUP", "false")
+
+from voyage_backend.settings import *  # noqa: E402,F401,F403
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.getenv("BENCH_DB_PATH") or os.path.join(tempfile.gettempdir(), "voyage_bench.sqlite3"),
+        # Concurrent writers (job enqueue, trip create) wait for the lock instead of
+        # failing on a read->write upgrade.
+        "OPTIONS": {"timeout": 30, "transaction_mode": "IMMEDIATE"},
+    }
+}
+ALLOWED_HOSTS = ["*"]
+DEBUG = False
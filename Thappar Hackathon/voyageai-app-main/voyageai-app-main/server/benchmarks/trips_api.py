@@ -0,0 +1,323 @@
+"""
+Load benchmark for ``/api/trips/*`` against the fake Gemini backend.
+
+Every route in ``trips/urls.py`` has a scenario. Each scenario first runs a short
+sequential profiling pass (DB queries and peak Python memory per request, via
+``CaptureQueriesContext`` and ``tracemalloc``) and then a concurrent load pass
+(p50/p95/p99 latency and requests/sec). The report is JSON so runs can be kept and
+compared between releases. Run from ``server/``:
+
+    python -m benchmarks.trips_api --requests 200 --concurrency 8 \\
+        --latency lognormal:0.4,0.5 --output bench.json
+    python -m benchmarks.trips_api --baseline bench.json   # exit 1 on p95 regressions
+
+The database is a throwaway SQLite file (``BENCH_DB_PATH``), recreated per run.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from rest_framework_simplejwt.tokens import RefreshToken  # noqa: E402
+
+from benchmarks import fake_gemini  # noqa: E402
+from trips.itinerary import store_itinerary  # noqa: E402
+from trips.jsonstream import extract_json  # noqa: E402
+from trips.models import Carpool, Trip  # noqa: E402
+from users.models import User  # noqa: E402
+
+API = "/api/trips/"
+LOCATIONS = ["Udaipur", "Lisbon", "Kyoto", "Cape Town", "Reykjavik", "Oaxaca", "Hanoi", "Tbilisi"]
+INTERESTS = ["food", "culture", "hiking", "nightlife", "photography", "history"]
+
+
+class Fixture:
+    """Seeded users/trips plus the auth headers scenarios send."""
+
+    def __init__(self, trips: int):
+        self.user = User.objects.create_user(email="bench@example.com", username="bench", name="Bench", password="bench-pass-123")
+        self.admin = User.objects.create_superuser(email="admin@example.com", username="admin", name="Admin", password="bench-pass-123")
+        self.headers = {"Authorization": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+        self.admin_headers = {"Authorization": f"Bearer {RefreshToken.for_user(self.admin).access_token}"}
+        itinerary = extract_json(fake_gemini.load_recordings()["itinerary"])
+        start = date.today() + timedelta(days=30)
+        self.trip_ids: List[str] = []
+        for i in range(trips):
+            trip = Trip.objects.create(
+                owner=self.user,
+                title=f"Bench trip {i}",
+                location=LOCATIONS[i % len(LOCATIONS)],
+                start_date=start,
+                end_date=start + timedelta(days=3 + i % 5),
+                budget_cents=50_000 + 25_000 * (i % 12),
+            )
+            store_itinerary(trip, itinerary)
+            for seat in range(i % 3):
+                Carpool.objects.create(
+                    trip=trip,
+                    host=self.user,
+                    seats=2 + seat,
+                    from_location="Airport",
+                    to_location=trip.location,
+                    departure=timezone.make_aware(datetime.combine(start, datetime.min.time())),
+                )
+            self.trip_ids.append(str(trip.id))
+
+    def trip(self, rng: random.Random) -> str:
+        return rng.choice(self.trip_ids)
+
+
+# A scenario turns (fixture, rng) into (method, path, json body or query params, headers).
+Request = tuple[str, str, Dict[str, Any] | None, Dict[str, str]]
+SCENARIOS: Dict[str, Callable[[Fixture, random.Random], Request]] = {
+    "trip-create": lambda f, rng: (
+        "post",
+        API,
+        {"title": "Weekend away", "location": rng.choice(LOCATIONS), "startDate": str(date.today()), "budgetCents": 120_000},
+        f.headers,
+    ),
+    "trip-discover": lambda f, rng: ("get", f"{API}discover", None, f.headers),
+    "trip-suggestions": lambda f, rng: (
+        "get",
+        f"{API}suggestions",
+        {"location": rng.choice(LOCATIONS), "budget": rng.choice([80_000, 200_000, 600_000]), "duration": rng.randint(2, 14), "interests": ",".join(rng.sample(INTERESTS, 2))},
+        f.headers,
+    ),
+    "ai-chat": lambda f, rng: ("post", f"{API}chat", {"message": "When is the best time to visit?", "trip_id": f.trip(rng)}, f.headers),
+    "ai-chat-stream": lambda f, rng: ("post", f"{API}chat?stream=1", {"message": "When is the best time to visit?"}, f.headers),
+    "ai-batch": lambda f, rng: (
+        "post",
+        f"{API}ai/batch",
+        {"operations": [{"tripId": f.trip(rng), "operation": op} for op in ("recommendations", "packing_list", "budget_analysis")]},
+        f.headers,
+    ),
+    "ai-cache": lambda f, rng: ("get", f"{API}ai/cache", None, f.admin_headers),
+    "trip-detail": lambda f, rng: ("get", f"{API}{f.trip(rng)}", None, f.headers),
+    "trip-generate": lambda f, rng: ("post", f"{API}{f.trip(rng)}/generate", {"travel_pace": rng.choice(["relaxed", "moderate"])}, f.headers),
+    "trip-generate-status": lambda f, rng: ("get", f"{API}{f.trip(rng)}/generate/status", None, f.headers),
+    "trip-generate-stream": lambda f, rng: ("post", f"{API}{f.trip(rng)}/generate/stream", {}, f.headers),
+    "trip-itinerary-day": lambda f, rng: ("get", f"{API}{f.trip(rng)}/days/{rng.randint(1, 5)}", None, f.headers),
+    "trip-itinerary-day-regenerate": lambda f, rng: (
+        "post",
+        f"{API}{f.trip(rng)}/days/{rng.randint(1, 5)}/regenerate",
+        {"instructions": rng.choice(["More museums", "Slower pace", "Add a food tour"])},
+        f.headers,
+    ),
+    "trip-recommendations": lambda f, rng: ("get", f"{API}{f.trip(rng)}/recommendations", {"type": rng.choice(["attractions", "restaurants"])}, f.headers),
+    "trip-packing-list": lambda f, rng: ("get", f"{API}{f.trip(rng)}/packing-list", None, f.headers),
+    "trip-budget-analysis": lambda f, rng: ("get", f"{API}{f.trip(rng)}/budget-analysis", None, f.headers),
+    "trip-carpools": lambda f, rng: ("get", f"{API}{f.trip(rng)}/carpools", None, f.headers),
+}
+
+
+def send(client: Client, request: Request) -> int:
+    method, path, data, headers = request
+    if method == "get":
+        response = client.get(path, data or {}, headers=headers)
+    else:
+        response = client.post(path, json.dumps(data or {}), content_type="application/json", headers=headers)
+    if response.streaming:
+        b"".join(response.streaming_content)
+    return response.status_code
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    # Nearest-rank percentile.
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def profile(fixture: Fixture, build: Callable, samples: int, rng: random.Random) -> Dict[str, Any]:
+    """Sequential pass: DB queries and peak traced memory for each request."""
+    client = Client(raise_request_exception=False)
+    queries: List[int] = []
+    memory: List[float] = []
+    tracemalloc.start()
+    try:
+        for _ in range(samples):
+            request = build(fixture, rng)
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            with CaptureQueriesContext(connection) as captured:
+                send(client, request)
+            memory.append((tracemalloc.get_traced_memory()[1] - baseline) / 1024)
+            queries.append(len(captured.captured_queries))
+    finally:
+        tracemalloc.stop()
+    return {
+        "queriesPerRequest": round(statistics.mean(queries), 2) if queries else 0,
+        "maxQueriesPerRequest": max(queries, default=0),
+        "peakMemoryKbPerRequest": round(statistics.median(memory), 1) if memory else 0,
+    }
+
+
+def load(fixture: Fixture, build: Callable, total: int, concurrency: int, seed: int) -> Dict[str, Any]:
+    """Concurrent pass: latency percentiles and throughput."""
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    lock = threading.Lock()
+    local = threading.local()
+
+    def one(i: int) -> None:
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = Client(raise_request_exception=False)
+        request = build(fixture, random.Random(seed + i))
+        started = time.perf_counter()
+        try:
+            code = str(send(client, request))
+        except Exception as e:
+            code = type(e).__name__
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies.append(elapsed)
+            statuses[code] = statuses.get(code, 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - started
+
+    errors = sum(n for code, n in statuses.items() if not code.isdigit() or int(code) >= 400)
+    return {
+        "requests": total,
+        "errors": errors,
+        "statusCodes": statuses,
+        "p50Ms": round(percentile(latencies, 50), 2),
+        "p95Ms": round(percentile(latencies, 95), 2),
+        "p99Ms": round(percentile(latencies, 99), 2),
+        "meanMs": round(statistics.mean(latencies), 2) if latencies else 0,
+        "requestsPerSecond": round(total / wall, 1) if wall else 0,
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    regressions = []
+    for name, current in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        for metric in ("p95Ms", "queriesPerRequest"):
+            before, after = previous.get(metric) or 0, current.get(metric) or 0
+            if before and after > before * (1 + threshold):
+                regressions.append(f"{name}: {metric} {before} -> {after} (+{(after / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return ""
+
+
+def _distribution(spec: str) -> str:
+    """argparse type for fake Gemini distributions: reject a bad spec before anything is seeded."""
+    try:
+        fake_gemini.parse_distribution(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
+    return spec
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Scenario to run (repeatable); defaults to all.")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per scenario in the load pass.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--profile-requests", type=int, default=10, help="Sequential requests per scenario for query/memory profiling.")
+    parser.add_argument("--latency", type=_distribution, default="lognormal:0.05,0.5", help="Fake Gemini latency in seconds, e.g. fixed:0.2, uniform:0.1,0.8, lognormal:MEDIAN,SIGMA.")
+    parser.add_argument("--size", type=_distribution, default="fixed:1", help="Response size multiplier distribution applied to the recorded replies.")
+    parser.add_argument("--trips", type=int, default=50, help="Trips to seed.")
+    parser.add_argument("--warm", action="store_true", help="Keep the AI response cache and suggestion index on (measures hit paths).")
+    parser.add_argument("--async-views", action="store_true", help="Route AI endpoints to the native async views.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+    parser.add_argument("--baseline", help="Previous report to compare against; exits 1 on regressions.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative regression for --baseline (0.2 = 20%%).")
+    args = parser.parse_args()
+
+    settings.AI_CACHE_ENABLED = args.warm
+    settings.SUGGESTION_INDEX_ENABLED = args.warm
+    settings.ASYNC_AI_VIEWS = args.async_views
+    fake_gemini.install(latency=args.latency, size=args.size, seed=args.seed)
+
+    db_path = settings.DATABASES["default"]["NAME"]
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    call_command("migrate", verbosity=0)
+    fixture = Fixture(args.trips)
+
+    scenarios: Dict[str, Any] = {}
+    for name in args.scenario or list(SCENARIOS):
+        build = SCENARIOS[name]
+        result = profile(fixture, build, args.profile_requests, random.Random(args.seed))
+        result.update(load(fixture, build, args.requests, args.concurrency, args.seed))
+        scenarios[name] = result
+        print(f"{name:<24} p50 {result['p50Ms']:>9.1f}ms  p95 {result['p95Ms']:>9.1f}ms  {result['requestsPerSecond']:>8.1f} req/s", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "revision": _git_revision(),
+            "createdAt": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "latency": args.latency,
+            "size": args.size,
+            "concurrency": args.concurrency,
+            "warm": args.warm,
+            "asyncViews": args.async_views,
+        },
+        "scenarios": scenarios,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        for key in ("latency", "size", "concurrency", "warm", "asyncViews"):
+            if baseline.get("meta", {}).get(key) != report["meta"][key]:
+                print(f"warning: baseline was run with {key}={baseline.get('meta', {}).get(key)!r}", file=sys.stderr)
+        regressions = compare(report, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised without touching the network while a host's circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Per-host breaker: ``failure_threshold`` consecutive failures open it for ``reset_timeout``
+    seconds, then a single trial request decides whether it closes again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def release(self) -> None:
+        """End a trial without a verdict (the request was interrupted)."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class HttpClient:
+    """
+    Outbound HTTP for integrations: keep-alive connection pools shared by all threads (each
+    thread gets its own ``requests.Session`` mounted on the same adapters), at most
+    ``pool_maxsize`` connections per host, retries with jittered exponential backoff for
+    idempotent requests, default timeouts and a circuit breaker per host.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = True,
+        retries: int = 2,
+        backoff_factor: float = 0.2,
+        backoff_jitter: float = 0.2,
+        timeout: tuple[float, float] = (3.05, 8.0),
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        user_agent: str = "VoyageAI/1.0",
+    ):
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            backoff_jitter=backoff_jitter,
+            status_forcelist=RETRY_STATUSES,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block, max_retries=retry
+        )
+        self._local = threading.local()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+        self.short_circuited = 0
+
+    @property
+    def session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers["User-Agent"] = self.user_agent
+            session.mount("https://", self._adapter)
+            session.mount("http://", self._adapter)
+            self._local.session = session
+        return session
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """
+        Like ``requests.request``. Raises ``CircuitOpenError`` while the host is failing; a
+        5xx reply (after retries) or any exception from the request counts as a failure.
+        """
+        host = urlsplit(url).netloc
+        breaker = self.breaker(host)
+        if not breaker.allow():
+            with self._lock:
+                self.short_circuited += 1
+            raise CircuitOpenError(f"Circuit open for {host}")
+        kwargs.setdefault("timeout", self.timeout)
+        with self._lock:
+            self.requests += 1
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except Exception:
+            # Not only connection errors and timeouts: a half-open trial must always get a verdict.
+            self._failed(breaker)
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        if response.status_code >= 500:
+            self._failed(breaker)
+        else:
+            breaker.record_success()
+        return response
+
+    def _failed(self, breaker: CircuitBreaker) -> None:
+        breaker.record_failure()
+        with self._lock:
+            self.failures += 1
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            breakers = dict(self._breakers)
+            totals = {"requests": self.requests, "failures": self.failures, "shortCircuited": self.short_circuited}
+        return {
+            **totals,
+            "hosts": {
+                host: {"state": breaker.state, "consecutiveFailures": breaker.failures}
+                for host, breaker in breakers.items()
+            },
+        }
+
+
+_http_client: HttpClient | None = None
+_http_client_lock = threading.Lock()
+
+
+def _build_http_client() -> HttpClient:
+    return HttpClient(
+        pool_connections=getattr(settings, "HTTP_POOL_CONNECTIONS", 10),
+        pool_maxsize=getattr(settings, "HTTP_POOL_MAXSIZE", 10),
+        pool_block=getattr(settings, "HTTP_POOL_BLOCK", True),
+        retries=getattr(settings, "HTTP_RETRIES", 2),
+        backoff_factor=getattr(settings, "HTTP_BACKOFF_FACTOR", 0.2),
+        backoff_jitter=getattr(settings, "HTTP_BACKOFF_JITTER", 0.2),
+        timeout=(getattr(settings, "HTTP_CONNECT_TIMEOUT", 3.05), getattr(settings, "HTTP_READ_TIMEOUT", 8.0)),
+        failure_threshold=getattr(settings, "HTTP_BREAKER_FAILURES", 5),
+        reset_timeout=getattr(settings, "HTTP_BREAKER_RESET_SECONDS", 30.0),
+    )
+
+
+def get_http_client() -> HttpClient:
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                _http_client = _build_http_client()
+    return _http_client
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import time
+import uuid
+from datetime import date
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+
+from trips.cache import MemoryBackend
+from trips.models import Trip
+from users.models import User
+
+from .http import CircuitOpenError, HttpClient
+from .weather import WeatherCache, WeatherUnavailable
+
+
+def response(status: int) -> requests.Response:
+    reply = requests.Response()
+    reply.status_code = status
+    return reply
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.client = HttpClient(retries=0, failure_threshold=2, reset_timeout=60)
+        patcher = mock.patch.object(requests.Session, "request")
+        self.send = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def open_circuit(self):
+        self.send.side_effect = requests.ConnectionError("refused")
+        for _ in range(2):
+            with self.assertRaises(requests.ConnectionError):
+                self.client.get("http://api.test/x")
+        self.assertEqual(self.client.breaker("api.test").state, "open")
+
+    def start_trial(self):
+        self.client.breaker("api.test").opened_at -= 60
+
+    def test_open_circuit_short_circuits(self):
+        self.open_circuit()
+        with self.assertRaises(CircuitOpenError):
+            self.client.get("http://api.test/x")
+        self.assertEqual(self.send.call_count, 2)
+        self.assertEqual(self.client.stats()["shortCircuited"], 1)
+
+    def test_successful_trial_closes(self):
+        self.open_circuit()
+        self.start_trial()
+        self.send.side_effect = None
+        self.send.return_value = response(200)
+        self.assertEqual(self.client.get("http://api.test/x").status_code, 200)
+        self.assertEqual(self.client.breaker("api.test").state, "closed")
+
+    def test_server_errors_count_as_failures(self):
+        self.send.return_value = response(503)
+        self.client.get("http://api.test/x")
+        self.client.get("http://api.test/x")
+        self.assertEqual(self.client.breaker("api.test").state, "open")
+
+    def test_any_exception_ends_the_trial(self):
+        for error in (requests.exceptions.ChunkedEncodingError, requests.TooManyRedirects, ValueError):
+            self.open_circuit()
+            self.start_trial()
+            self.send.side_effect = error("broken")
+            with self.assertRaises(error):
+                self.client.get("http://api.test/x")
+            # The failed trial reopens the breaker; once the timeout passes again a new trial is allowed.
+            self.assertEqual(self.client.breaker("api.test").state, "open")
+            self.start_trial()
+            self.send.side_effect = None
+            self.send.return_value = response(200)
+            self.client.get("http://api.test/x")
+            self.assertEqual(self.client.breaker("api.test").state, "closed")
+
+    def test_interrupted_trial_is_released(self):
+        self.open_circuit()
+        self.start_trial()
+        self.send.side_effect = KeyboardInterrupt
+        with self.assertRaises(KeyboardInterrupt):
+            self.client.get("http://api.test/x")
+        self.assertTrue(self.client.breaker("api.test").allow())
+
+
+class WeatherCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = WeatherCache(MemoryBackend(), ttl=600, stale_ttl=3600, negative_ttl=60)
+        self.fetch = mock.Mock(return_value={"summary": "Sunny"})
+
+    def test_locations_share_an_entry_after_normalizing(self):
+        self.assertEqual(self.cache.get("Goa", self.fetch), {"summary": "Sunny"})
+        self.assertEqual(self.cache.get("  goa ", self.fetch), {"summary": "Sunny"})
+        self.assertEqual(self.fetch.call_count, 1)
+        self.assertEqual((self.cache.stats()["hits"], self.cache.stats()["misses"]), (1, 1))
+
+    def test_unknown_locations_are_remembered(self):
+        self.fetch.return_value = None
+        self.assertIsNone(self.cache.get("Atlantis", self.fetch))
+        self.assertIsNone(self.cache.get("Atlantis", self.fetch))
+        self.assertEqual(self.fetch.call_count, 1)
+        self.assertEqual(self.cache.stats()["negativeHits"], 1)
+
+    def test_stale_entry_is_served_while_refreshing(self):
+        self.cache.get("Goa", self.fetch)
+        self.fetch.return_value = {"summary": "Rain"}
+        with mock.patch("integrations.weather.time.time", return_value=time.time() + 601):
+            self.assertEqual(self.cache.get("Goa", self.fetch), {"summary": "Sunny"})
+        self.cache._executor.shutdown(wait=True)
+        self.assertEqual(self.cache.get("Goa", self.fetch), {"summary": "Rain"})
+        self.assertEqual((self.cache.stats()["staleHits"], self.cache.stats()["refreshes"]), (1, 1))
+
+    def test_provider_failure_is_not_cached(self):
+        self.fetch.side_effect = WeatherUnavailable("down")
+        with self.assertRaises(WeatherUnavailable):
+            self.cache.get("Goa", self.fetch)
+        self.fetch.side_effect = None
+        self.assertEqual(self.cache.get("Goa", self.fetch), {"summary": "Sunny"})
+        self.assertEqual(self.cache.stats()["errors"], 1)
+
+
+@mock.patch.dict("os.environ", {"OPENWEATHER_API_KEY": "test-key"})
+class WeatherBatchTests(TestCase):
+    URL = "/api/integrations/weather/batch"
+
+    def setUp(self):
+        self.client = APIClient()
+        cache = mock.patch("integrations.weather._weather_cache", WeatherCache(MemoryBackend()))
+        current = mock.patch("integrations.weather.fetch_weather", side_effect=lambda name, key: {"summary": "Sunny"})
+        forecast = mock.patch(
+            "integrations.weather.fetch_forecast",
+            side_effect=lambda name, key: {"days": [{"date": "2026-01-01"}, {"date": "2026-01-02"}, {"date": "2026-01-03"}]},
+        )
+        _, self.fetch_weather, self.fetch_forecast = [patcher.start() for patcher in (cache, current, forecast)]
+        for patcher in (cache, current, forecast):
+            self.addCleanup(patcher.stop)
+
+    def post(self, body):
+        return self.client.post(self.URL, body, format="json")
+
+    def test_locations_are_looked_up_once_and_returned_in_order(self):
+        reply = self.post(
+            {
+                "locations": [
+                    "Paris",
+                    {"location": " paris ", "startDate": "2026-01-02", "endDate": "2026-01-03"},
+                    "",
+                    {"location": "Rome", "startDate": "soon"},
+                ]
+            }
+        )
+        self.assertEqual(reply.status_code, 200)
+        results = reply.json()["results"]
+        self.assertEqual([result["data"]["location"] for result in results[:2]], ["Paris", "paris"])
+        self.assertEqual([day["date"] for day in results[1]["forecast"]], ["2026-01-02", "2026-01-03"])
+        self.assertEqual([result.get("error") for result in results[2:]], ["location is required", "dates must be YYYY-MM-DD"])
+        self.assertEqual((self.fetch_weather.call_count, self.fetch_forecast.call_count), (1, 1))
+
+    def test_non_string_locations_are_accepted(self):
+        reply = self.post({"locations": [5]})
+        self.assertEqual(reply.status_code, 200)
+        self.assertEqual(reply.json()["results"][0]["data"]["location"], "5")
+
+    def test_trip_ids_expand_to_the_callers_trips(self):
+        owner = User.objects.create(email=f"{uuid.uuid4().hex}@example.com", name="Tester")
+        other = User.objects.create(email=f"{uuid.uuid4().hex}@example.com", name="Other")
+        mine = Trip.objects.create(owner=owner, title="Goa", location="Goa", start_date=date(2026, 1, 1), end_date=date(2026, 1, 1))
+        theirs = Trip.objects.create(owner=other, title="Rome", location="Rome")
+        self.assertEqual(self.post({"tripIds": [str(mine.id)]}).status_code, 401)
+        self.client.force_authenticate(owner)
+        results = self.post({"tripIds": [str(mine.id), str(theirs.id), "not-a-uuid"]}).json()["results"]
+        self.assertEqual([(result["tripId"], len(result["forecast"])) for result in results], [(str(mine.id), 1)])
+
+    def test_malformed_bodies_are_rejected(self):
+        self.assertEqual(self.post(["Paris"]).status_code, 400)
+        self.assertEqual(self.post({"locations": "Paris"}).status_code, 400)
+        self.assertEqual(self.post({}).status_code, 400)
+        with self.settings(WEATHER_BATCH_MAX_LOCATIONS=2):
+            self.assertEqual(self.post({"locations": ["a", "b", "c"]}).status_code, 400)
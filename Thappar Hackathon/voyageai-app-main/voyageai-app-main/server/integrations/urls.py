@@ -1,8 +1,11 @@
 from django.urls import path
 
-from .views import WeatherView
+from .views import DatabaseStatsView, HttpClientStatsView, WeatherBatchView, WeatherCacheStatsView, WeatherView
 
 urlpatterns = [
     path("weather", WeatherView.as_view(), name="weather"),
+    path("weather/batch", WeatherBatchView.as_view(), name="weather-batch"),
+    path("weather/cache", WeatherCacheStatsView.as_view(), name="weather-cache"),
+    path("http", HttpClientStatsView.as_view(), name="http-client"),
+    path("db", DatabaseStatsView.as_view(), name="db-stats"),
 ]
-
@@ -1,48 +1,102 @@
 from __future__ import annotations
 
-import os
-from datetime import datetime
-from typing import Any
+import uuid
 
-import requests
-from rest_framework import permissions
+from django.conf import settings
+from django.db import connections
+from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from trips.models import Trip
+from voyage_backend.db.pool import pool_stats
+
+from .http import get_http_client
+from .weather import get_weather, get_weather_cache, weather_batch
+
 
 class WeatherView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request):
         location = request.query_params.get("location", "Unknown")
-        api_key = os.getenv("OPENWEATHER_API_KEY")
-        if not api_key:
-            sample = {
-                "location": location,
-                "summary": "Partly cloudy",
-                "tempC": 24,
-                "retrievedAt": datetime.utcnow().isoformat() + "Z",
-            }
-            return Response({"data": sample})
-
-        params = {"q": location, "appid": api_key, "units": "metric"}
-        try:
-            res = requests.get("https://api.openweathermap.org/data/2.5/weather", params=params, timeout=8)
-            res.raise_for_status()
-            payload: Any = res.json()
-            data = {
-                "location": location,
-                "summary": payload["weather"][0]["description"].title(),
-                "tempC": payload["main"]["temp"],
-                "retrievedAt": datetime.utcnow().isoformat() + "Z",
-            }
-            return Response({"data": data})
-        except requests.RequestException:
-            sample = {
-                "location": location,
-                "summary": "Weather unavailable",
-                "tempC": None,
-                "retrievedAt": datetime.utcnow().isoformat() + "Z",
-            }
-            return Response({"data": sample})
+        return Response({"data": get_weather(location)})
+
+
+class WeatherBatchView(APIView):
+    """
+    ``POST {"locations": ["Paris", {"location": "Rome", "startDate": "...", "endDate": "..."}],
+    "tripIds": [...]}``. Trip ids (the caller's own trips) expand to their location and dates.
+    """
+
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        if not isinstance(request.data, dict):
+            return Response({"error": "Expected a JSON object"}, status=status.HTTP_400_BAD_REQUEST)
+        locations = request.data.get("locations") or []
+        trip_ids = request.data.get("tripIds") or []
+        if not isinstance(locations, list) or not isinstance(trip_ids, list):
+            return Response({"error": "locations and tripIds must be lists"}, status=status.HTTP_400_BAD_REQUEST)
+        if trip_ids and not request.user.is_authenticated:
+            return Response({"error": "Authentication required for tripIds"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        items = [item if isinstance(item, dict) else {"location": item} for item in locations]
+        valid_ids = []
+        for trip_id in trip_ids:
+            try:
+                valid_ids.append(uuid.UUID(str(trip_id)))
+            except ValueError:
+                continue
+        if valid_ids:
+            trips = Trip.objects.filter(id__in=valid_ids, owner=request.user).only("id", "location", "start_date", "end_date")
+            items += [
+                {"tripId": str(trip.id), "location": trip.location, "startDate": trip.start_date, "endDate": trip.end_date}
+                for trip in trips
+            ]
+        if not items:
+            return Response({"error": "locations or tripIds is required"}, status=status.HTTP_400_BAD_REQUEST)
+        max_items = settings.WEATHER_BATCH_MAX_LOCATIONS
+        if len(items) > max_items:
+            return Response({"error": f"At most {max_items} locations per batch"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"results": weather_batch(items)})
+
+
+class WeatherCacheStatsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
 
+    def get(self, request):
+        return Response({"cache": get_weather_cache().stats()})
+
+    def delete(self, request):
+        get_weather_cache().clear()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class HttpClientStatsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({"http": get_http_client().stats()})
+
+
+class DatabaseStatsView(APIView):
+    """Connection settings per database alias, with pool counters for pooled aliases."""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        pools = pool_stats()
+        return Response(
+            {
+                "databases": {
+                    alias: {
+                        "engine": connections[alias].settings_dict["ENGINE"],
+                        "connMaxAge": connections[alias].settings_dict["CONN_MAX_AGE"],
+                        "healthChecks": connections[alias].settings_dict["CONN_HEALTH_CHECKS"],
+                        "pool": pools.get(alias),
+                    }
+                    for alias in connections
+                }
+            }
+        )
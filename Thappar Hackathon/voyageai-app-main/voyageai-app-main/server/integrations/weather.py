@@ -0,0 +1,349 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Any, Dict, List
+
+import requests
+from django.conf import settings
+
+from trips.cache import DjangoCacheBackend, MemoryBackend
+from trips.singleflight import SingleFlight
+
+from .http import get_http_client
+
+OPENWEATHER_URL = "https://api.openweathermap.org/data/2.5/weather"
+OPENWEATHER_FORECAST_URL = "https://api.openweathermap.org/data/2.5/forecast"
+
+
+class WeatherUnavailable(Exception):
+    """The weather provider could not be reached or answered with an error."""
+
+
+def normalize_location(location: str) -> str:
+    return " ".join(location.lower().replace(",", " ").split())
+
+
+def _now_iso() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def sample_weather(location: str, summary: str = "Partly cloudy", temp_c: float | None = 24) -> Dict[str, Any]:
+    return {"location": location, "summary": summary, "tempC": temp_c, "retrievedAt": _now_iso()}
+
+
+def fetch_weather(location: str, api_key: str) -> Dict[str, Any] | None:
+    """
+    Current conditions from OpenWeather. Returns None when the provider does not know the
+    location and raises ``WeatherUnavailable`` for anything worth retrying.
+    """
+    params = {"q": location, "appid": api_key, "units": "metric"}
+    try:
+        res = get_http_client().get(OPENWEATHER_URL, params=params)
+        if res.status_code in (400, 404):
+            return None
+        res.raise_for_status()
+        payload: Any = res.json()
+        return {
+            "location": location,
+            "summary": payload["weather"][0]["description"].title(),
+            "tempC": payload["main"]["temp"],
+            "retrievedAt": _now_iso(),
+        }
+    except (requests.RequestException, ValueError, KeyError, IndexError) as e:
+        raise WeatherUnavailable(str(e)) from e
+
+
+def fetch_forecast(location: str, api_key: str) -> Dict[str, Any] | None:
+    """OpenWeather's 5-day / 3-hour forecast folded into one entry per local date."""
+    params = {"q": location, "appid": api_key, "units": "metric"}
+    try:
+        res = get_http_client().get(OPENWEATHER_FORECAST_URL, params=params)
+        if res.status_code in (400, 404):
+            return None
+        res.raise_for_status()
+        payload: Any = res.json()
+        by_date: Dict[str, List[Dict[str, Any]]] = {}
+        offset = payload.get("city", {}).get("timezone", 0)
+        for slot in payload["list"]:
+            day = datetime.utcfromtimestamp(slot["dt"] + offset).date().isoformat()
+            by_date.setdefault(day, []).append(slot)
+        days = [
+            {
+                "date": day,
+                "summary": Counter(slot["weather"][0]["description"] for slot in slots).most_common(1)[0][0].title(),
+                "minC": min(slot["main"]["temp_min"] for slot in slots),
+                "maxC": max(slot["main"]["temp_max"] for slot in slots),
+            }
+            for day, slots in sorted(by_date.items())
+        ]
+        return {"location": location, "days": days, "retrievedAt": _now_iso()}
+    except (requests.RequestException, ValueError, KeyError, IndexError) as e:
+        raise WeatherUnavailable(str(e)) from e
+
+
+class WeatherCache:
+    """
+    Weather keyed on the normalized location. Entries are fresh for ``ttl`` seconds and then
+    served stale for up to ``stale_ttl`` more while one background refresh replaces them.
+    Locations the provider does not know are remembered for ``negative_ttl`` seconds.
+    """
+
+    def __init__(
+        self,
+        backend,
+        ttl: int = 600,
+        stale_ttl: int = 3600,
+        negative_ttl: int = 3600,
+        enabled: bool = True,
+        refresh_workers: int = 2,
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self.enabled = enabled
+        self.refresh_workers = refresh_workers
+        self.hits = 0
+        self.stale_hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._refreshing: set[str] = set()
+        self._executor: ThreadPoolExecutor | None = None
+        self._flight = SingleFlight()
+
+    @staticmethod
+    def key_for(location: str, kind: str = "current") -> str:
+        digest = hashlib.sha256(normalize_location(location).encode("utf-8")).hexdigest()
+        return f"weather:{kind}:{digest}"
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _read(self, key: str) -> Dict[str, Any] | None:
+        try:
+            return self.backend.get(key)
+        except Exception:
+            return None
+
+    def _store(self, key: str, data: Dict[str, Any] | None) -> Dict[str, Any]:
+        ttl = self.ttl if data is not None else self.negative_ttl
+        entry = {"data": data, "freshUntil": time.time() + ttl}
+        try:
+            # Keep the entry past its freshness so it can still be served while refreshing.
+            self.backend.set(key, entry, ttl + (self.stale_ttl if data is not None else 0))
+        except Exception:
+            pass
+        return entry
+
+    def _load(self, key: str, location: str, fetch) -> Dict[str, Any]:
+        try:
+            data = fetch(location)
+        except WeatherUnavailable:
+            self._count("errors")
+            raise
+        return self._store(key, data)
+
+    def _refresh(self, key: str, location: str, fetch) -> None:
+        try:
+            self._load(key, location, fetch)
+            self._count("refreshes")
+        except WeatherUnavailable:
+            # Keep serving the stale entry; the next stale read schedules another try.
+            pass
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _schedule_refresh(self, key: str, location: str, fetch) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.refresh_workers, thread_name_prefix="weather-refresh")
+        self._executor.submit(self._refresh, key, location, fetch)
+
+    def get(self, location: str, fetch, kind: str = "current") -> Dict[str, Any] | None:
+        """
+        Weather for ``location``, calling ``fetch(location)`` only on a miss (concurrent misses
+        share one call). Returns None for unknown locations; raises ``WeatherUnavailable`` when
+        there is nothing cached and the provider fails. ``kind`` separates current conditions
+        from forecasts.
+        """
+        if not self.enabled:
+            return fetch(location)
+        key = self.key_for(location, kind)
+        entry = self._read(key)
+        if entry is not None:
+            if entry["data"] is None:
+                self._count("negative_hits")
+            elif entry["freshUntil"] >= time.time():
+                self._count("hits")
+            else:
+                self._count("stale_hits")
+                self._schedule_refresh(key, location, fetch)
+            return entry["data"]
+
+        self._count("misses")
+        entry = self._flight.do(key, lambda: self._load(key, location, fetch))
+        return entry["data"]
+
+    def clear(self) -> None:
+        self.backend.clear()
+        with self._lock:
+            self.hits = self.stale_hits = self.negative_hits = self.misses = self.refreshes = self.errors = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            served = self.hits + self.stale_hits + self.negative_hits
+            total = served + self.misses
+            return {
+                "backend": type(self.backend).__name__,
+                "hits": self.hits,
+                "staleHits": self.stale_hits,
+                "negativeHits": self.negative_hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "errors": self.errors,
+                "hitRate": round(served / total, 4) if total else 0.0,
+            }
+
+
+_weather_cache: WeatherCache | None = None
+_weather_cache_lock = threading.Lock()
+
+
+def _build_weather_cache() -> WeatherCache:
+    if getattr(settings, "WEATHER_CACHE_BACKEND", "memory") == "django":
+        backend = DjangoCacheBackend(getattr(settings, "WEATHER_CACHE_ALIAS", "default"))
+    else:
+        backend = MemoryBackend(getattr(settings, "WEATHER_CACHE_MAX_ENTRIES", 2048))
+    return WeatherCache(
+        backend,
+        ttl=getattr(settings, "WEATHER_CACHE_TTL", 600),
+        stale_ttl=getattr(settings, "WEATHER_CACHE_STALE_TTL", 3600),
+        negative_ttl=getattr(settings, "WEATHER_CACHE_NEGATIVE_TTL", 3600),
+        enabled=getattr(settings, "WEATHER_CACHE_ENABLED", True),
+    )
+
+
+def get_weather_cache() -> WeatherCache:
+    global _weather_cache
+    if _weather_cache is None:
+        with _weather_cache_lock:
+            if _weather_cache is None:
+                _weather_cache = _build_weather_cache()
+    return _weather_cache
+
+
+def get_weather(location: str) -> Dict[str, Any]:
+    """The ``data`` payload of the weather endpoint, served through the weather cache."""
+    api_key = os.getenv("OPENWEATHER_API_KEY")
+    if not api_key:
+        return sample_weather(location)
+    try:
+        data = get_weather_cache().get(location, lambda name: fetch_weather(name, api_key))
+    except WeatherUnavailable:
+        data = None
+    if data is None:
+        return sample_weather(location, summary="Weather unavailable", temp_c=None)
+    # Cached per normalized location; echo the caller's spelling back.
+    return {**data, "location": location}
+
+
+def get_forecast(location: str, start: date | None = None, end: date | None = None) -> List[Dict[str, Any]]:
+    """
+    Daily forecast entries for ``location`` between ``start`` and ``end`` (inclusive). Only the
+    next five days are forecast, so later trips get an empty list.
+    """
+    api_key = os.getenv("OPENWEATHER_API_KEY")
+    if not api_key:
+        return []
+    try:
+        data = get_weather_cache().get(location, lambda name: fetch_forecast(name, api_key), kind="forecast")
+    except WeatherUnavailable:
+        data = None
+    return _between(data["days"] if data else [], start, end)
+
+
+def _between(days: List[Dict[str, Any]], start: date | None, end: date | None) -> List[Dict[str, Any]]:
+    return [
+        day
+        for day in days
+        if (start is None or day["date"] >= start.isoformat()) and (end is None or day["date"] <= end.isoformat())
+    ]
+
+
+_batch_executor: ThreadPoolExecutor | None = None
+_batch_executor_lock = threading.Lock()
+
+
+def _get_batch_executor() -> ThreadPoolExecutor:
+    global _batch_executor
+    if _batch_executor is None:
+        with _batch_executor_lock:
+            if _batch_executor is None:
+                _batch_executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "WEATHER_BATCH_WORKERS", 8),
+                    thread_name_prefix="weather-batch",
+                )
+    return _batch_executor
+
+
+def _parse_date(value: Any) -> date | None:
+    if value in (None, ""):
+        return None
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value))
+
+
+def weather_batch(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Current weather (and, for items with ``startDate``/``endDate``, the matching forecast
+    days) for many locations. Each distinct normalized location is looked up once per kind,
+    lookups run in parallel on a bounded pool and go through the weather cache, and results
+    come back in request order.
+    """
+    futures: Dict[tuple[str, str], Any] = {}
+    plan: List[tuple[Dict[str, Any], str, tuple[date | None, date | None] | None]] = []
+    executor = _get_batch_executor()
+    for item in items:
+        location = str(item.get("location") or "").strip()
+        entry = {key: item[key] for key in ("location", "tripId", "startDate", "endDate") if item.get(key)}
+        if not location:
+            plan.append(({**entry, "error": "location is required"}, location, None))
+            continue
+        try:
+            dates = (_parse_date(item.get("startDate")), _parse_date(item.get("endDate")))
+        except ValueError:
+            plan.append(({**entry, "error": "dates must be YYYY-MM-DD"}, location, None))
+            continue
+        normalized = normalize_location(location)
+        if (normalized, "current") not in futures:
+            futures[(normalized, "current")] = executor.submit(get_weather, location)
+        if any(dates) and (normalized, "forecast") not in futures:
+            futures[(normalized, "forecast")] = executor.submit(get_forecast, location)
+        plan.append((entry, location, dates))
+
+    results = []
+    for entry, location, dates in plan:
+        if dates is None:
+            results.append(entry)
+            continue
+        normalized = normalize_location(location)
+        result = {**entry, "data": {**futures[(normalized, "current")].result(), "location": location}}
+        if any(dates):
+            result["forecast"] = _between(futures[(normalized, "forecast")].result(), *dates)
+        results.append(result)
+    return results
@@ -1,14 +1,17 @@
 from __future__ import annotations
 
+import asyncio
 import json
-import os
-import re
-from typing import Any, Dict, List
+import weakref
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List
 
-try:
-    import google.generativeai as genai
-except ImportError:
-    genai = None  # Gemini optional during development
+from django.conf import settings
+
+from .cache import get_response_cache, make_cache_key
+from .client import get_model_registry
+from .jsonstream import ArrayItemStream, extract_json_checked
+from .singleflight import get_async_single_flight, get_single_flight
+from .streaming import iterate_in_thread
 
 
 DEFAULT_ITINERARY = {
@@ -28,26 +31,154 @@ DEFAULT_ITINERARY = {
 }
 
 
-def _extract_json_blob(text: str) -> str:
-    """Extract JSON object from text response."""
-    match = re.search(r"\{.*\}", text, re.DOTALL)
-    if match:
-        return match.group(0)
-    return text
+def _get_model(model_name: str | None = None):
+    """Return the shared Gemini model, or None when Gemini is not configured."""
+    return get_model_registry().get(model_name)
 
 
-def _get_model():
-    """Initialize and return Gemini model."""
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key or genai is None:
-        return None
-    
-    try:
-        genai.configure(api_key=api_key)
-        model_name = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
-        return genai.GenerativeModel(model_name)
-    except Exception:
-        return None
+def _response_text(response) -> str:
+    """Collect the text of a Gemini response, falling back to candidate parts."""
+    if getattr(response, "text", None):
+        return response.text
+    if getattr(response, "candidates", None):
+        return "".join(part.text for candidate in response.candidates for part in candidate.content.parts if getattr(part, "text", ""))
+    return ""
+
+
+def _generate_json(
+    function: str,
+    model,
+    prompt: Any,
+    generation_config: Dict[str, Any] | None = None,
+    accept: Callable[[Any], bool] | None = None,
+) -> Any:
+    """
+    Call Gemini and parse the JSON reply, serving identical requests from the response cache.
+    Only complete results that parse (and pass ``accept``) are cached, so a bad or truncated
+    reply is retried next time. Concurrent identical requests share one upstream call and its
+    parsed result.
+    """
+    cache = get_response_cache()
+    key = make_cache_key(function, getattr(model, "model_name", ""), prompt, generation_config)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    def call():
+        if generation_config:
+            response = model.generate_content(prompt, generation_config=generation_config)
+        else:
+            response = model.generate_content(prompt)
+        result, repaired = extract_json_checked(_response_text(response))
+        if not repaired and (accept is None or accept(result)):
+            cache.set(function, key, result)
+        return result
+
+    return get_single_flight().do(key, call, recheck=lambda: cache.peek(key))
+
+
+def _is_itinerary(result: Any) -> bool:
+    return isinstance(result, dict) and ("summary" in result or "days" in result)
+
+
+ITINERARY_GENERATION_CONFIG = {"response_mime_type": "application/json"}
+
+
+def _itinerary_prompt(trip, extra_context: Dict[str, Any] | None = None) -> str:
+    """Build the itinerary prompt for ``trip`` and the traveller preferences in ``extra_context``."""
+    # Calculate trip duration
+    days = 1
+    if trip.start_date and trip.end_date:
+        days = (trip.end_date - trip.start_date).days + 1
+
+    # Extract preferences
+    budget_usd = trip.budget_cents // 100 if trip.budget_cents else 0
+    group_size = extra_context.get("group_size", "solo") if extra_context else "solo"
+    travel_pace = extra_context.get("travel_pace", "moderate") if extra_context else "moderate"
+    interests = extra_context.get("interests", []) if extra_context else []
+    special_requirements = extra_context.get("special_requirements", []) if extra_context else []
+
+    # Build detailed prompt
+    return (
+        "You are an expert travel planner specializing in creating accurate, detailed, and practical itineraries. "
+        "Your goal is to create a comprehensive day-by-day itinerary that perfectly matches the traveler's preferences and constraints.\n\n"
+        f"TRIP DETAILS:\n"
+        f"- Destination: {trip.location}\n"
+        f"- Duration: {days} days\n"
+        f"- Group Size: {group_size}\n"
+        f"- Total Budget: ${budget_usd}\n"
+        f"- Daily Budget: ${budget_usd // days if days > 0 else budget_usd}\n"
+        f"- Travel Pace: {travel_pace} (relaxed=2-3 activities/day, moderate=4-5 activities/day, fast-paced=6+ activities/day)\n"
+        f"- Interests: {', '.join(interests) if interests else 'general tourism'}\n"
+        f"- Special Requirements: {', '.join(special_requirements) if special_requirements else 'none'}\n\n"
+        "REQUIREMENTS FOR JSON RESPONSE:\n"
+        "1. Generate a DETAILED summary explaining the essence of the trip\n"
+        "2. For EACH DAY, provide:\n"
+        "   - Morning activity (specific time and location)\n"
+        "   - Afternoon activity (specific time and location)\n"
+        "   - Evening activity (specific time and location)\n"
+        "   - Dining recommendation (specific restaurant or cuisine type)\n"
+        "   - Estimated costs\n"
+        "3. Include 2-3 alternative day plans for different preferences or weather\n"
+        "4. Provide 10+ practical money-saving tips specific to the destination and budget tier\n"
+        "5. Include emergency contacts and important local information\n"
+        "6. Suggest the best neighborhoods/areas to stay in\n"
+        "7. Include transportation recommendations between attractions\n\n"
+        "RETURN ONLY a valid JSON object with this EXACT structure:\n"
+        "{\n"
+        '  "summary": "Detailed 2-3 sentence summary of the entire trip",\n'
+        '  "highlights": ["Top 5 must-see attractions"],\n'
+        '  "best_neighborhoods": ["neighborhood 1", "neighborhood 2"],\n'
+        '  "days": [\n'
+        '    {\n'
+        '      "day": 1,\n'
+        '      "theme": "Arrival & Exploration",\n'
+        '      "activities": [\n'
+        '        {"time": "09:00-12:00", "activity": "Specific activity", "location": "Specific location", "cost": "$X"},\n'
+        '        {"time": "12:00-14:00", "activity": "Lunch at...", "location": "Restaurant name", "cost": "$X"},\n'
+        '        {"time": "14:00-17:00", "activity": "Afternoon activity", "location": "Specific location", "cost": "$X"},\n'
+        '        {"time": "18:00-20:00", "activity": "Dinner at...", "location": "Restaurant name", "cost": "$X"},\n'
+        '        {"time": "20:00-22:00", "activity": "Evening activity", "location": "Specific location", "cost": "$0"}\n'
+        '      ],\n'
+        '      "daily_budget": "$X",\n'
+        '      "notes": "Practical tips for this day"\n'
+        '    }\n'
+        '  ],\n'
+        '  "alternatives": [\n'
+        '    {\n'
+        '      "title": "Rainy Day Plan",\n'
+        '      "activities": ["Indoor activity 1", "Indoor activity 2", "Indoor activity 3"],\n'
+        '      "reason": "Explanation of when to use this plan"\n'
+        '    }\n'
+        '  ],\n'
+        '  "budget_breakdown": {\n'
+        '    "accommodation": {"daily": "$X", "total": "$X", "recommendation": "Where to stay"},\n'
+        '    "food": {"daily": "$X", "total": "$X", "tips": ["Budget eating tip 1", "Budget eating tip 2"]},\n'
+        '    "activities": {"daily": "$X", "total": "$X", "tips": ["Activity cost-saving tip 1"]},\n'
+        '    "transport": {"daily": "$X", "total": "$X", "recommendations": "Public transit card, shared rides, etc"}\n'
+        '  },\n'
+        '  "budget_tips": [\n'
+        '    "Specific, actionable tip 1",\n'
+        '    "Specific, actionable tip 2",\n'
+        '    "...(at least 10 tips)"\n'
+        '  ],\n'
+        '  "local_info": {\n'
+        '    "emergency": "Emergency number and what it covers",\n'
+        '    "currency_exchange": "Best places to exchange money and exchange rates",\n'
+        '    "transportation": "Best ways to get around the city",\n'
+        '    "safety": "Safety tips and areas to avoid",\n'
+        '    "cultural_tips": "Important customs and etiquette"\n'
+        '  }\n'
+        "}\n\n"
+        "IMPORTANT:\n"
+        "- Make activities SPECIFIC to the destination, not generic\n"
+        "- Include REAL neighborhood names and restaurant types\n"
+        "- Budget should be realistic for the destination and tier provided\n"
+        "- Respect the travel pace preference (not too many or too few activities)\n"
+        "- Include interests in activity recommendations\n"
+        "- Consider special requirements in all suggestions\n"
+        "- Be practical and helpful, not overly promotional\n"
+    )
 
 
 def generate_itinerary(trip, extra_context: Dict[str, Any] | None = None) -> Dict[str, Any]:
@@ -60,117 +191,16 @@ def generate_itinerary(trip, extra_context: Dict[str, Any] | None = None) -> Dic
         return DEFAULT_ITINERARY
 
     try:
-        # Calculate trip duration
-        days = 1
-        if trip.start_date and trip.end_date:
-            days = (trip.end_date - trip.start_date).days + 1
-        
-        # Extract preferences
-        budget_usd = trip.budget_cents // 100 if trip.budget_cents else 0
-        group_size = extra_context.get("group_size", "solo") if extra_context else "solo"
-        travel_pace = extra_context.get("travel_pace", "moderate") if extra_context else "moderate"
-        interests = extra_context.get("interests", []) if extra_context else []
-        special_requirements = extra_context.get("special_requirements", []) if extra_context else []
-        
-        # Build detailed prompt
-        itinerary_prompt = (
-            "You are an expert travel planner specializing in creating accurate, detailed, and practical itineraries. "
-            "Your goal is to create a comprehensive day-by-day itinerary that perfectly matches the traveler's preferences and constraints.\n\n"
-            f"TRIP DETAILS:\n"
-            f"- Destination: {trip.location}\n"
-            f"- Duration: {days} days\n"
-            f"- Group Size: {group_size}\n"
-            f"- Total Budget: ${budget_usd}\n"
-            f"- Daily Budget: ${budget_usd // days if days > 0 else budget_usd}\n"
-            f"- Travel Pace: {travel_pace} (relaxed=2-3 activities/day, moderate=4-5 activities/day, fast-paced=6+ activities/day)\n"
-            f"- Interests: {', '.join(interests) if interests else 'general tourism'}\n"
-            f"- Special Requirements: {', '.join(special_requirements) if special_requirements else 'none'}\n\n"
-            "REQUIREMENTS FOR JSON RESPONSE:\n"
-            "1. Generate a DETAILED summary explaining the essence of the trip\n"
-            "2. For EACH DAY, provide:\n"
-            "   - Morning activity (specific time and location)\n"
-            "   - Afternoon activity (specific time and location)\n"
-            "   - Evening activity (specific time and location)\n"
-            "   - Dining recommendation (specific restaurant or cuisine type)\n"
-            "   - Estimated costs\n"
-            "3. Include 2-3 alternative day plans for different preferences or weather\n"
-            "4. Provide 10+ practical money-saving tips specific to the destination and budget tier\n"
-            "5. Include emergency contacts and important local information\n"
-            "6. Suggest the best neighborhoods/areas to stay in\n"
-            "7. Include transportation recommendations between attractions\n\n"
-            "RETURN ONLY a valid JSON object with this EXACT structure:\n"
-            "{\n"
-            '  "summary": "Detailed 2-3 sentence summary of the entire trip",\n'
-            '  "highlights": ["Top 5 must-see attractions"],\n'
-            '  "best_neighborhoods": ["neighborhood 1", "neighborhood 2"],\n'
-            '  "days": [\n'
-            '    {\n'
-            '      "day": 1,\n'
-            '      "theme": "Arrival & Exploration",\n'
-            '      "activities": [\n'
-            '        {"time": "09:00-12:00", "activity": "Specific activity", "location": "Specific location", "cost": "$X"},\n'
-            '        {"time": "12:00-14:00", "activity": "Lunch at...", "location": "Restaurant name", "cost": "$X"},\n'
-            '        {"time": "14:00-17:00", "activity": "Afternoon activity", "location": "Specific location", "cost": "$X"},\n'
-            '        {"time": "18:00-20:00", "activity": "Dinner at...", "location": "Restaurant name", "cost": "$X"},\n'
-            '        {"time": "20:00-22:00", "activity": "Evening activity", "location": "Specific location", "cost": "$0"}\n'
-            '      ],\n'
-            '      "daily_budget": "$X",\n'
-            '      "notes": "Practical tips for this day"\n'
-            '    }\n'
-            '  ],\n'
-            '  "alternatives": [\n'
-            '    {\n'
-            '      "title": "Rainy Day Plan",\n'
-            '      "activities": ["Indoor activity 1", "Indoor activity 2", "Indoor activity 3"],\n'
-            '      "reason": "Explanation of when to use this plan"\n'
-            '    }\n'
-            '  ],\n'
-            '  "budget_breakdown": {\n'
-            '    "accommodation": {"daily": "$X", "total": "$X", "recommendation": "Where to stay"},\n'
-            '    "food": {"daily": "$X", "total": "$X", "tips": ["Budget eating tip 1", "Budget eating tip 2"]},\n'
-            '    "activities": {"daily": "$X", "total": "$X", "tips": ["Activity cost-saving tip 1"]},\n'
-            '    "transport": {"daily": "$X", "total": "$X", "recommendations": "Public transit card, shared rides, etc"}\n'
-            '  },\n'
-            '  "budget_tips": [\n'
-            '    "Specific, actionable tip 1",\n'
-            '    "Specific, actionable tip 2",\n'
-            '    "...(at least 10 tips)"\n'
-            '  ],\n'
-            '  "local_info": {\n'
-            '    "emergency": "Emergency number and what it covers",\n'
-            '    "currency_exchange": "Best places to exchange money and exchange rates",\n'
-            '    "transportation": "Best ways to get around the city",\n'
-            '    "safety": "Safety tips and areas to avoid",\n'
-            '    "cultural_tips": "Important customs and etiquette"\n'
-            '  }\n'
-            "}\n\n"
-            "IMPORTANT:\n"
-            "- Make activities SPECIFIC to the destination, not generic\n"
-            "- Include REAL neighborhood names and restaurant types\n"
-            "- Budget should be realistic for the destination and tier provided\n"
-            "- Respect the travel pace preference (not too many or too few activities)\n"
-            "- Include interests in activity recommendations\n"
-            "- Consider special requirements in all suggestions\n"
-            "- Be practical and helpful, not overly promotional\n"
-        )
-
-        response = model.generate_content(
-            itinerary_prompt,
-            generation_config={"response_mime_type": "application/json"},
+        result = _generate_json(
+            "itinerary",
+            model,
+            _itinerary_prompt(trip, extra_context),
+            generation_config=ITINERARY_GENERATION_CONFIG,
+            accept=_is_itinerary,
         )
 
-        if hasattr(response, "text") and response.text:
-            raw = response.text
-        elif response.candidates:
-            raw = "".join(part.text for candidate in response.candidates for part in candidate.content.parts if getattr(part, "text", ""))
-        else:
-            return DEFAULT_ITINERARY
-
-        cleaned = _extract_json_blob(raw)
-        result = json.loads(cleaned)
-        
         # Validate that we got the expected structure
-        if "summary" in result or "days" in result:
+        if _is_itinerary(result):
             return result
         else:
             return DEFAULT_ITINERARY
@@ -180,207 +210,427 @@ def generate_itinerary(trip, extra_context: Dict[str, Any] | None = None) -> Dic
         return DEFAULT_ITINERARY
 
 
-def generate_trip_suggestions(location: str, budget: int | None = None, duration: int | None = None, interests: List[str] | None = None) -> Dict[str, Any]:
-    """Generate detailed and accurate travel suggestions for a location using Gemini."""
+def _is_itinerary_day(result: Any) -> bool:
+    return isinstance(result, dict) and isinstance(result.get("activities"), list)
+
+
+def _itinerary_day_prompt(
+    trip,
+    number: int,
+    current_day: Dict[str, Any] | None,
+    other_days: List[Dict[str, Any]],
+    extra_context: Dict[str, Any] | None = None,
+) -> str:
+    """Prompt for rewriting a single day; the rest of the plan is only summarized by theme."""
+    extra_context = extra_context or {}
+    days = len(other_days) + 1
+    budget_usd = trip.budget_cents // 100 if trip.budget_cents else 0
+    interests = extra_context.get("interests", [])
+    special_requirements = extra_context.get("special_requirements", [])
+    others = "\n".join(
+        f"- Day {day.get('day')}: {day.get('theme') or ', '.join(_activity_names(day)[:3])}" for day in other_days
+    )
+    return (
+        "You are an expert travel planner revising a single day of an existing itinerary.\n\n"
+        f"TRIP: {days} days in {trip.location}, total budget ${budget_usd} "
+        f"(about ${budget_usd // days if days else budget_usd} per day).\n"
+        f"- Travel Pace: {extra_context.get('travel_pace', 'moderate')}\n"
+        f"- Interests: {', '.join(interests) if interests else 'general tourism'}\n"
+        f"- Special Requirements: {', '.join(special_requirements) if special_requirements else 'none'}\n\n"
+        f"OTHER DAYS (keep them as they are and do not repeat their activities):\n{others or '- none'}\n\n"
+        f"CURRENT PLAN FOR DAY {number}:\n{json.dumps(current_day or {})}\n\n"
+        f"CHANGE REQUEST: {extra_context.get('instructions') or 'Suggest a fresh, better plan for this day.'}\n\n"
+        "RETURN ONLY a valid JSON object for this one day with this EXACT structure:\n"
+        "{\n"
+        f'  "day": {number},\n'
+        '  "theme": "Short theme for the day",\n'
+        '  "activities": [\n'
+        '    {"time": "09:00-12:00", "activity": "Specific activity", "location": "Specific location", "cost": "$X"}\n'
+        "  ],\n"
+        '  "daily_budget": "$X",\n'
+        '  "notes": "Practical tips for this day"\n'
+        "}\n"
+    )
+
+
+def _activity_names(day: Dict[str, Any]) -> List[str]:
+    names = []
+    for activity in day.get("activities") or []:
+        names.append(activity.get("activity", "") if isinstance(activity, dict) else str(activity))
+    return names
+
+
+def generate_itinerary_day(
+    trip,
+    number: int,
+    current_day: Dict[str, Any] | None,
+    other_days: List[Dict[str, Any]],
+    extra_context: Dict[str, Any] | None = None,
+) -> Dict[str, Any] | None:
+    """Regenerate one itinerary day. Returns None when Gemini is unavailable or the reply is unusable."""
     model = _get_model()
     if not model:
-        return {"suggestions": [], "error": "AI model not configured"}
+        return None
 
     try:
-        budget_usd = budget // 100 if budget else None
-        budget_str = f"${budget_usd} total" if budget_usd else "flexible budget"
-        duration_str = f"{duration} days" if duration else "flexible duration"
-        
-        # Build interest-specific guidelines
-        interests_list = interests if interests else []
-        if interests_list:
-            interests_str = f"PRIMARY INTERESTS: {', '.join(interests_list)}"
-            # Create interest-specific guidance for each suggestion
-            interest_guidance = "\n".join([
-                f"- For travelers interested in {interests_list[i % len(interests_list)]}: emphasize activities that {interests_list[i % len(interests_list)].lower()} enthusiasts enjoy most"
-                for i in range(5)
-            ]) if interests_list else ""
-        else:
-            interests_str = "Provide diverse destination types"
-            interest_guidance = ""
-        
-        prompt = (
-            f"You are an expert travel planner specializing in personalized destination recommendations. "
-            f"Create 5 COMPLETELY DIFFERENT and HIGHLY PERSONALIZED destination suggestions FROM {location}.\n\n"
-            f"TRAVELER PROFILE:\n"
-            f"- Originating from: {location}\n"
-            f"- Total Budget: {budget_str}\n"
-            f"- Trip Duration: {duration_str}\n"
-            f"- {interests_str}\n\n"
-            f"DESTINATION DIVERSITY REQUIREMENT (CRITICAL):\n"
-            f"Each of the 5 destinations must be fundamentally DIFFERENT:\n"
-            f"1. First destination: Beach/Coastal destination (relaxation focused)\n"
-            f"2. Second destination: Cultural/Historical destination (museums, heritage sites)\n"
-            f"3. Third destination: Adventure/Mountain destination (outdoor activities)\n"
-            f"4. Fourth destination: Urban/Metropolitan destination (food, nightlife, shopping)\n"
-            f"5. Fifth destination: Nature/Wildlife destination (eco-tourism, national parks)\n\n"
-            f"INTEREST ALIGNMENT REQUIREMENT:\n"
-            f"If interests are provided: Tailor EACH destination to showcase how it matches the specified interests.\n"
-            f"Activities, highlights, and local experiences must align with the provided preferences.\n"
-            f"{interest_guidance}\n\n"
-            f"For EACH of the 5 destinations, provide COMPREHENSIVE and DISTINCT information:\n\n"
-            f"RETURN A VALID JSON ARRAY containing 5 objects with these EXACT fields:\n"
-            f"{{\n"
-            f'  "destination": "Specific City/Region Name (not generic)",\n'
-            f'  "country": "Country name",\n'
-            f'  "title": "Creative, memorable title reflecting the destination character",\n'
-            f'  "description": "One-line engaging description highlighting what makes it UNIQUE",\n'
-            f'  "destinationType": "Beach/Cultural/Adventure/Urban/Nature - clearly categorized",\n'
-            f'  "longDescription": "Detailed 3-4 sentence description explaining unique characteristics and why it stands out from other destinations",\n'
-            f'  "reasonToVisit": "ONE compelling, specific reason why this destination matches the interests provided",\n'
-            f'  "whySpecialForYou": "Detailed paragraph (4-5 sentences) explaining exactly how this destination aligns with the specified interests and budget tier",\n'
-            f'  "highlights": [\n'
-            f'    "Specific, named highlight 1 with brief explanation",\n'
-            f'    "Specific, named highlight 2 with brief explanation",\n'
-            f'    "Specific, named highlight 3 with brief explanation",\n'
-            f'    "Specific, named highlight 4 with brief explanation",\n'
-            f'    "Specific, named highlight 5 with brief explanation",\n'
-            f'    "Specific, named highlight 6 with brief explanation",\n'
-            f'    "Specific, named highlight 7 with brief explanation"\n'
-            f'  ],\n'
-            f'  "activities": [\n'
-            f'    "Specific activity 1 aligned with interests - detailed description",\n'
-            f'    "Specific activity 2 aligned with interests - detailed description",\n'
-            f'    "...(minimum 12-15 activities, each uniquely tailored to the destination and interests)"\n'
-            f'  ],\n'
-            f'  "mustTryActivities": [\n'
-            f'    "Essential experience 1 specific to this destination",\n'
-            f'    "Essential experience 2 specific to this destination",\n'
-            f'    "Essential experience 3 specific to this destination",\n'
-            f'    "Essential experience 4 specific to this destination",\n'
-            f'    "Essential experience 5 specific to this destination"\n'
-            f'  ],\n'
-            f'  "uniqueFeatures": [\n'
-            f'    "Feature that makes this destination different from Destination 1",\n'
-            f'    "Feature that makes this destination different from Destination 2",\n'
-            f'    "Feature that makes this destination different from other suggestions",\n'
-            f'    "Feature that makes this destination different from other suggestions"\n'
-            f'  ],\n'
-            f'  "cultureAndHeritage": [\n'
-            f'    "Specific cultural element 1 (with real examples or locations)",\n'
-            f'    "Specific cultural element 2 (with real examples or locations)",\n'
-            f'    "Specific cultural element 3 (with real examples or locations)",\n'
-            f'    "Specific cultural element 4 (with real examples or locations)",\n'
-            f'    "Specific cultural element 5 (with real examples or locations)"\n'
-            f'  ],\n'
-            f'  "localCuisine": [\n'
-            f'    "Signature dish 1 - detailed description and specific restaurant/area",\n'
-            f'    "Signature dish 2 - detailed description and specific restaurant/area",\n'
-            f'    "Signature dish 3 - detailed description and specific restaurant/area",\n'
-            f'    "Signature dish 4 - detailed description and specific restaurant/area",\n'
-            f'    "Signature dish 5 - detailed description and specific restaurant/area",\n'
-            f'    "Signature dish 6 - detailed description and specific restaurant/area"\n'
-            f'  ],\n'
-            f'  "socialScene": "Detailed, destination-specific description of nightlife, bars, clubs, entertainment, social atmosphere",\n'
-            f'  "climate": "Detailed climate info: typical temperature ranges, humidity levels, rainfall patterns, best/worst seasons",\n'
-            f'  "bestTimeToVisit": "Specific months/season with detailed explanation of why (weather, events, crowds)",\n'
-            f'  "recommendedDuration": "Suggested number of days (e.g., 5-7 days)",\n'
-            f'  "rating": "4.2 to 4.8 (realistic rating)",\n'
-            f'  "matchScore": "65-95 (how well it matches the interests and budget - MUST VARY per destination)",\n'
-            f'  "accommodation": "Detailed, budget-appropriate recommendations with specific neighborhoods, hotel types, and price ranges",\n'
-            f'  "transport": "Detailed transport options from origin to destination and local transit within the city",\n'
-            f'  "estimatedBudget": "$X per day",\n'
-            f'  "budgetBreakdown": {{\n'
-            f'    "accommodation": "$X per night (with quality tier)",\n'
-            f'    "food": "$X per day (mix of budget and mid-range)",\n'
-            f'    "activities": "$X per day (with examples of what is included)",\n'
-            f'    "transport": "$X per day (local and intercity)",\n'
-            f'    "total": "$X per day"\n'
-            f'  }},\n'
-            f'  "proTips": [\n'
-            f'    "Specific, actionable insider tip 1 unique to this destination",\n'
-            f'    "Specific, actionable insider tip 2 unique to this destination",\n'
-            f'    "...(minimum 10 insider tips specific to this location)"\n'
-            f'  ],\n'
-            f'  "visaRequirements": "Specific visa requirements for visitors from {location}",\n'
-            f'  "safety": "Current safety information, areas to avoid, and practical precautions",\n'
-            f'  "bestNeighborhoods": ["Neighborhood 1 - brief description", "Neighborhood 2 - brief description", "..."],\n'
-            f'  "seasonalEvents": ["Specific event 1 with date", "Specific event 2 with date", "..."],\n'
-            f'  "travelTips": [\n'
-            f'    "Practical tip 1 specific to this destination",\n'
-            f'    "Practical tip 2 specific to this destination",\n'
-            f'    "...(minimum 8 practical tips)"\n'
-            f'  ]\n'
-            f"}}\n\n"
-            f"CRITICAL REQUIREMENTS FOR UNIQUE SUGGESTIONS:\n"
-            f"1. DIVERSITY: Each destination must be a DIFFERENT TYPE (beach, culture, adventure, urban, nature)\n"
-            f"2. SPECIFICITY: Include REAL city names, neighborhoods, restaurants, attractions - NO generic content\n"
-            f"3. INTEREST-ALIGNED: All activities and recommendations must align with provided interests\n"
-            f"4. UNIQUE CONTENT: No repeated descriptions or generic templates - each destination must feel distinct\n"
-            f"5. VARY MATCH SCORES: Scores must vary (e.g., 95, 85, 75, 70, 65) - not all the same\n"
-            f"6. BUDGET APPROPRIATE: All recommendations realistic for the specified budget tier\n"
-            f"7. ACTIONABLE: Provide specific, real places to visit and activities to do\n"
-            f"8. HONEST: Be truthful about costs, difficulty, and accessibility\n"
-            f"9. COMPREHENSIVE: Include all required fields with substantial content (not abbreviated)\n"
-            f"10. VALID JSON: Ensure output is properly formatted, valid JSON array\n\n"
-            f"Return ONLY the valid JSON array containing exactly 5 destination objects. No explanations or additional text."
+        result = _generate_json(
+            "itinerary_day",
+            model,
+            _itinerary_day_prompt(trip, number, current_day, other_days, extra_context),
+            generation_config=ITINERARY_GENERATION_CONFIG,
+            accept=_is_itinerary_day,
         )
+    except Exception as e:
+        print(f"Error regenerating itinerary day: {e}")
+        return None
+    return result if _is_itinerary_day(result) else None
+
+
+def _is_itinerary_update(result: Any) -> bool:
+    if not isinstance(result, dict) or not ("days" in result or "sections" in result):
+        return False
+    return isinstance(result.get("days", []), list) and isinstance(result.get("sections", {}), dict)
+
+
+def _describe_change(key: str, change: Dict[str, Any]) -> str:
+    before, after = change.get("from"), change.get("to")
+    if isinstance(before, list) or isinstance(after, list):
+        added = [item for item in after or [] if item not in (before or [])]
+        removed = [item for item in before or [] if item not in (after or [])]
+        parts = [f"added {', '.join(map(str, added))}" if added else "", f"removed {', '.join(map(str, removed))}" if removed else ""]
+        return f"- {key}: {'; '.join(part for part in parts if part)}"
+    return f"- {key}: {before} -> {after}"
+
+
+def _itinerary_update_prompt(
+    trip,
+    current: Dict[str, Any],
+    changes: Dict[str, Dict[str, Any]],
+    extra_context: Dict[str, Any] | None = None,
+) -> str:
+    """Prompt for patching an existing itinerary: the plan is sent as an outline and only changed parts come back."""
+    extra_context = extra_context or {}
+    days = current.get("days") or []
+    budget_usd = trip.budget_cents // 100 if trip.budget_cents else 0
+    interests = extra_context.get("interests", [])
+    special_requirements = extra_context.get("special_requirements", [])
+    outline = "\n".join(
+        f"- Day {day.get('day')}: {day.get('theme') or 'no theme'} | {'; '.join(_activity_names(day))}" for day in days
+    )
+    sections = ", ".join(key for key in current if key != "days")
+    return (
+        "You are an expert travel planner updating an existing itinerary after the traveler changed some preferences.\n\n"
+        f"TRIP: {len(days)} days in {trip.location}, total budget ${budget_usd}.\n"
+        f"- Group Size: {extra_context.get('group_size', 'solo')}\n"
+        f"- Travel Pace: {extra_context.get('travel_pace', 'moderate')} (relaxed=2-3 activities/day, moderate=4-5 activities/day, fast-paced=6+ activities/day)\n"
+        f"- Interests: {', '.join(interests) if interests else 'general tourism'}\n"
+        f"- Special Requirements: {', '.join(special_requirements) if special_requirements else 'none'}\n\n"
+        f"WHAT CHANGED:\n" + "\n".join(_describe_change(key, change) for key, change in changes.items()) + "\n\n"
+        f"CURRENT PLAN (day: theme | activities):\n{outline or '- no days'}\n\n"
+        f"OTHER SECTIONS: {sections or 'none'}\n\n"
+        "Rewrite ONLY the days and sections that must change to reflect the new preferences; everything you leave out is kept as it is. "
+        "A change that affects every day (such as the travel pace) may require returning every day.\n\n"
+        "RETURN ONLY a valid JSON object with this EXACT structure:\n"
+        "{\n"
+        '  "days": [\n'
+        '    {"day": 2, "theme": "Short theme", "activities": [{"time": "09:00-12:00", "activity": "Specific activity", "location": "Specific location", "cost": "$X"}], "daily_budget": "$X", "notes": "Tips"}\n'
+        "  ],\n"
+        '  "sections": {"budget_tips": ["Only sections that changed, with their complete new value"]}\n'
+        "}\n"
+    )
+
+
+def generate_itinerary_update(
+    trip,
+    current: Dict[str, Any],
+    changes: Dict[str, Dict[str, Any]],
+    extra_context: Dict[str, Any] | None = None,
+) -> Dict[str, Any] | None:
+    """
+    Incremental counterpart of ``generate_itinerary``: returns ``{"days": [...], "sections": {...}}``
+    holding only what the preference ``changes`` affect, or None when Gemini is unavailable or fails.
+    """
+    model = _get_model()
+    if not model:
+        return None
 
-        response = model.generate_content(
-            prompt,
-            generation_config={"response_mime_type": "application/json"},
+    try:
+        result = _generate_json(
+            "itinerary_update",
+            model,
+            _itinerary_update_prompt(trip, current, changes, extra_context),
+            generation_config=ITINERARY_GENERATION_CONFIG,
+            accept=_is_itinerary_update,
         )
+    except Exception as e:
+        print(f"Error updating itinerary: {e}")
+        return None
+    return result if _is_itinerary_update(result) else None
 
-        raw = response.text if hasattr(response, "text") else ""
-        cleaned = _extract_json_blob(raw)
-        parsed = json.loads(cleaned)
-        
-        # Ensure it's in the expected format and map fields to what frontend expects
-        def normalize_suggestion(item):
-            """Convert AI response fields to frontend component fields"""
-            if isinstance(item, dict):
-                return {
-                    "destination": item.get("destination", "Unknown"),
-                    "country": item.get("country", ""),
-                    "title": item.get("title", item.get("destination", "")),
-                    "description": item.get("description", item.get("longDescription", "")),
-                    "longDescription": item.get("longDescription", item.get("description", "")),
-                    "reasonToVisit": item.get("reasonToVisit", ""),
-                    "highlights": item.get("highlights", []),
-                    "activities": item.get("activities", []),
-                    "mustTryActivities": item.get("mustTryActivities", []),
-                    "cultureAndHeritage": item.get("cultureAndHeritage", []),
-                    "localCuisine": item.get("localCuisine", []),
-                    "climate": item.get("climate", ""),
-                    "bestTimeToVisit": item.get("bestTimeToVisit", ""),
-                    "culture": " | ".join(item.get("cultureAndHeritage", [])[:3]) if item.get("cultureAndHeritage") else "",
-                    "cuisine": " | ".join([c.split(" - ")[0] for c in item.get("localCuisine", [])[:3]]) if item.get("localCuisine") else "",
-                    "accommodation": item.get("accommodation", ""),
-                    "transport": item.get("transport", ""),
-                    "estimatedBudget": item.get("estimatedBudget", ""),
-                    "budgetBreakdown": item.get("budgetBreakdown", {}),
-                    "proTips": item.get("proTips", []),
-                    "travelTips": item.get("travelTips", []),
-                    "visaRequirements": item.get("visaRequirements", ""),
-                    "safety": item.get("safety", ""),
-                    "destinationType": item.get("destinationType", ""),
-                    "whySpecialForYou": item.get("whySpecialForYou", ""),
-                    "uniqueFeatures": item.get("uniqueFeatures", []),
-                    "matchScore": item.get("matchScore", 0),
-                    "rating": item.get("rating", 0),
-                }
-            return item
-        
-        if isinstance(parsed, list):
-            normalized = [normalize_suggestion(item) for item in parsed]
-            return {"suggestions": normalized}
-        elif isinstance(parsed, dict) and "suggestions" in parsed:
-            normalized = [normalize_suggestion(item) for item in parsed.get("suggestions", [])]
-            return {"suggestions": normalized}
-        else:
-            normalized = normalize_suggestion(parsed) if isinstance(parsed, dict) else {}
-            return {"suggestions": [normalized] if normalized else []}
-            
+
+def generate_itinerary_stream(trip, extra_context: Dict[str, Any] | None = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream an itinerary as events: one ``{"type": "day", "day": {...}}`` per day object as soon as
+    Gemini has finished writing it, then ``{"type": "itinerary", "itinerary": {...}}`` with the full plan.
+    """
+    model = _get_model()
+    if not model:
+        for day in DEFAULT_ITINERARY["days"]:
+            yield {"type": "day", "day": day}
+        yield {"type": "itinerary", "itinerary": DEFAULT_ITINERARY}
+        return
+
+    prompt = _itinerary_prompt(trip, extra_context)
+    cache = get_response_cache()
+    key = make_cache_key("itinerary", getattr(model, "model_name", ""), prompt, ITINERARY_GENERATION_CONFIG)
+    cached = cache.get(key)
+    if cached is not None:
+        for day in cached.get("days", []):
+            yield {"type": "day", "day": day}
+        yield {"type": "itinerary", "itinerary": cached}
+        return
+
+    days = ArrayItemStream("days")
+    emitted = 0
+    try:
+        response = model.generate_content(prompt, generation_config=ITINERARY_GENERATION_CONFIG, stream=True)
+        for chunk in response:
+            for day in days.feed(_response_text(chunk)):
+                emitted += 1
+                yield {"type": "day", "day": day}
+        result, repaired = extract_json_checked(days.text)
+    except Exception as e:
+        print(f"Error streaming itinerary: {e}")
+        result, repaired = None, False
+
+    if _is_itinerary(result):
+        if not repaired:
+            cache.set("itinerary", key, result)
+    else:
+        result = DEFAULT_ITINERARY
+        if not emitted:
+            for day in result["days"]:
+                yield {"type": "day", "day": day}
+    yield {"type": "itinerary", "itinerary": result}
+
+
+SUGGESTIONS_GENERATION_CONFIG = {"response_mime_type": "application/json"}
+
+
+def _suggestions_prompt(location: str, budget: int | None = None, duration: int | None = None, interests: List[str] | None = None) -> str:
+    budget_usd = budget // 100 if budget else None
+    budget_str = f"${budget_usd} total" if budget_usd else "flexible budget"
+    duration_str = f"{duration} days" if duration else "flexible duration"
+
+    # Build interest-specific guidelines
+    interests_list = interests if interests else []
+    if interests_list:
+        interests_str = f"PRIMARY INTERESTS: {', '.join(interests_list)}"
+        # Create interest-specific guidance for each suggestion
+        interest_guidance = "\n".join([
+            f"- For travelers interested in {interests_list[i % len(interests_list)]}: emphasize activities that {interests_list[i % len(interests_list)].lower()} enthusiasts enjoy most"
+            for i in range(5)
+        ]) if interests_list else ""
+    else:
+        interests_str = "Provide diverse destination types"
+        interest_guidance = ""
+
+    return (
+        f"You are an expert travel planner specializing in personalized destination recommendations. "
+        f"Create 5 COMPLETELY DIFFERENT and HIGHLY PERSONALIZED destination suggestions FROM {location}.\n\n"
+        f"TRAVELER PROFILE:\n"
+        f"- Originating from: {location}\n"
+        f"- Total Budget: {budget_str}\n"
+        f"- Trip Duration: {duration_str}\n"
+        f"- {interests_str}\n\n"
+        f"DESTINATION DIVERSITY REQUIREMENT (CRITICAL):\n"
+        f"Each of the 5 destinations must be fundamentally DIFFERENT:\n"
+        f"1. First destination: Beach/Coastal destination (relaxation focused)\n"
+        f"2. Second destination: Cultural/Historical destination (museums, heritage sites)\n"
+        f"3. Third destination: Adventure/Mountain destination (outdoor activities)\n"
+        f"4. Fourth destination: Urban/Metropolitan destination (food, nightlife, shopping)\n"
+        f"5. Fifth destination: Nature/Wildlife destination (eco-tourism, national parks)\n\n"
+        f"INTEREST ALIGNMENT REQUIREMENT:\n"
+        f"If interests are provided: Tailor EACH destination to showcase how it matches the specified interests.\n"
+        f"Activities, highlights, and local experiences must align with the provided preferences.\n"
+        f"{interest_guidance}\n\n"
+        f"For EACH of the 5 destinations, provide COMPREHENSIVE and DISTINCT information:\n\n"
+        f"RETURN A VALID JSON ARRAY containing 5 objects with these EXACT fields:\n"
+        f"{{\n"
+        f'  "destination": "Specific City/Region Name (not generic)",\n'
+        f'  "country": "Country name",\n'
+        f'  "title": "Creative, memorable title reflecting the destination character",\n'
+        f'  "description": "One-line engaging description highlighting what makes it UNIQUE",\n'
+        f'  "destinationType": "Beach/Cultural/Adventure/Urban/Nature - clearly categorized",\n'
+        f'  "longDescription": "Detailed 3-4 sentence description explaining unique characteristics and why it stands out from other destinations",\n'
+        f'  "reasonToVisit": "ONE compelling, specific reason why this destination matches the interests provided",\n'
+        f'  "whySpecialForYou": "Detailed paragraph (4-5 sentences) explaining exactly how this destination aligns with the specified interests and budget tier",\n'
+        f'  "highlights": [\n'
+        f'    "Specific, named highlight 1 with brief explanation",\n'
+        f'    "Specific, named highlight 2 with brief explanation",\n'
+        f'    "Specific, named highlight 3 with brief explanation",\n'
+        f'    "Specific, named highlight 4 with brief explanation",\n'
+        f'    "Specific, named highlight 5 with brief explanation",\n'
+        f'    "Specific, named highlight 6 with brief explanation",\n'
+        f'    "Specific, named highlight 7 with brief explanation"\n'
+        f'  ],\n'
+        f'  "activities": [\n'
+        f'    "Specific activity 1 aligned with interests - detailed description",\n'
+        f'    "Specific activity 2 aligned with interests - detailed description",\n'
+        f'    "...(minimum 12-15 activities, each uniquely tailored to the destination and interests)"\n'
+        f'  ],\n'
+        f'  "mustTryActivities": [\n'
+        f'    "Essential experience 1 specific to this destination",\n'
+        f'    "Essential experience 2 specific to this destination",\n'
+        f'    "Essential experience 3 specific to this destination",\n'
+        f'    "Essential experience 4 specific to this destination",\n'
+        f'    "Essential experience 5 specific to this destination"\n'
+        f'  ],\n'
+        f'  "uniqueFeatures": [\n'
+        f'    "Feature that makes this destination different from Destination 1",\n'
+        f'    "Feature that makes this destination different from Destination 2",\n'
+        f'    "Feature that makes this destination different from other suggestions",\n'
+        f'    "Feature that makes this destination different from other suggestions"\n'
+        f'  ],\n'
+        f'  "cultureAndHeritage": [\n'
+        f'    "Specific cultural element 1 (with real examples or locations)",\n'
+        f'    "Specific cultural element 2 (with real examples or locations)",\n'
+        f'    "Specific cultural element 3 (with real examples or locations)",\n'
+        f'    "Specific cultural element 4 (with real examples or locations)",\n'
+        f'    "Specific cultural element 5 (with real examples or locations)"\n'
+        f'  ],\n'
+        f'  "localCuisine": [\n'
+        f'    "Signature dish 1 - detailed description and specific restaurant/area",\n'
+        f'    "Signature dish 2 - detailed description and specific restaurant/area",\n'
+        f'    "Signature dish 3 - detailed description and specific restaurant/area",\n'
+        f'    "Signature dish 4 - detailed description and specific restaurant/area",\n'
+        f'    "Signature dish 5 - detailed description and specific restaurant/area",\n'
+        f'    "Signature dish 6 - detailed description and specific restaurant/area"\n'
+        f'  ],\n'
+        f'  "socialScene": "Detailed, destination-specific description of nightlife, bars, clubs, entertainment, social atmosphere",\n'
+        f'  "climate": "Detailed climate info: typical temperature ranges, humidity levels, rainfall patterns, best/worst seasons",\n'
+        f'  "bestTimeToVisit": "Specific months/season with detailed explanation of why (weather, events, crowds)",\n'
+        f'  "recommendedDuration": "Suggested number of days (e.g., 5-7 days)",\n'
+        f'  "rating": "4.2 to 4.8 (realistic rating)",\n'
+        f'  "matchScore": "65-95 (how well it matches the interests and budget - MUST VARY per destination)",\n'
+        f'  "accommodation": "Detailed, budget-appropriate recommendations with specific neighborhoods, hotel types, and price ranges",\n'
+        f'  "transport": "Detailed transport options from origin to destination and local transit within the city",\n'
+        f'  "estimatedBudget": "$X per day",\n'
+        f'  "budgetBreakdown": {{\n'
+        f'    "accommodation": "$X per night (with quality tier)",\n'
+        f'    "food": "$X per day (mix of budget and mid-range)",\n'
+        f'    "activities": "$X per day (with examples of what is included)",\n'
+        f'    "transport": "$X per day (local and intercity)",\n'
+        f'    "total": "$X per day"\n'
+        f'  }},\n'
+        f'  "proTips": [\n'
+        f'    "Specific, actionable insider tip 1 unique to this destination",\n'
+        f'    "Specific, actionable insider tip 2 unique to this destination",\n'
+        f'    "...(minimum 10 insider tips specific to this location)"\n'
+        f'  ],\n'
+        f'  "visaRequirements": "Specific visa requirements for visitors from {location}",\n'
+        f'  "safety": "Current safety information, areas to avoid, and practical precautions",\n'
+        f'  "bestNeighborhoods": ["Neighborhood 1 - brief description", "Neighborhood 2 - brief description", "..."],\n'
+        f'  "seasonalEvents": ["Specific event 1 with date", "Specific event 2 with date", "..."],\n'
+        f'  "travelTips": [\n'
+        f'    "Practical tip 1 specific to this destination",\n'
+        f'    "Practical tip 2 specific to this destination",\n'
+        f'    "...(minimum 8 practical tips)"\n'
+        f'  ]\n'
+        f"}}\n\n"
+        f"CRITICAL REQUIREMENTS FOR UNIQUE SUGGESTIONS:\n"
+        f"1. DIVERSITY: Each destination must be a DIFFERENT TYPE (beach, culture, adventure, urban, nature)\n"
+        f"2. SPECIFICITY: Include REAL city names, neighborhoods, restaurants, attractions - NO generic content\n"
+        f"3. INTEREST-ALIGNED: All activities and recommendations must align with provided interests\n"
+        f"4. UNIQUE CONTENT: No repeated descriptions or generic templates - each destination must feel distinct\n"
+        f"5. VARY MATCH SCORES: Scores must vary (e.g., 95, 85, 75, 70, 65) - not all the same\n"
+        f"6. BUDGET APPROPRIATE: All recommendations realistic for the specified budget tier\n"
+        f"7. ACTIONABLE: Provide specific, real places to visit and activities to do\n"
+        f"8. HONEST: Be truthful about costs, difficulty, and accessibility\n"
+        f"9. COMPREHENSIVE: Include all required fields with substantial content (not abbreviated)\n"
+        f"10. VALID JSON: Ensure output is properly formatted, valid JSON array\n\n"
+        f"Return ONLY the valid JSON array containing exactly 5 destination objects. No explanations or additional text."
+    )
+
+
+def _normalize_suggestion(item):
+    """Convert AI response fields to frontend component fields"""
+    if isinstance(item, dict):
+        return {
+            "destination": item.get("destination", "Unknown"),
+            "country": item.get("country", ""),
+            "title": item.get("title", item.get("destination", "")),
+            "description": item.get("description", item.get("longDescription", "")),
+            "longDescription": item.get("longDescription", item.get("description", "")),
+            "reasonToVisit": item.get("reasonToVisit", ""),
+            "highlights": item.get("highlights", []),
+            "activities": item.get("activities", []),
+            "mustTryActivities": item.get("mustTryActivities", []),
+            "cultureAndHeritage": item.get("cultureAndHeritage", []),
+            "localCuisine": item.get("localCuisine", []),
+            "climate": item.get("climate", ""),
+            "bestTimeToVisit": item.get("bestTimeToVisit", ""),
+            "culture": " | ".join(item.get("cultureAndHeritage", [])[:3]) if item.get("cultureAndHeritage") else "",
+            "cuisine": " | ".join([c.split(" - ")[0] for c in item.get("localCuisine", [])[:3]]) if item.get("localCuisine") else "",
+            "accommodation": item.get("accommodation", ""),
+            "transport": item.get("transport", ""),
+            "estimatedBudget": item.get("estimatedBudget", ""),
+            "budgetBreakdown": item.get("budgetBreakdown", {}),
+            "proTips": item.get("proTips", []),
+            "travelTips": item.get("travelTips", []),
+            "visaRequirements": item.get("visaRequirements", ""),
+            "safety": item.get("safety", ""),
+            "destinationType": item.get("destinationType", ""),
+            "whySpecialForYou": item.get("whySpecialForYou", ""),
+            "uniqueFeatures": item.get("uniqueFeatures", []),
+            "matchScore": item.get("matchScore", 0),
+            "rating": item.get("rating", 0),
+        }
+    return item
+
+
+def _suggestions_payload(parsed: Any) -> Dict[str, Any]:
+    """Map the parsed reply (array, ``{"suggestions": [...]}`` or a single object) to the frontend shape."""
+    if isinstance(parsed, list):
+        normalized = [_normalize_suggestion(item) for item in parsed]
+        return {"suggestions": normalized}
+    elif isinstance(parsed, dict) and "suggestions" in parsed:
+        normalized = [_normalize_suggestion(item) for item in parsed.get("suggestions", [])]
+        return {"suggestions": normalized}
+    else:
+        normalized = _normalize_suggestion(parsed) if isinstance(parsed, dict) else {}
+        return {"suggestions": [normalized] if normalized else []}
+
+
+def generate_trip_suggestions(location: str, budget: int | None = None, duration: int | None = None, interests: List[str] | None = None) -> Dict[str, Any]:
+    """Generate detailed and accurate travel suggestions for a location using Gemini."""
+    model = _get_model()
+    if not model:
+        return {"suggestions": [], "error": "AI model not configured"}
+
+    try:
+        parsed = _generate_json(
+            "suggestions",
+            model,
+            _suggestions_prompt(location, budget, duration, interests),
+            generation_config=SUGGESTIONS_GENERATION_CONFIG,
+        )
+        return _suggestions_payload(parsed)
     except Exception as e:
         print(f"Error generating trip suggestions: {e}")
         return {"suggestions": [], "error": str(e)}
 
 
+def _recommendations_prompt(trip, activity_type: str) -> str:
+    return (
+        f"You are a travel guide expert. Recommend top {activity_type} for a trip to {trip.location}. "
+        f"Trip dates: {trip.start_date} to {trip.end_date}. "
+        f"Budget: ${trip.budget_cents // 100 if trip.budget_cents else 'flexible'}. "
+        "Return as JSON with format: "
+        '{"recommendations": ["place 1", "place 2", "place 3", ...], "tips": ["tip 1", "tip 2", ...]}'
+    )
+
+
 def generate_ai_recommendations(trip, activity_type: str = "attractions") -> Dict[str, List[str]]:
     """Generate AI-powered recommendations for activities, restaurants, etc."""
     model = _get_model()
@@ -388,22 +638,26 @@ def generate_ai_recommendations(trip, activity_type: str = "attractions") -> Dic
         return {"recommendations": [], "activity_type": activity_type}
 
     try:
-        prompt = (
-            f"You are a travel guide expert. Recommend top {activity_type} for a trip to {trip.location}. "
-            f"Trip dates: {trip.start_date} to {trip.end_date}. "
-            f"Budget: ${trip.budget_cents // 100 if trip.budget_cents else 'flexible'}. "
-            "Return as JSON with format: "
-            '{"recommendations": ["place 1", "place 2", "place 3", ...], "tips": ["tip 1", "tip 2", ...]}'
-        )
-
-        response = model.generate_content(prompt)
-        raw = response.text if hasattr(response, "text") else ""
-        cleaned = _extract_json_blob(raw)
-        return json.loads(cleaned)
+        return _generate_json("recommendations", model, _recommendations_prompt(trip, activity_type))
     except Exception:
         return {"recommendations": [], "activity_type": activity_type}
 
 
+CHAT_SYSTEM_PROMPT = (
+    "You are a helpful travel planning assistant. Answer questions about travel, destinations, "
+    "budgeting, packing, visas, and trip logistics. Be concise and helpful."
+)
+CHAT_GENERATION_CONFIG = {"temperature": 0.7, "max_output_tokens": 500}
+
+
+def _chat_contents(message: str, context: Dict[str, Any] | None = None) -> List[str]:
+    full_message = message
+    if context:
+        context_str = json.dumps(context)
+        full_message = f"Context: {context_str}\n\nUser message: {message}"
+    return [CHAT_SYSTEM_PROMPT, full_message]
+
+
 def ai_chat(message: str, context: Dict[str, Any] | None = None) -> str:
     """Chat with AI travel assistant."""
     model = _get_model()
@@ -411,19 +665,9 @@ def ai_chat(message: str, context: Dict[str, Any] | None = None) -> str:
         return "AI assistant is not available at the moment."
 
     try:
-        system_prompt = (
-            "You are a helpful travel planning assistant. Answer questions about travel, destinations, "
-            "budgeting, packing, visas, and trip logistics. Be concise and helpful."
-        )
-        
-        full_message = message
-        if context:
-            context_str = json.dumps(context)
-            full_message = f"Context: {context_str}\n\nUser message: {message}"
-
         response = model.generate_content(
-            [system_prompt, full_message],
-            generation_config={"temperature": 0.7, "max_output_tokens": 500},
+            _chat_contents(message, context),
+            generation_config=CHAT_GENERATION_CONFIG,
         )
 
         return response.text if hasattr(response, "text") else "Unable to generate response"
@@ -431,6 +675,38 @@ def ai_chat(message: str, context: Dict[str, Any] | None = None) -> str:
         return f"Error: {str(e)}"
 
 
+def ai_chat_stream(message: str, context: Dict[str, Any] | None = None) -> Iterator[str]:
+    """Chat with AI travel assistant, yielding text chunks as Gemini produces them."""
+    model = _get_model()
+    if not model:
+        yield "AI assistant is not available at the moment."
+        return
+
+    try:
+        response = model.generate_content(
+            _chat_contents(message, context),
+            generation_config=CHAT_GENERATION_CONFIG,
+            stream=True,
+        )
+        for chunk in response:
+            text = _response_text(chunk)
+            if text:
+                yield text
+    except Exception as e:
+        yield f"Error: {str(e)}"
+
+
+def _packing_list_prompt(trip, additional_context: str = "") -> str:
+    return (
+        f"Create a detailed packing list for a trip to {trip.location} "
+        f"from {trip.start_date} to {trip.end_date}. "
+        f"{additional_context} "
+        "Return as JSON with format: "
+        '{"categories": {"clothing": [...], "toiletries": [...], "documents": [...], "electronics": [...]}, '
+        '"tips": ["tip 1", "tip 2", ...]}'
+    )
+
+
 def generate_packing_list(trip, additional_context: str = "") -> Dict[str, List[str]]:
     """Generate a smart packing list based on trip details."""
     model = _get_model()
@@ -438,23 +714,24 @@ def generate_packing_list(trip, additional_context: str = "") -> Dict[str, List[
         return {"categories": {}, "tips": []}
 
     try:
-        prompt = (
-            f"Create a detailed packing list for a trip to {trip.location} "
-            f"from {trip.start_date} to {trip.end_date}. "
-            f"{additional_context} "
-            "Return as JSON with format: "
-            '{"categories": {"clothing": [...], "toiletries": [...], "documents": [...], "electronics": [...]}, '
-            '"tips": ["tip 1", "tip 2", ...]}'
-        )
-
-        response = model.generate_content(prompt)
-        raw = response.text if hasattr(response, "text") else ""
-        cleaned = _extract_json_blob(raw)
-        return json.loads(cleaned)
+        return _generate_json("packing_list", model, _packing_list_prompt(trip, additional_context))
     except Exception:
         return {"categories": {}, "tips": []}
 
 
+def _budget_prompt(trip) -> str:
+    days = (trip.end_date - trip.start_date).days if trip.end_date and trip.start_date else 0
+    budget = trip.budget_cents // 100 if trip.budget_cents else 0
+
+    return (
+        f"Analyze and provide budget breakdown for a {days}-day trip to {trip.location} "
+        f"with total budget of ${budget}. Suggest spending for accommodation, food, activities, transport, etc. "
+        "Return as JSON with format: "
+        '{"daily_budget": X, "categories": {"accommodation": X, "food": X, "activities": X, ...}, '
+        '"money_saving_tips": [...]}'
+    )
+
+
 def analyze_trip_budget(trip) -> Dict[str, Any]:
     """Analyze and optimize trip budget using AI."""
     model = _get_model()
@@ -462,21 +739,123 @@ def analyze_trip_budget(trip) -> Dict[str, Any]:
         return {"analysis": "Budget analysis unavailable", "breakdown": {}}
 
     try:
-        days = (trip.end_date - trip.start_date).days if trip.end_date and trip.start_date else 0
-        budget = trip.budget_cents // 100 if trip.budget_cents else 0
-
-        prompt = (
-            f"Analyze and provide budget breakdown for a {days}-day trip to {trip.location} "
-            f"with total budget of ${budget}. Suggest spending for accommodation, food, activities, transport, etc. "
-            "Return as JSON with format: "
-            '{"daily_budget": X, "categories": {"accommodation": X, "food": X, "activities": X, ...}, '
-            '"money_saving_tips": [...]}'
+        return _generate_json("budget_analysis", model, _budget_prompt(trip))
+    except Exception:
+        return {"analysis": "Unable to analyze budget", "breakdown": {}}
+
+
+# Async variants used by the ASGI views. They share prompts, caching and fallbacks with
+# the sync helpers above but await ``generate_content_async`` under a per-event-loop cap.
+
+# An asyncio.Semaphore binds to the loop that first waits on it, so each running loop
+# (servers may run several, tests start a new one per case) gets its own.
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(getattr(settings, "GEMINI_MAX_CONCURRENCY", 64))
+    return semaphore
+
+
+async def _generate_json_async(
+    function: str,
+    model,
+    prompt: Any,
+    generation_config: Dict[str, Any] | None = None,
+    accept: Callable[[Any], bool] | None = None,
+) -> Any:
+    cache = get_response_cache()
+    key = make_cache_key(function, getattr(model, "model_name", ""), prompt, generation_config)
+    cached = await cache.aget(key)
+    if cached is not None:
+        return cached
+
+    async def call():
+        async with _get_semaphore():
+            if generation_config:
+                response = await model.generate_content_async(prompt, generation_config=generation_config)
+            else:
+                response = await model.generate_content_async(prompt)
+        result, repaired = extract_json_checked(_response_text(response))
+        if not repaired and (accept is None or accept(result)):
+            await cache.aset(function, key, result)
+        return result
+
+    return await get_async_single_flight().do(key, call)
+
+
+async def generate_trip_suggestions_async(location: str, budget: int | None = None, duration: int | None = None, interests: List[str] | None = None) -> Dict[str, Any]:
+    model = _get_model()
+    if not model:
+        return {"suggestions": [], "error": "AI model not configured"}
+
+    try:
+        parsed = await _generate_json_async(
+            "suggestions",
+            model,
+            _suggestions_prompt(location, budget, duration, interests),
+            generation_config=SUGGESTIONS_GENERATION_CONFIG,
         )
+        return _suggestions_payload(parsed)
+    except Exception as e:
+        print(f"Error generating trip suggestions: {e}")
+        return {"suggestions": [], "error": str(e)}
+
+
+async def generate_ai_recommendations_async(trip, activity_type: str = "attractions") -> Dict[str, List[str]]:
+    model = _get_model()
+    if not model:
+        return {"recommendations": [], "activity_type": activity_type}
 
-        response = model.generate_content(prompt)
-        raw = response.text if hasattr(response, "text") else ""
-        cleaned = _extract_json_blob(raw)
-        return json.loads(cleaned)
+    try:
+        return await _generate_json_async("recommendations", model, _recommendations_prompt(trip, activity_type))
+    except Exception:
+        return {"recommendations": [], "activity_type": activity_type}
+
+
+async def generate_packing_list_async(trip, additional_context: str = "") -> Dict[str, List[str]]:
+    model = _get_model()
+    if not model:
+        return {"categories": {}, "tips": []}
+
+    try:
+        return await _generate_json_async("packing_list", model, _packing_list_prompt(trip, additional_context))
+    except Exception:
+        return {"categories": {}, "tips": []}
+
+
+async def analyze_trip_budget_async(trip) -> Dict[str, Any]:
+    model = _get_model()
+    if not model:
+        return {"analysis": "Budget analysis unavailable", "breakdown": {}}
+
+    try:
+        return await _generate_json_async("budget_analysis", model, _budget_prompt(trip))
     except Exception:
         return {"analysis": "Unable to analyze budget", "breakdown": {}}
 
+
+async def ai_chat_stream_async(message: str, context: Dict[str, Any] | None = None) -> AsyncIterator[str]:
+    """``ai_chat_stream`` for async views: the whole stream holds a slot of the per-loop cap."""
+    async with _get_semaphore():
+        async for text in iterate_in_thread(ai_chat_stream(message, context)):
+            yield text
+
+
+async def ai_chat_async(message: str, context: Dict[str, Any] | None = None) -> str:
+    model = _get_model()
+    if not model:
+        return "AI assistant is not available at the moment."
+
+    try:
+        async with _get_semaphore():
+            response = await model.generate_content_async(
+                _chat_contents(message, context),
+                generation_config=CHAT_GENERATION_CONFIG,
+            )
+        return response.text if hasattr(response, "text") else "Unable to generate response"
+    except Exception as e:
+        return f"Error: {str(e)}"
@@ -1,3 +1,5 @@
+import os
+
 from django.apps import AppConfig
 
 
@@ -5,3 +7,9 @@ class TripsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "trips"
 
+    def ready(self):
+        # Import and configure the Gemini SDK at startup instead of on the first AI request.
+        if os.getenv("GEMINI_WARMUP", "true").lower() in {"1", "true", "yes", "on"}:
+            from .client import get_model_registry
+
+            get_model_registry().warm_up()
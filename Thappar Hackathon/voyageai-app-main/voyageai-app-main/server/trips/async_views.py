@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import Http404, JsonResponse
+from django.shortcuts import aget_object_or_404
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.settings import api_settings
+
+from .ai import (
+    ai_chat_async,
+    ai_chat_stream_async,
+    analyze_trip_budget_async,
+    generate_ai_recommendations_async,
+    generate_packing_list_async,
+)
+from .models import Trip
+from .streaming import sse_event, sse_response, wants_stream
+from .suggestions import get_suggestions_async
+
+
+class AsyncAIView(View):
+    """
+    Native async counterpart of the authenticated DRF ``APIView`` used by the Gemini
+    endpoints. DRF views are synchronous, so these run authentication through the
+    configured DRF authentication classes and keep the same JSON response shapes.
+    """
+
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Token-authenticated like the DRF views, which are CSRF exempt as well.
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    def _authenticate(self, request):
+        for authentication_class in self.authentication_classes:
+            result = authentication_class().authenticate(request)
+            if result is not None:
+                return result[0]
+        return None
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            user = await sync_to_async(self._authenticate)(request)
+        except exceptions.AuthenticationFailed as exc:
+            return JsonResponse({"detail": str(exc.detail)}, status=401)
+        if user is None or not user.is_authenticated:
+            return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+        request.user = user
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except Http404:
+            return JsonResponse({"detail": "Not found."}, status=404)
+
+
+class AsyncTripRecommendationsView(AsyncAIView):
+    async def get(self, request, trip_id: str):
+        trip = await aget_object_or_404(Trip, id=trip_id)
+        activity_type = request.GET.get("type", "attractions")
+        recommendations = await generate_ai_recommendations_async(trip, activity_type)
+        return JsonResponse({"recommendations": recommendations})
+
+
+class AsyncTripPackingListView(AsyncAIView):
+    async def get(self, request, trip_id: str):
+        trip = await aget_object_or_404(Trip, id=trip_id)
+        additional_context = request.GET.get("context", "")
+        packing_list = await generate_packing_list_async(trip, additional_context)
+        return JsonResponse({"packingList": packing_list})
+
+
+class AsyncTripBudgetAnalysisView(AsyncAIView):
+    async def get(self, request, trip_id: str):
+        trip = await aget_object_or_404(Trip, id=trip_id)
+        analysis = await analyze_trip_budget_async(trip)
+        return JsonResponse({"analysis": analysis})
+
+
+class AsyncTripSuggestionsView(AsyncAIView):
+    async def get(self, request):
+        location = request.GET.get("location", "")
+        budget = request.GET.get("budget")
+        duration = request.GET.get("duration")
+        interests_str = request.GET.get("interests", "")
+
+        if not location:
+            return JsonResponse({"error": "location is required"}, status=400)
+
+        budget_int = int(budget) if budget else None
+        duration_int = int(duration) if duration else None
+        interests = [i.strip() for i in interests_str.split(",") if i.strip()] if interests_str else None
+
+        suggestions = await get_suggestions_async(location, budget_int, duration_int, interests)
+        return JsonResponse({"tripSuggestions": suggestions})
+
+
+class AsyncAITravelChatView(AsyncAIView):
+    async def post(self, request):
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return JsonResponse({"error": "Invalid JSON body"}, status=400)
+        message = data.get("message", "")
+        context = data.get("context")
+        trip_id = data.get("trip_id")
+
+        if not message:
+            return JsonResponse({"error": "message is required"}, status=400)
+
+        chat_context = context or {}
+        if trip_id:
+            try:
+                trip = await Trip.objects.aget(id=trip_id, owner=request.user)
+                chat_context["trip"] = {
+                    "title": trip.title,
+                    "location": trip.location,
+                    "dates": f"{trip.start_date} to {trip.end_date}",
+                    "budget": trip.budget_cents,
+                }
+            except (Trip.DoesNotExist, ValidationError):
+                pass
+
+        if wants_stream(request):
+            async def events():
+                async for text in ai_chat_stream_async(message, chat_context):
+                    yield sse_event({"text": text}, event="chunk")
+                yield sse_event({}, event="done")
+
+            return sse_response(request, events())
+
+        response_text = await ai_chat_async(message, chat_context)
+        return JsonResponse({"response": response_text})
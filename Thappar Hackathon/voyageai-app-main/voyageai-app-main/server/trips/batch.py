@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import json
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .ai import analyze_trip_budget, generate_ai_recommendations, generate_packing_list
+from .models import Trip
+
+# operation name -> (response key used by the single-trip endpoints, runner)
+OPERATIONS: Dict[str, tuple[str, Callable[[Trip, Dict[str, Any]], Any]]] = {
+    "recommendations": (
+        "recommendations",
+        lambda trip, params: generate_ai_recommendations(trip, params.get("type", "attractions")),
+    ),
+    "packing_list": (
+        "packingList",
+        lambda trip, params: generate_packing_list(trip, params.get("context", "")),
+    ),
+    "budget_analysis": (
+        "analysis",
+        lambda trip, params: analyze_trip_budget(trip),
+    ),
+}
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "AI_BATCH_WORKERS", 8),
+                    thread_name_prefix="ai-batch",
+                )
+    return _executor
+
+
+def _run(operation: str, trip: Trip, params: Dict[str, Any]) -> Any:
+    try:
+        return OPERATIONS[operation][1](trip, params)
+    finally:
+        close_old_connections()
+
+
+def run_batch(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Run many (trip, operation) AI requests in one go. Trips are loaded with a single
+    query, identical items are computed once, and distinct items run in parallel on a
+    bounded pool (each call still goes through the response cache and single-flight).
+    Results come back in request order.
+    """
+    trip_ids = set()
+    for item in items:
+        try:
+            trip_ids.add(uuid.UUID(str(item.get("tripId"))))
+        except ValueError:
+            continue
+    trips = {str(trip.id): trip for trip in Trip.objects.filter(id__in=trip_ids)} if trip_ids else {}
+
+    futures: Dict[str, Any] = {}
+    plan: List[tuple[Dict[str, Any], str | None]] = []
+    for item in items:
+        trip_id = str(item.get("tripId") or "")
+        operation = item.get("operation")
+        params = item.get("params") or {}
+        entry = {"tripId": trip_id, "operation": operation}
+        if not isinstance(operation, str) or operation not in OPERATIONS:
+            plan.append(({**entry, "error": f"Unknown operation '{operation}'"}, None))
+            continue
+        trip = trips.get(trip_id)
+        if trip is None:
+            plan.append(({**entry, "error": "Trip not found"}, None))
+            continue
+        dedupe_key = json.dumps([trip_id, operation, params], sort_keys=True, default=str)
+        if dedupe_key not in futures:
+            futures[dedupe_key] = _get_executor().submit(_run, operation, trip, params)
+        plan.append((entry, dedupe_key))
+
+    results = []
+    for entry, dedupe_key in plan:
+        if dedupe_key is None:
+            results.append(entry)
+            continue
+        try:
+            results.append({**entry, OPERATIONS[entry["operation"]][0]: futures[dedupe_key].result()})
+        except Exception as e:
+            results.append({**entry, "error": str(e)})
+    return results
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+# Seconds each AI endpoint's responses stay fresh. Suggestions and packing lists
+# barely change for identical inputs, recommendations/budgets a little more.
+DEFAULT_TTLS = {
+    "itinerary": 60 * 60 * 6,
+    "itinerary_day": 60 * 60 * 6,
+    "itinerary_update": 60 * 60 * 6,
+    "suggestions": 60 * 60 * 24,
+    "recommendations": 60 * 60 * 12,
+    "packing_list": 60 * 60 * 24,
+    "budget_analysis": 60 * 60 * 12,
+}
+
+
+def make_cache_key(function: str, model_name: str, prompt: Any, generation_config: Dict[str, Any] | None = None) -> str:
+    """Content-addressed key over the normalized (function, model, prompt, config) tuple."""
+    payload = json.dumps(
+        {
+            "function": function,
+            "model": model_name or "",
+            "prompt": prompt,
+            "generation_config": generation_config or {},
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return f"ai:{function}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+
+class MemoryBackend:
+    """Thread-safe in-process LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class DjangoCacheBackend:
+    """
+    Delegates to a configured Django cache alias, so responses can live in
+    Redis/Memcached or in a database table (``DatabaseCache`` + ``createcachetable``).
+    Eviction is handled by the underlying cache's own ``MAX_ENTRIES`` culling.
+    """
+
+    def __init__(self, alias: str = "default"):
+        self.alias = alias
+
+    @property
+    def _cache(self):
+        from django.core.cache import caches
+
+        return caches[self.alias]
+
+    def get(self, key: str) -> Any:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        self._cache.set(key, value, timeout=ttl)
+
+    def delete(self, key: str) -> None:
+        self._cache.delete(key)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+class ResponseCache:
+    """Response cache for Gemini calls with hit/miss accounting."""
+
+    def __init__(self, backend, ttls: Dict[str, int] | None = None, enabled: bool = True):
+        self.backend = backend
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def ttl_for(self, function: str) -> int:
+        return int(self.ttls.get(function, 60 * 60))
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        try:
+            value = self.backend.get(key)
+        except Exception:
+            value = None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def peek(self, key: str) -> Optional[Any]:
+        """Read without touching the hit/miss counters (used while waiting on another caller)."""
+        if not self.enabled:
+            return None
+        try:
+            return self.backend.get(key)
+        except Exception:
+            return None
+
+    def set(self, function: str, key: str, value: Any) -> None:
+        if not self.enabled or value is None:
+            return
+        ttl = self.ttl_for(function)
+        if ttl <= 0:
+            return
+        try:
+            self.backend.set(key, value, ttl)
+        except Exception:
+            pass
+
+    async def aget(self, key: str) -> Optional[Any]:
+        # The in-process LRU never blocks; other backends may touch the network or DB.
+        if isinstance(self.backend, MemoryBackend):
+            return self.get(key)
+        return await sync_to_async(self.get, thread_sensitive=False)(key)
+
+    async def aset(self, function: str, key: str, value: Any) -> None:
+        if isinstance(self.backend, MemoryBackend):
+            self.set(function, key, value)
+        else:
+            await sync_to_async(self.set, thread_sensitive=False)(function, key, value)
+
+    def clear(self) -> None:
+        self.backend.clear()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "backend": type(self.backend).__name__,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+_response_cache: ResponseCache | None = None
+_response_cache_lock = threading.Lock()
+
+
+def _build_response_cache() -> ResponseCache:
+    backend_name = getattr(settings, "AI_CACHE_BACKEND", "memory")
+    if backend_name == "django":
+        backend = DjangoCacheBackend(getattr(settings, "AI_CACHE_ALIAS", "default"))
+    else:
+        backend = MemoryBackend(getattr(settings, "AI_CACHE_MAX_ENTRIES", 512))
+    return ResponseCache(
+        backend,
+        ttls=getattr(settings, "AI_CACHE_TTLS", None),
+        enabled=getattr(settings, "AI_CACHE_ENABLED", True),
+    )
+
+
+def get_response_cache() -> ResponseCache:
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = _build_response_cache()
+    return _response_cache
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Any, Callable, Dict
+
+try:
+    import google.generativeai as genai
+except ImportError:
+    genai = None  # Gemini optional during development
+
+
+DEFAULT_MODEL_NAME = "gemini-1.5-flash"
+
+
+def _config_key(generation_config: Dict[str, Any] | None) -> str:
+    return json.dumps(generation_config or {}, sort_keys=True, default=str)
+
+
+class ModelRegistry:
+    """
+    Process-wide Gemini client registry. ``genai.configure`` runs once per API key
+    and one ``GenerativeModel`` is kept per (model name, generation config). When
+    ``GEMINI_API_KEY`` or ``GEMINI_MODEL`` change the registry reconfigures and drops
+    the cached models. ``install_factory`` swaps the SDK for another model builder
+    (e.g. the fake backend in ``benchmarks/``).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._env: tuple[str | None, str] | None = None
+        self._models: Dict[tuple[str, str], Any] = {}
+        self._factory: Callable[[str, Dict[str, Any] | None], Any] | None = None
+
+    @staticmethod
+    def _read_env() -> tuple[str | None, str]:
+        return os.getenv("GEMINI_API_KEY"), os.getenv("GEMINI_MODEL", DEFAULT_MODEL_NAME)
+
+    def get(self, model_name: str | None = None, generation_config: Dict[str, Any] | None = None):
+        env = self._read_env()
+        api_key, default_name = env
+        if self._factory is not None:
+            return self._get_from_factory(model_name or default_name, generation_config)
+        if not api_key or genai is None:
+            return None
+
+        key = (model_name or default_name, _config_key(generation_config))
+        if self._env == env:
+            model = self._models.get(key)
+            if model is not None:
+                return model
+
+        with self._lock:
+            try:
+                if self._env != env:
+                    genai.configure(api_key=api_key)
+                    self._models = {}
+                    self._env = env
+                model = self._models.get(key)
+                if model is None:
+                    if generation_config:
+                        model = genai.GenerativeModel(key[0], generation_config=generation_config)
+                    else:
+                        model = genai.GenerativeModel(key[0])
+                    self._models[key] = model
+                return model
+            except Exception:
+                return None
+
+    def _get_from_factory(self, model_name: str, generation_config: Dict[str, Any] | None):
+        key = (model_name, _config_key(generation_config))
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                model = self._models[key] = self._factory(model_name, generation_config)
+            return model
+
+    def install_factory(self, factory: Callable[[str, Dict[str, Any] | None], Any] | None) -> None:
+        """Build models with ``factory(model_name, generation_config)``; ``None`` restores Gemini."""
+        with self._lock:
+            self._factory = factory
+            self._env = None
+            self._models = {}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._env = None
+            self._models = {}
+
+    def warm_up(self) -> bool:
+        """Configure the SDK and build the default model ahead of the first request."""
+        return self.get() is not None
+
+
+_registry = ModelRegistry()
+
+
+def get_model_registry() -> ModelRegistry:
+    return _registry
@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from .ai import DEFAULT_ITINERARY, generate_itinerary, generate_itinerary_day, generate_itinerary_update
+from .models import Activity, ItineraryDay, Trip
+
+# Activity keys stored in their own columns; anything else goes to ``details``.
+ACTIVITY_COLUMNS = ("time", "activity", "location", "cost")
+# Preferences read by the itinerary prompt, with the defaults it assumes.
+PREFERENCE_DEFAULTS = {"group_size": "solo", "travel_pace": "moderate", "interests": [], "special_requirements": []}
+# Changing any of these reshapes the whole plan, so incremental updates fall back to a full generation.
+STRUCTURAL_INPUTS = ("location", "start_date", "end_date")
+
+
+def split_itinerary(itinerary: Any) -> Tuple[Dict[str, Any] | None, List[Any]]:
+    """Separate the ``days`` list from the rest of a generated itinerary."""
+    if not isinstance(itinerary, dict):
+        return itinerary, []
+    sections = {key: value for key, value in itinerary.items() if key != "days"}
+    days = itinerary.get("days")
+    return sections, days if isinstance(days, list) else []
+
+
+def _activity_row(activity_model, day, position: int, data: Any):
+    if not isinstance(data, dict):
+        return activity_model(day=day, position=position, activity=str(data), text_only=True)
+    extra = {key: value for key, value in data.items() if key not in ACTIVITY_COLUMNS}
+    return activity_model(
+        day=day,
+        position=position,
+        time=str(data.get("time") or "")[:64],
+        activity=str(data.get("activity") or ""),
+        location=str(data.get("location") or "")[:255],
+        cost=str(data.get("cost") or "")[:64],
+        details=extra or None,
+    )
+
+
+def build_rows(day_model, activity_model, trip_id, days: List[Any], numbers: List[int] | None = None):
+    """Unsaved day and activity rows for ``days`` (numbered from 1 unless ``numbers`` is given)."""
+    day_rows, activity_rows = [], []
+    for index, data in enumerate(days):
+        data = data if isinstance(data, dict) else {"activities": [data]}
+        number = numbers[index] if numbers else index + 1
+        extra = {key: value for key, value in data.items() if key not in ("day", "theme", "activities")}
+        day = day_model(trip_id=trip_id, number=number, theme=str(data.get("theme") or "")[:255], details=extra or None)
+        day_rows.append(day)
+        activities = data.get("activities")
+        for position, activity in enumerate(activities if isinstance(activities, list) else []):
+            activity_rows.append(_activity_row(activity_model, day, position, activity))
+    return day_rows, activity_rows
+
+
+def activity_to_dict(activity) -> Any:
+    if activity.text_only:
+        return activity.activity
+    data = {"time": activity.time} if activity.time else {}
+    data["activity"] = activity.activity
+    if activity.location:
+        data["location"] = activity.location
+    if activity.cost:
+        data["cost"] = activity.cost
+    return {**data, **(activity.details or {})}
+
+
+def day_to_dict(day, activities=None) -> Dict[str, Any]:
+    """``activities`` defaults to the day's stored rows; pass them for an unsaved day."""
+    data: Dict[str, Any] = {"day": day.number}
+    if day.theme:
+        data["theme"] = day.theme
+    activities = day.activities.all() if activities is None else activities
+    data["activities"] = [activity_to_dict(activity) for activity in activities]
+    return {**data, **(day.details or {})}
+
+
+def is_normalized(trip: Trip) -> bool:
+    """Trips whose ``itinerary`` still embeds ``days`` predate (or bypassed) the day rows."""
+    return not (isinstance(trip.itinerary, dict) and "days" in trip.itinerary)
+
+
+def assemble_itinerary(trip: Trip) -> Dict[str, Any] | None:
+    """The full itinerary document the API has always returned: sections plus ordered days."""
+    if not is_normalized(trip) or trip.itinerary is None:
+        return trip.itinerary
+    days = trip.itinerary_days.all()
+    if "itinerary_days" not in getattr(trip, "_prefetched_objects_cache", {}):
+        days = days.prefetch_related("activities")
+    return {**trip.itinerary, "days": [day_to_dict(day) for day in days]}
+
+
+def days_by_trip(trip_ids: List[Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """Day dicts for many trips in two queries (days + activities)."""
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    days = ItineraryDay.objects.filter(trip_id__in=trip_ids).prefetch_related("activities").order_by("trip_id", "number")
+    for day in days:
+        grouped.setdefault(str(day.trip_id), []).append(day_to_dict(day))
+    return grouped
+
+
+def generation_inputs(trip: Trip, extra_context: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    """The trip fields and preferences an itinerary is generated from, in a JSON-comparable form."""
+    extra_context = extra_context or {}
+    inputs: Dict[str, Any] = {
+        "location": trip.location,
+        "start_date": trip.start_date.isoformat() if trip.start_date else None,
+        "end_date": trip.end_date.isoformat() if trip.end_date else None,
+        "budget_cents": trip.budget_cents,
+    }
+    for key, default in PREFERENCE_DEFAULTS.items():
+        value = extra_context.get(key) or default
+        inputs[key] = sorted(map(str, value)) if isinstance(value, list) else value
+    return inputs
+
+
+def diff_inputs(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    return {
+        key: {"from": before.get(key), "to": value}
+        for key, value in after.items()
+        if before.get(key) != value
+    }
+
+
+@transaction.atomic
+def store_itinerary(trip: Trip, itinerary: Dict[str, Any], inputs: Dict[str, Any] | None = None) -> None:
+    """
+    Replace a trip's whole itinerary (after a full generation from ``inputs``). The fallback
+    placeholder is not recorded as generated from anything, so the next run replaces it.
+    """
+    sections, days = split_itinerary(itinerary)
+    trip.itinerary = sections
+    trip.generated_with = None if itinerary is DEFAULT_ITINERARY else inputs
+    trip.save(update_fields=["itinerary", "generated_with", "updated_at"])
+    ItineraryDay.objects.filter(trip=trip).delete()
+    day_rows, activity_rows = build_rows(ItineraryDay, Activity, trip.pk, days)
+    ItineraryDay.objects.bulk_create(day_rows)
+    Activity.objects.bulk_create(activity_rows)
+
+
+@transaction.atomic
+def ensure_normalized(trip: Trip) -> None:
+    """Move embedded ``days`` into day rows before a write; concurrent writers move them once."""
+    if is_normalized(trip):
+        return
+    locked = Trip.objects.select_for_update().only("itinerary").get(pk=trip.pk)
+    if is_normalized(locked):
+        trip.itinerary = locked.itinerary
+    else:
+        store_itinerary(trip, locked.itinerary)
+
+
+def get_day(trip: Trip, number: int) -> Dict[str, Any]:
+    """
+    One day as a dict, without writing anything: a trip that still embeds ``days`` is read
+    from its JSON (day rows are created by the next PATCH or regeneration instead).
+    """
+    if is_normalized(trip):
+        return day_to_dict(ItineraryDay.objects.prefetch_related("activities").get(trip=trip, number=number))
+    days = split_itinerary(trip.itinerary)[1]
+    if not 1 <= number <= len(days):
+        raise ItineraryDay.DoesNotExist(f"Day {number} not found")
+    (day,), activities = build_rows(ItineraryDay, Activity, trip.pk, [days[number - 1]], numbers=[number])
+    return day_to_dict(day, activities)
+
+
+def _touch(trip: Trip) -> None:
+    Trip.objects.filter(pk=trip.pk).update(updated_at=timezone.now())
+
+
+def _replace_activities(day: ItineraryDay, activities: List[Any]) -> None:
+    day.activities.all().delete()
+    Activity.objects.bulk_create(_activity_row(Activity, day, position, activity) for position, activity in enumerate(activities))
+
+
+def _validate_activities(activities: Any) -> List[Any]:
+    if not isinstance(activities, list):
+        raise ValueError("activities must be a list")
+    for activity in activities:
+        if isinstance(activity, dict):
+            if not activity.get("activity"):
+                raise ValueError("each activity object needs an 'activity'")
+        elif not isinstance(activity, str):
+            raise ValueError("activities must be strings or objects")
+    return activities
+
+
+@transaction.atomic
+def update_day(trip: Trip, number: int, changes: Dict[str, Any]) -> ItineraryDay:
+    """
+    Partially update one day: ``theme``, ``activities`` (replaced as a whole) and any other
+    day key (``null`` removes it). Only this day's rows are written.
+    """
+    ensure_normalized(trip)
+    day = ItineraryDay.objects.select_for_update().get(trip=trip, number=number)
+    if "activities" in changes:
+        _replace_activities(day, _validate_activities(changes["activities"]))
+    if "theme" in changes:
+        day.theme = str(changes["theme"] or "")[:255]
+    details = dict(day.details or {})
+    for key, value in changes.items():
+        if key in ("day", "theme", "activities"):
+            continue
+        if value is None:
+            details.pop(key, None)
+        else:
+            details[key] = value
+    day.details = details or None
+    day.save(update_fields=["theme", "details", "updated_at"])
+    _touch(trip)
+    return ItineraryDay.objects.prefetch_related("activities").get(pk=day.pk)
+
+
+@transaction.atomic
+def replace_day(trip: Trip, number: int, data: Dict[str, Any]) -> ItineraryDay:
+    day = ItineraryDay.objects.select_for_update().get(trip=trip, number=number)
+    (new_day,), activity_rows = build_rows(ItineraryDay, Activity, trip.pk, [data], numbers=[number])
+    day.theme = new_day.theme
+    day.details = new_day.details
+    day.save(update_fields=["theme", "details", "updated_at"])
+    for activity in activity_rows:
+        activity.day = day
+    day.activities.all().delete()
+    Activity.objects.bulk_create(activity_rows)
+    _touch(trip)
+    return ItineraryDay.objects.prefetch_related("activities").get(pk=day.pk)
+
+
+def regenerate_day(trip: Trip, number: int, extra_context: Dict[str, Any] | None = None) -> ItineraryDay | None:
+    """
+    Ask Gemini for a new version of one day, giving it the other days only as a short
+    summary, and store it. Returns None (leaving the day untouched) if generation fails.
+    """
+    ensure_normalized(trip)
+    current = ItineraryDay.objects.prefetch_related("activities").get(trip=trip, number=number)
+    others = [
+        day_to_dict(day)
+        for day in ItineraryDay.objects.filter(trip=trip).exclude(pk=current.pk).prefetch_related("activities")
+    ]
+    result = generate_itinerary_day(trip, number, day_to_dict(current), others, extra_context)
+    if result is None:
+        return None
+    return replace_day(trip, number, result)
+
+
+def _day_number(data: Any) -> int | None:
+    try:
+        return int(data.get("day"))
+    except (TypeError, ValueError):
+        return None
+
+
+@transaction.atomic
+def apply_itinerary_update(trip: Trip, update: Dict[str, Any], inputs: Dict[str, Any]) -> int:
+    """
+    Merge an incremental update into the stored itinerary: returned days replace the days
+    with the same number (``"day": "4"`` counts as day 4), returned sections replace those
+    keys. Returns how many days and sections were written; when nothing matches, nothing is
+    stored and 0 is returned.
+    """
+    numbers = set(ItineraryDay.objects.filter(trip=trip).values_list("number", flat=True))
+    days = {}
+    for data in update.get("days") or []:
+        if isinstance(data, dict) and isinstance(data.get("activities"), list) and _day_number(data) in numbers:
+            days[_day_number(data)] = data
+    sections = {key: value for key, value in (update.get("sections") or {}).items() if key != "days"}
+    if not days and not sections:
+        return 0
+    for number, data in days.items():
+        replace_day(trip, number, data)
+    trip.itinerary = {**(trip.itinerary or {}), **sections}
+    trip.generated_with = inputs
+    trip.save(update_fields=["itinerary", "generated_with", "updated_at"])
+    return len(days) + len(sections)
+
+
+def regenerate_itinerary(trip: Trip, extra_context: Dict[str, Any] | None = None, mode: str = "auto") -> str:
+    """
+    Bring a trip's itinerary in line with ``extra_context`` and return the strategy used.
+
+    With ``mode="auto"`` (the default) or ``"incremental"``, an itinerary generated from known
+    inputs is only patched when preferences or the budget changed: Gemini is asked for just
+    the affected days and sections ("incremental"). Unchanged inputs are a no-op ("unchanged")
+    only with ``mode="incremental"``; in auto mode they regenerate the plan, so posting again
+    still re-rolls it. New dates or a new destination, ``mode="full"``, or an update that
+    fails or matches no stored day regenerate everything ("full").
+    """
+    inputs = generation_inputs(trip, extra_context)
+    if mode != "full" and trip.generated_with and trip.itinerary is not None:
+        changes = diff_inputs(trip.generated_with, inputs)
+        if not changes and mode == "incremental":
+            return "unchanged"
+        if changes and not any(key in changes for key in STRUCTURAL_INPUTS):
+            ensure_normalized(trip)
+            update = generate_itinerary_update(trip, assemble_itinerary(trip), changes, extra_context)
+            if update is not None and apply_itinerary_update(trip, update, inputs):
+                return "incremental"
+    store_itinerary(trip, generate_itinerary(trip, extra_context), inputs)
+    return "full"
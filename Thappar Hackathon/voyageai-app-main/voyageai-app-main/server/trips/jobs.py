@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, Dict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .itinerary import regenerate_itinerary
+from .models import GenerationJob, Trip
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "GENERATION_JOB_WORKERS", 4),
+                    thread_name_prefix="itinerary-job",
+                )
+                # Pick up jobs a previous (dead) process left behind.
+                _executor.submit(recover_jobs)
+    return _executor
+
+
+def expire_stale_jobs(**filters) -> int:
+    """
+    Fail active jobs whose worker is presumed dead: running, or still queued, for longer than
+    ``GENERATION_JOB_LEASE_SECONDS``. Returns how many jobs were expired.
+    """
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, "GENERATION_JOB_LEASE_SECONDS", 900))
+    stale = GenerationJob.objects.filter(**filters).filter(
+        Q(status="running", started_at__lt=cutoff) | Q(status="queued", created_at__lt=cutoff)
+    )
+    return stale.update(
+        status="failed",
+        error="Generation did not finish in time; please try again.",
+        progress=100,
+        finished_at=timezone.now(),
+    )
+
+
+def recover_jobs() -> int:
+    """Expire stale jobs, then hand the remaining queued ones to the worker pool."""
+    try:
+        expire_stale_jobs()
+        ids = list(GenerationJob.objects.filter(status="queued").order_by("created_at").values_list("id", flat=True))
+    finally:
+        close_old_connections()
+    executor = _get_executor()
+    for job_id in ids:
+        # Claiming is atomic, so a job that is also queued in another process runs once.
+        executor.submit(run_job, job_id)
+    return len(ids)
+
+
+def params_hash(params: Dict[str, Any] | None) -> str:
+    payload = json.dumps(params or {}, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def enqueue_generation(trip: Trip, params: Dict[str, Any] | None = None) -> tuple[GenerationJob, bool]:
+    """
+    Queue an itinerary generation job for ``trip`` and hand it to the local worker pool.
+    Returns ``(job, created)``; a queued or running job with the same parameters is reused
+    unless its lease has expired.
+    """
+    params = params or {}
+    digest = params_hash(params)
+    with transaction.atomic():
+        # Lock the trip row so concurrent POSTs for the same trip coalesce instead of racing.
+        Trip.objects.select_for_update().filter(id=trip.id).first()
+        expire_stale_jobs(trip=trip, params_hash=digest)
+        job = (
+            GenerationJob.objects.filter(trip=trip, params_hash=digest, status__in=GenerationJob.ACTIVE_STATUSES)
+            .order_by("-created_at")
+            .first()
+        )
+        if job is not None:
+            return job, False
+        job = GenerationJob.objects.create(trip=trip, params=params, params_hash=digest)
+        transaction.on_commit(lambda: _get_executor().submit(run_job, job.id))
+    return job, True
+
+
+def run_job(job_id) -> bool:
+    """Claim and run one queued job. Returns False if another worker already claimed it."""
+    try:
+        claimed = GenerationJob.objects.filter(id=job_id, status="queued").update(
+            status="running", progress=10, started_at=timezone.now()
+        )
+        if not claimed:
+            return False
+
+        job = GenerationJob.objects.select_related("trip").get(id=job_id)
+        result = {"status": "succeeded", "error": ""}
+        try:
+            params = job.params or {}
+            result["strategy"] = regenerate_itinerary(job.trip, params, mode=params.get("mode", "auto"))
+        except Exception as e:
+            result = {"status": "failed", "error": str(e)}
+        # Only a job still running is finished here; one that outlived its lease stays failed.
+        GenerationJob.objects.filter(id=job_id, status="running").update(
+            progress=100, finished_at=timezone.now(), **result
+        )
+        return True
+    finally:
+        # Worker threads hold their own DB connections; release them between jobs.
+        close_old_connections()
+
+
+def run_pending(limit: int | None = None) -> int:
+    """Run queued jobs in the calling thread, oldest first. Used by the worker command."""
+    ids = GenerationJob.objects.filter(status="queued").order_by("created_at").values_list("id", flat=True)
+    if limit:
+        ids = ids[:limit]
+    return sum(1 for job_id in list(ids) if run_job(job_id))
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, List
+
+
+class ArrayItemStream:
+    """
+    Incrementally scans streamed JSON text and returns each element of a top-level
+    array field (e.g. ``"days"``) as soon as that element is complete. The scan keeps
+    its state between ``feed`` calls, so every character is examined once.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self._text = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._last_string: str | None = None
+        self._current_key: str | None = None
+        self._array_depth: int | None = None
+        self._item_start = -1
+
+    def feed(self, chunk: str) -> List[Any]:
+        self._text += chunk
+        items: List[Any] = []
+        text = self._text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        self._last_string = text[self._string_start + 1 : i]
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch == ":" and len(self._stack) == 1:
+                self._current_key = self._last_string
+            elif ch in "{[":
+                if ch == "[" and len(self._stack) == 1 and self._current_key == self.key and self._array_depth is None:
+                    self._array_depth = len(self._stack) + 1
+                elif self._array_depth is not None and len(self._stack) == self._array_depth:
+                    self._item_start = i
+                self._stack.append(ch)
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+                depth = len(self._stack)
+                if self._array_depth is not None:
+                    if depth == self._array_depth and self._item_start >= 0:
+                        try:
+                            items.append(json.loads(text[self._item_start : i + 1]))
+                        except ValueError:
+                            pass
+                        self._item_start = -1
+                    elif depth < self._array_depth:
+                        self._array_depth = -1  # array closed; ignore later arrays with the same key
+        self._pos = len(text)
+        return items
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+
+_CLOSERS = {"{": "}", "[": "]"}
+# Strings (possibly unterminated) and structural characters; everything else is skipped
+# inside the regex engine, so a scan is linear and mostly runs in C.
+_TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"?|[{}\[\],]')
+_OPENER = re.compile(r"[{\[]")
+_MAX_REPAIR_ATTEMPTS = 8
+_decoder = json.JSONDecoder()
+
+
+class JsonValueScanner:
+    """
+    Balanced-bracket scan for the first top-level JSON object or array in model output.
+    Like ``ArrayItemStream`` it can be fed chunk by chunk without rescanning;
+    ``complete`` flips as soon as the outermost value closes. When the output is cut
+    off (token limit, dropped stream), ``repaired_text`` closes the open string and
+    containers, dropping a trailing partial element if that is what it takes to parse.
+    """
+
+    def __init__(self, start: int = 0):
+        self._text = ""
+        self._pos = start
+        self._start = -1
+        self._end = -1
+        self._stack: List[str] = []
+        # For each open container, the index of its last top-level comma (or just past its opener).
+        self._cuts: List[int] = []
+
+    def feed(self, chunk: str) -> bool:
+        self._text += chunk
+        if self._end >= 0:
+            return True
+        text = self._text
+        if self._start < 0:
+            opener = _OPENER.search(text, self._pos)
+            if opener is None:
+                self._pos = len(text)
+                return False
+            self._start = self._pos = opener.start()
+
+        for match in _TOKEN.finditer(text, self._pos):
+            token = match.group()
+            i = match.start()
+            if token[0] == '"':
+                if len(token) == 1 or token[-1] != '"' or _escaped_quote(token):
+                    # String still open at the end of the buffer: resume here next feed.
+                    self._pos = i
+                    return False
+            elif token in _CLOSERS:
+                self._stack.append(token)
+                self._cuts.append(i + 1)
+            elif token == ",":
+                self._cuts[-1] = i
+            else:
+                self._stack.pop()
+                self._cuts.pop()
+                if not self._stack:
+                    self._end = self._pos = i + 1
+                    return True
+        self._pos = len(text)
+        return False
+
+    @property
+    def complete(self) -> bool:
+        return self._end >= 0
+
+    @property
+    def start(self) -> int:
+        return self._start
+
+    @property
+    def text(self) -> str:
+        """The scanned value so far (the whole value once ``complete``)."""
+        if self._start < 0:
+            return ""
+        return self._text[self._start : self._end if self._end >= 0 else len(self._text)]
+
+    def repaired_text(self) -> str | None:
+        """Best-effort parseable version of a truncated value, or None if nothing usable was seen."""
+        if self._start < 0:
+            return None
+        if self.complete:
+            return self.text
+
+        body = self._text[self._start :]
+        tail = self._text[self._pos :]
+        if tail.startswith('"'):
+            # Close the unterminated string, minus a dangling escape character.
+            body = body[:-1] if _escaped_quote(tail + '"') else body
+            body += '"'
+        candidate = _strip_dangling(body) + _closers(self._stack)
+        if _parses(candidate):
+            return candidate
+
+        # Drop the partial trailing element of the innermost container, then of its
+        # parents, until what is left parses.
+        depth = len(self._stack)
+        for depth in range(depth, max(depth - _MAX_REPAIR_ATTEMPTS, 0), -1):
+            candidate = _strip_dangling(self._text[self._start : self._cuts[depth - 1]]) + _closers(self._stack[:depth])
+            if _parses(candidate):
+                return candidate
+        return None
+
+
+def _escaped_quote(token: str) -> bool:
+    """True when the final quote of ``token`` is escaped by an odd run of backslashes."""
+    backslashes = len(token) - 1 - len(token[:-1].rstrip("\\"))
+    return backslashes % 2 == 1
+
+
+def _closers(stack: List[str]) -> str:
+    return "".join(_CLOSERS[ch] for ch in reversed(stack))
+
+
+def _strip_dangling(body: str) -> str:
+    body = body.rstrip()
+    if body.endswith(","):
+        return body[:-1]
+    if body.endswith(":"):
+        # A key with no value: drop it along with the separator before it.
+        head = body[:-1].rstrip()
+        if head.endswith('"'):
+            key_start = head.rfind('"', 0, len(head) - 1)
+            if key_start >= 0:
+                return _strip_dangling(head[:key_start])
+    return body
+
+
+def _parses(text: str) -> bool:
+    try:
+        json.loads(text)
+    except ValueError:
+        return False
+    return True
+
+
+def _fenced_region(text: str) -> tuple[int, int]:
+    """Bounds of the first Markdown code fence body, or the whole text if there is none."""
+    fence = text.find("```")
+    if fence < 0:
+        return 0, len(text)
+    body_start = text.find("\n", fence)
+    if body_start < 0:
+        return len(text), len(text)
+    body_end = text.find("```", body_start)
+    return body_start + 1, body_end if body_end >= 0 else len(text)
+
+
+def _scan_candidates(text: str, repair: bool, max_candidates: int) -> tuple[Any, bool]:
+    last_error = ValueError("No JSON object or array found in model output")
+    pos = 0
+    for _ in range(max_candidates):
+        opener = _OPENER.search(text, pos)
+        if opener is None:
+            break
+        start = opener.start()
+        # Fast path: a well-formed value decodes straight from its opening bracket in C.
+        try:
+            return _decoder.raw_decode(text, start)[0], False
+        except ValueError as e:
+            last_error = e
+
+        scanner = JsonValueScanner(start)
+        if scanner.feed(text):
+            # Balanced but not JSON (e.g. "[optional]" in prose): try the next bracket.
+            pos = start + 1
+            continue
+        # The value never closes, so every later bracket is nested inside it.
+        repaired = scanner.repaired_text() if repair else None
+        if repaired is not None:
+            return json.loads(repaired), True
+        break
+    raise last_error
+
+
+def extract_json(text: str, repair: bool = True, max_candidates: int = 4) -> Any:
+    """
+    Parse the JSON object or array embedded in a model reply. Handles Markdown code
+    fences, prose before/after the value and (with ``repair``) truncated output. If
+    the first bracket turns out to be prose, the next few are tried. Raises
+    ``ValueError`` when nothing parses.
+    """
+    return extract_json_checked(text, repair, max_candidates)[0]
+
+
+def extract_json_checked(text: str, repair: bool = True, max_candidates: int = 4) -> tuple[Any, bool]:
+    """
+    Like ``extract_json`` but returns ``(value, repaired)``; ``repaired`` is True when the
+    reply was cut off and the value was completed by closing it, so it may be missing parts.
+    """
+    start, end = _fenced_region(text)
+    if start == 0 and end == len(text):
+        return _scan_candidates(text, repair, max_candidates)
+    try:
+        return _scan_candidates(text[start:end], repair, max_candidates)
+    except ValueError:
+        # Nothing usable inside the fence; look at the whole reply instead.
+        return _scan_candidates(text, repair, max_candidates)
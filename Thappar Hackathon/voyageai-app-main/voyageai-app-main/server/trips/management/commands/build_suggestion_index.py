@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from trips.suggestions import build_entry, precompute_keys, top_locations
+
+
+class Command(BaseCommand):
+    help = "Precompute destination suggestions for the top locations x budget tiers x duration buckets."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--locations", default="", help="Comma-separated locations (defaults to the most planned destinations).")
+        parser.add_argument("--top", type=int, default=None, help="Number of top trip locations to index.")
+        parser.add_argument(
+            "--interests",
+            default="",
+            help="Semicolon-separated interest sets to index besides 'no interests', e.g. 'food,culture;beach'.",
+        )
+        parser.add_argument("--stale-only", action="store_true", help="Only (re)build missing or stale entries.")
+        parser.add_argument("--loop", action="store_true", help="Keep refreshing stale entries periodically.")
+        parser.add_argument("--interval", type=float, default=3600.0, help="Seconds between refresh passes with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            locations = [loc.strip() for loc in options["locations"].split(",") if loc.strip()]
+            if not locations:
+                locations = top_locations(options["top"] or getattr(settings, "SUGGESTION_INDEX_TOP_N", 50))
+
+            interest_sets = [()] + [group.split(",") for group in options["interests"].split(";") if group.strip()]
+            keys = precompute_keys(locations, stale_only=options["stale_only"] or options["loop"], interest_sets=interest_sets)
+            built = 0
+            for key in keys:
+                if build_entry(key):
+                    built += 1
+                else:
+                    self.stderr.write(
+                        f"Failed to build {key.location_key} / {key.budget_tier} / {key.duration_bucket} / {key.interests_key or '-'}"
+                    )
+            self.stdout.write(f"Built {built}/{len(keys)} suggestion set(s) for {len(locations)} location(s)")
+
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from trips.jobs import expire_stale_jobs, run_pending
+
+
+class Command(BaseCommand):
+    help = "Run queued itinerary generation jobs from the database (e.g. after a restart or in a separate worker process)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new jobs instead of exiting.")
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds between polls with --loop.")
+        parser.add_argument("--limit", type=int, default=None, help="Maximum jobs to run per poll.")
+
+    def handle(self, *args, **options):
+        while True:
+            expired = expire_stale_jobs()
+            if expired:
+                self.stdout.write(f"Expired {expired} stale job(s)")
+            processed = run_pending(options["limit"])
+            if processed:
+                self.stdout.write(f"Processed {processed} job(s)")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.2 on 2026-10-17 21:47
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0003_generationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AIInflightCall',
+            fields=[
+                ('key', models.CharField(max_length=128, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('expires_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.2 on 2026-10-17 21:48
+
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0004_aiinflightcall'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SuggestionSet',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('location_key', models.CharField(max_length=255)),
+                ('budget_tier', models.CharField(max_length=16)),
+                ('duration_bucket', models.CharField(max_length=16)),
+                ('interests_key', models.CharField(blank=True, max_length=255)),
+                ('suggestions', models.JSONField()),
+                ('generated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('location_key', 'budget_tier', 'duration_bucket', 'interests_key'), name='unique_suggestion_set')],
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.2 on 2026-10-17 21:59
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0006_trip_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItineraryDay',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('number', models.PositiveSmallIntegerField()),
+                ('theme', models.CharField(blank=True, max_length=255)),
+                ('details', models.JSONField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('trip', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='itinerary_days', to='trips.trip')),
+            ],
+            options={
+                'ordering': ['number'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Activity',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('position', models.PositiveSmallIntegerField()),
+                ('time', models.CharField(blank=True, max_length=64)),
+                ('activity', models.TextField()),
+                ('location', models.CharField(blank=True, max_length=255)),
+                ('cost', models.CharField(blank=True, max_length=64)),
+                ('details', models.JSONField(blank=True, null=True)),
+                ('text_only', models.BooleanField(default=False)),
+                ('day', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activities', to='trips.itineraryday')),
+            ],
+            options={
+                'ordering': ['position'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='itineraryday',
+            constraint=models.UniqueConstraint(fields=('trip', 'number'), name='unique_itinerary_day'),
+        ),
+    ]
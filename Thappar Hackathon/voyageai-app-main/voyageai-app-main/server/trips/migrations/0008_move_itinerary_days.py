@@ -0,0 +1,99 @@
+# Generated by Django 5.1.2 on 2026-10-17 21:59
+
+from django.db import migrations
+
+# Frozen copies of the trips.itinerary helpers as of this migration, so later changes to
+# that module (or to the live models it imports) cannot change what this migration does.
+ACTIVITY_COLUMNS = ("time", "activity", "location", "cost")
+
+
+def split_itinerary(itinerary):
+    sections = {key: value for key, value in itinerary.items() if key != "days"}
+    days = itinerary.get("days")
+    return sections, days if isinstance(days, list) else []
+
+
+def _activity_row(Activity, day, position, data):
+    if not isinstance(data, dict):
+        return Activity(day=day, position=position, activity=str(data), text_only=True)
+    extra = {key: value for key, value in data.items() if key not in ACTIVITY_COLUMNS}
+    return Activity(
+        day=day,
+        position=position,
+        time=str(data.get("time") or "")[:64],
+        activity=str(data.get("activity") or ""),
+        location=str(data.get("location") or "")[:255],
+        cost=str(data.get("cost") or "")[:64],
+        details=extra or None,
+    )
+
+
+def build_rows(ItineraryDay, Activity, trip_id, days):
+    day_rows, activity_rows = [], []
+    for number, data in enumerate(days, start=1):
+        data = data if isinstance(data, dict) else {"activities": [data]}
+        extra = {key: value for key, value in data.items() if key not in ("day", "theme", "activities")}
+        day = ItineraryDay(trip_id=trip_id, number=number, theme=str(data.get("theme") or "")[:255], details=extra or None)
+        day_rows.append(day)
+        activities = data.get("activities")
+        for position, activity in enumerate(activities if isinstance(activities, list) else []):
+            activity_rows.append(_activity_row(Activity, day, position, activity))
+    return day_rows, activity_rows
+
+
+def activity_to_dict(activity):
+    if activity.text_only:
+        return activity.activity
+    data = {"time": activity.time} if activity.time else {}
+    data["activity"] = activity.activity
+    if activity.location:
+        data["location"] = activity.location
+    if activity.cost:
+        data["cost"] = activity.cost
+    return {**data, **(activity.details or {})}
+
+
+def day_to_dict(day):
+    data = {"day": day.number}
+    if day.theme:
+        data["theme"] = day.theme
+    data["activities"] = [activity_to_dict(activity) for activity in day.activities.all()]
+    return {**data, **(day.details or {})}
+
+
+def move_days_to_rows(apps, schema_editor):
+    Trip = apps.get_model("trips", "Trip")
+    ItineraryDay = apps.get_model("trips", "ItineraryDay")
+    Activity = apps.get_model("trips", "Activity")
+
+    for trip in Trip.objects.exclude(itinerary=None).iterator():
+        if not isinstance(trip.itinerary, dict) or "days" not in trip.itinerary:
+            continue
+        sections, days = split_itinerary(trip.itinerary)
+        day_rows, activity_rows = build_rows(ItineraryDay, Activity, trip.pk, days)
+        ItineraryDay.objects.bulk_create(day_rows)
+        Activity.objects.bulk_create(activity_rows)
+        Trip.objects.filter(pk=trip.pk).update(itinerary=sections)
+
+
+def move_rows_to_days(apps, schema_editor):
+    Trip = apps.get_model("trips", "Trip")
+    ItineraryDay = apps.get_model("trips", "ItineraryDay")
+
+    for trip in Trip.objects.exclude(itinerary=None).iterator():
+        if not isinstance(trip.itinerary, dict) or "days" in trip.itinerary:
+            continue
+        days = ItineraryDay.objects.filter(trip_id=trip.pk).order_by("number").prefetch_related("activities")
+        Trip.objects.filter(pk=trip.pk).update(itinerary={**trip.itinerary, "days": [day_to_dict(day) for day in days]})
+    ItineraryDay.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0007_itineraryday_activity'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_days_to_rows, move_rows_to_days),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.2 on 2026-10-17 22:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0008_move_itinerary_days'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='strategy',
+            field=models.CharField(blank=True, max_length=16),
+        ),
+        migrations.AddField(
+            model_name='trip',
+            name='generated_with',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
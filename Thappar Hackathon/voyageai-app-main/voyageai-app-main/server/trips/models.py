@@ -17,13 +17,121 @@ class Trip(models.Model):
     vehicle = models.CharField(max_length=64, blank=True)
     accessibility = models.JSONField(blank=True, null=True)
     itinerary = models.JSONField(blank=True, null=True)
+    # Trip fields and preferences the stored itinerary was generated from, so a later
+    # regeneration can tell what changed and only ask for the affected parts.
+    generated_with = models.JSONField(blank=True, null=True)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # Keyset pagination for the discover feed walks (created_at, id) newest-first.
+        indexes = [models.Index(fields=["-created_at", "-id"], name="trip_created_id_idx")]
+
     def __str__(self) -> str:
         return f"{self.title} ({self.location})"
 
 
+class ItineraryDay(models.Model):
+    """One day of a trip's generated itinerary; the other sections stay in ``Trip.itinerary``."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    trip = models.ForeignKey(Trip, on_delete=models.CASCADE, related_name="itinerary_days")
+    number = models.PositiveSmallIntegerField()
+    theme = models.CharField(max_length=255, blank=True)
+    # Remaining keys of the generated day (daily_budget, meals, tips, ...).
+    details = models.JSONField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["number"]
+        constraints = [models.UniqueConstraint(fields=["trip", "number"], name="unique_itinerary_day")]
+
+    def __str__(self) -> str:
+        return f"{self.trip.title} day {self.number}"
+
+
+class Activity(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    day = models.ForeignKey(ItineraryDay, on_delete=models.CASCADE, related_name="activities")
+    position = models.PositiveSmallIntegerField()
+    time = models.CharField(max_length=64, blank=True)
+    activity = models.TextField()
+    location = models.CharField(max_length=255, blank=True)
+    cost = models.CharField(max_length=64, blank=True)
+    details = models.JSONField(blank=True, null=True)
+    # The model returned a bare string rather than an object for this activity.
+    text_only = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ["position"]
+
+    def __str__(self) -> str:
+        return self.activity[:80]
+
+
+class GenerationJob(models.Model):
+    STATUS_CHOICES = (
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("succeeded", "Succeeded"),
+        ("failed", "Failed"),
+    )
+    ACTIVE_STATUSES = ("queued", "running")
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    trip = models.ForeignKey(Trip, on_delete=models.CASCADE, related_name="generation_jobs")
+    params = models.JSONField(blank=True, null=True)
+    params_hash = models.CharField(max_length=64)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default="queued")
+    progress = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    # How the job produced its result: "full", "incremental" or "unchanged".
+    strategy = models.CharField(max_length=16, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["trip", "params_hash", "status"])]
+
+    def __str__(self) -> str:
+        return f"{self.trip.title} generation ({self.status})"
+
+
+class SuggestionSet(models.Model):
+    """Precomputed destination suggestions for a normalized (location, budget tier, duration bucket, interests) query."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    location_key = models.CharField(max_length=255)
+    budget_tier = models.CharField(max_length=16)
+    duration_bucket = models.CharField(max_length=16)
+    interests_key = models.CharField(max_length=255, blank=True)
+    suggestions = models.JSONField()
+    generated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["location_key", "budget_tier", "duration_bucket", "interests_key"],
+                name="unique_suggestion_set",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.location_key} / {self.budget_tier} / {self.duration_bucket}"
+
+
+class AIInflightCall(models.Model):
+    """Lease row electing one process to call Gemini for a given response-cache key."""
+
+    key = models.CharField(max_length=128, primary_key=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField()
+
+    def __str__(self) -> str:
+        return self.key
+
+
 class Team(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=255)
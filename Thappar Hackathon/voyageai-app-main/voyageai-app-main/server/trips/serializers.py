@@ -1,14 +1,46 @@
 from __future__ import annotations
 
-from rest_framework import serializers
+from typing import Any, Callable, Dict, Iterable, List, Sequence
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
 
 from users.serializers import UserSerializer
 
-from .models import Carpool, Trip, TripRequest
+from .itinerary import assemble_itinerary
+from .models import Carpool, GenerationJob, Trip, TripRequest
+
+
+def requested_fields(request, available: Iterable[str]) -> List[str]:
+    """Apply ``?fields=a,b`` and ``?exclude=c`` from ``request`` to ``available`` (unknown names are ignored)."""
+    available = list(available)
+    params = getattr(request, "query_params", None)
+    if params is None:
+        return available
+    only = {name.strip() for name in params.get("fields", "").split(",") if name.strip()}
+    exclude = {name.strip() for name in params.get("exclude", "").split(",") if name.strip()}
+    return [name for name in available if (not only or name in only) and name not in exclude]
+
+
+class SparseFieldsMixin:
+    """Drops fields not selected by ``?fields=`` / ``?exclude=`` on the request in the serializer context."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is not None:
+            keep = set(requested_fields(request, self.fields))
+            for name in list(self.fields):
+                if name not in keep:
+                    self.fields.pop(name)
 
 
-class TripSerializer(serializers.ModelSerializer):
+class TripSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     owner = UserSerializer(read_only=True)
+    itinerary = serializers.SerializerMethodField()
     startDate = serializers.DateField(source="start_date", allow_null=True)
     endDate = serializers.DateField(source="end_date", allow_null=True)
     budgetCents = serializers.IntegerField(source="budget_cents", allow_null=True)
@@ -32,6 +64,98 @@ class TripSerializer(serializers.ModelSerializer):
             "owner",
         )
 
+    def get_itinerary(self, obj):
+        return assemble_itinerary(obj)
+
+
+# Fast path for trip lists: response field -> column for ``QuerySet.values()``. Rows are
+# turned into the same dicts TripSerializer produces without instantiating models or
+# running DRF field machinery per row.
+TRIP_VALUE_COLUMNS = {
+    "id": "id",
+    "title": "title",
+    "startDate": "start_date",
+    "endDate": "end_date",
+    "budgetCents": "budget_cents",
+    "location": "location",
+    "vehicle": "vehicle",
+    "accessibility": "accessibility",
+    "itinerary": "itinerary",
+    "createdAt": "created_at",
+    "updatedAt": "updated_at",
+}
+OWNER_VALUE_COLUMNS = {
+    "id": "owner__id",
+    "email": "owner__email",
+    "name": "owner__name",
+    "avatarUrl": "owner__avatar_url",
+    "bio": "owner__bio",
+    "preferences": "owner__preferences",
+    "role": "owner__role",
+}
+TRIP_FIELDS = TripSerializer.Meta.fields
+# Feed representation of a trip: no ``itinerary``/``accessibility`` blobs.
+TRIP_LIST_FIELDS = tuple(name for name in TRIP_FIELDS if name not in ("itinerary", "accessibility"))
+
+_date_field = serializers.DateField()
+_datetime_field = serializers.DateTimeField()
+
+
+def _converters() -> Dict[str, Callable[[Any], Any]]:
+    """Per-field value converters matching DRF's output, resolved once per list."""
+    if api_settings.DATETIME_FORMAT == ISO_8601 and settings.USE_TZ:
+        tz = timezone.get_current_timezone()
+
+        def datetime_repr(value):
+            text = value.astimezone(tz).isoformat()
+            return text[:-6] + "Z" if text.endswith("+00:00") else text
+    else:
+        datetime_repr = _datetime_field.to_representation
+
+    return {
+        "id": str,
+        "startDate": _date_field.to_representation,
+        "endDate": _date_field.to_representation,
+        "createdAt": datetime_repr,
+        "updatedAt": datetime_repr,
+    }
+
+
+def trip_values(queryset: QuerySet, fields: Sequence[str]) -> QuerySet:
+    """``values()`` queryset with the columns needed for ``fields`` (plus the keyset columns)."""
+    columns = {"id", "created_at"}
+    for name in fields:
+        if name == "owner":
+            columns.update(OWNER_VALUE_COLUMNS.values())
+        elif name in TRIP_VALUE_COLUMNS:
+            columns.add(TRIP_VALUE_COLUMNS[name])
+    return queryset.values(*sorted(columns))
+
+
+def trip_rows_to_data(
+    rows: Iterable[Dict[str, Any]],
+    fields: Sequence[str],
+    days: Dict[str, List[Dict[str, Any]]] | None = None,
+) -> List[Dict[str, Any]]:
+    """``days`` (from ``itinerary.days_by_trip``) is merged into normalized itineraries."""
+    converters = _converters()
+    plan = [(name, TRIP_VALUE_COLUMNS[name], converters.get(name)) for name in fields if name in TRIP_VALUE_COLUMNS]
+    with_owner = "owner" in fields
+    data = []
+    for row in rows:
+        item = {}
+        for name, column, convert in plan:
+            value = row[column]
+            item[name] = convert(value) if convert is not None and value is not None else value
+        if days is not None and isinstance(item.get("itinerary"), dict) and "days" not in item["itinerary"]:
+            item["itinerary"] = {**item["itinerary"], "days": days.get(str(row["id"]), [])}
+        if with_owner:
+            owner = {key: row[column] for key, column in OWNER_VALUE_COLUMNS.items()}
+            owner["id"] = str(owner["id"])
+            item["owner"] = owner
+        data.append(item)
+    return data
+
 
 class TripCreateSerializer(serializers.ModelSerializer):
     startDate = serializers.DateField(source="start_date", allow_null=True, required=False)
@@ -43,6 +167,18 @@ class TripCreateSerializer(serializers.ModelSerializer):
         fields = ("title", "startDate", "endDate", "budgetCents", "location", "vehicle", "accessibility")
 
 
+class GenerationJobSerializer(serializers.ModelSerializer):
+    tripId = serializers.UUIDField(source="trip_id", read_only=True)
+    createdAt = serializers.DateTimeField(source="created_at", read_only=True)
+    startedAt = serializers.DateTimeField(source="started_at", read_only=True)
+    finishedAt = serializers.DateTimeField(source="finished_at", read_only=True)
+
+    class Meta:
+        model = GenerationJob
+        fields = ("id", "tripId", "status", "progress", "error", "strategy", "createdAt", "startedAt", "finishedAt")
+        read_only_fields = fields
+
+
 class TripRequestSerializer(serializers.ModelSerializer):
     requester = UserSerializer(read_only=True)
 
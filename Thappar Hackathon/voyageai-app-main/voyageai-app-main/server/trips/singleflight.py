@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import weakref
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections
+from django.utils import timezone
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one execution whose result (or
+    exception) is handed to every waiter. With ``use_db_lease`` a row in
+    ``AIInflightCall`` also elects one leader across processes; the other processes
+    wait for the leader to publish into the shared response cache and read it via
+    ``recheck``.
+    """
+
+    def __init__(self, use_db_lease: bool = False, lease_timeout: float = 60.0, poll_interval: float = 0.1):
+        self.use_db_lease = use_db_lease
+        self.lease_timeout = lease_timeout
+        self.poll_interval = poll_interval
+        self.executed = 0
+        self.shared = 0
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+
+    def do(self, key: str, fn: Callable[[], Any], recheck: Callable[[], Any] | None = None) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            if self.use_db_lease:
+                call.result = self._run_with_lease(key, fn, recheck)
+            else:
+                call.result = fn()
+            with self._lock:
+                self.executed += 1
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def _run_with_lease(self, key: str, fn: Callable[[], Any], recheck: Callable[[], Any] | None) -> Any:
+        from .models import AIInflightCall
+
+        deadline = time.monotonic() + self.lease_timeout
+        while True:
+            AIInflightCall.objects.filter(key=key, expires_at__lt=timezone.now()).delete()
+            try:
+                AIInflightCall.objects.create(key=key, expires_at=timezone.now() + timedelta(seconds=self.lease_timeout))
+            except IntegrityError:
+                # Another process is the leader: wait for its result to land in the shared cache.
+                while AIInflightCall.objects.filter(key=key).exists() and time.monotonic() < deadline:
+                    if recheck is not None:
+                        value = recheck()
+                        if value is not None:
+                            return value
+                    time.sleep(self.poll_interval)
+                if recheck is not None:
+                    value = recheck()
+                    if value is not None:
+                        return value
+                if time.monotonic() >= deadline:
+                    return fn()
+                continue
+
+            try:
+                if recheck is not None:
+                    value = recheck()
+                    if value is not None:
+                        return value
+                return fn()
+            finally:
+                AIInflightCall.objects.filter(key=key).delete()
+                close_old_connections()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"executed": self.executed, "shared": self.shared, "inflight": len(self._calls)}
+
+
+class AsyncSingleFlight:
+    """
+    Event-loop counterpart of ``SingleFlight`` for the async Gemini helpers (in-process only).
+    Calls are tracked per running loop, since a future can only be awaited on its own loop.
+    If the leader is cancelled (its client went away) the followers do not inherit the
+    cancellation: one of them runs ``fn`` again as the new leader.
+    """
+
+    def __init__(self):
+        self.executed = 0
+        self.shared = 0
+        self._calls: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        calls = self._calls.get(loop)
+        if calls is None:
+            calls = self._calls[loop] = {}
+
+        while True:
+            future = calls.get(key)
+            if future is None:
+                break
+            self.shared += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    # This follower was cancelled itself, not the leader.
+                    raise
+
+        future = loop.create_future()
+        calls[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception retrieved so it is not reported when no follower awaited it.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            self.executed += 1
+            return result
+        finally:
+            if calls.get(key) is future:
+                del calls[key]
+
+    def stats(self) -> Dict[str, int]:
+        inflight = sum(len(calls) for calls in list(self._calls.values()))
+        return {"executed": self.executed, "shared": self.shared, "inflight": inflight}
+
+
+_single_flight: SingleFlight | None = None
+_async_single_flight = AsyncSingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlight(
+            use_db_lease=getattr(settings, "AI_SINGLEFLIGHT_DB_LEASE", False),
+            lease_timeout=getattr(settings, "AI_SINGLEFLIGHT_LEASE_SECONDS", 60),
+        )
+    return _single_flight
+
+
+def get_async_single_flight() -> AsyncSingleFlight:
+    return _async_single_flight
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Iterator
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+from rest_framework.settings import api_settings
+
+_DONE = object()
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets DRF content negotiation accept ``Accept: text/event-stream`` on streaming views."""
+
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return sse_event(data, event="error").encode(self.charset)
+
+
+STREAMING_RENDERER_CLASSES = [*api_settings.DEFAULT_RENDERER_CLASSES, EventStreamRenderer]
+
+
+def wants_stream(request) -> bool:
+    """True when the client asked for Server-Sent Events (``Accept`` header or ``?stream=1``)."""
+    if "text/event-stream" in request.headers.get("Accept", ""):
+        return True
+    params = getattr(request, "query_params", request.GET)
+    return params.get("stream", "").lower() in {"1", "true", "yes", "on"}
+
+
+def sse_event(data: Any, event: str | None = None) -> str:
+    lines = []
+    if event:
+        lines.append(f"event: {event}")
+    payload = data if isinstance(data, str) else json.dumps(data, default=str)
+    lines.extend(f"data: {line}" for line in payload.splitlines() or [""])
+    return "\n".join(lines) + "\n\n"
+
+
+async def iterate_in_thread(iterator: Iterator[Any]) -> AsyncIterator[Any]:
+    """Items of a blocking iterator, each pulled in a worker thread so the event loop stays free."""
+    while True:
+        item = await sync_to_async(next, thread_sensitive=False)(iterator, _DONE)
+        if item is _DONE:
+            break
+        yield item
+
+
+def sse_response(request, events: Iterable[str] | AsyncIterable[str]) -> StreamingHttpResponse:
+    """
+    Wrap SSE-formatted strings in a streaming response. Under ASGI the body is an async
+    iterator so Django forwards each chunk as it is produced instead of buffering it.
+    Async views may pass an async iterator, which is used as is.
+    """
+    raw_request = getattr(request, "_request", request)
+    if isinstance(events, AsyncIterable):
+        content = events
+    elif isinstance(raw_request, ASGIRequest):
+        content = iterate_in_thread(iter(events))
+    else:
+        content = events
+    response = StreamingHttpResponse(content, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Count
+from django.utils import timezone
+
+from .ai import generate_trip_suggestions, generate_trip_suggestions_async
+from .models import SuggestionSet, Trip
+
+# (tier, upper bound in cents, representative budget in cents used when precomputing)
+BUDGET_TIERS = (
+    ("budget", 100_000, 75_000),
+    ("mid", 300_000, 200_000),
+    ("luxury", None, 500_000),
+)
+# (bucket, max days, representative duration used when precomputing)
+DURATION_BUCKETS = (
+    ("short", 3, 3),
+    ("week", 7, 7),
+    ("long", None, 14),
+)
+ANY = "any"
+
+
+class IndexKey(NamedTuple):
+    location_key: str
+    budget_tier: str
+    duration_bucket: str
+    interests_key: str
+
+
+def normalize_location(location: str) -> str:
+    return " ".join(location.lower().replace(",", " ").split())
+
+
+def budget_tier(budget_cents: int | None) -> str:
+    if not budget_cents:
+        return ANY
+    for tier, upper, _ in BUDGET_TIERS:
+        if upper is None or budget_cents < upper:
+            return tier
+    return ANY
+
+
+def duration_bucket(days: int | None) -> str:
+    if not days:
+        return ANY
+    for bucket, upper, _ in DURATION_BUCKETS:
+        if upper is None or days <= upper:
+            return bucket
+    return ANY
+
+
+def interests_key(interests: Iterable[str] | None) -> str:
+    return ",".join(sorted({i.strip().lower() for i in interests or [] if i.strip()}))[:255]
+
+
+def index_key(location: str, budget: int | None, duration: int | None, interests: List[str] | None) -> IndexKey:
+    return IndexKey(normalize_location(location), budget_tier(budget), duration_bucket(duration), interests_key(interests))
+
+
+def _representative(key: IndexKey) -> tuple[str, int | None, int | None, List[str] | None]:
+    """The generation arguments an entry is built from, so it fits every request in its bucket."""
+    budget = next((rep for tier, _, rep in BUDGET_TIERS if tier == key.budget_tier), None)
+    duration = next((rep for bucket, _, rep in DURATION_BUCKETS if bucket == key.duration_bucket), None)
+    interests = key.interests_key.split(",") if key.interests_key else None
+    return key.location_key, budget, duration, interests
+
+
+def _max_age() -> timedelta:
+    return timedelta(seconds=getattr(settings, "SUGGESTION_INDEX_MAX_AGE", 60 * 60 * 24 * 7))
+
+
+def _is_storable(payload: Dict[str, Any]) -> bool:
+    return bool(payload.get("suggestions")) and "error" not in payload
+
+
+def lookup(key: IndexKey) -> tuple[Dict[str, Any] | None, bool]:
+    """Return ``(payload, is_stale)`` from the index; one indexed query on the unique key."""
+    row = SuggestionSet.objects.filter(**key._asdict()).only("suggestions", "generated_at").first()
+    if row is None:
+        return None, False
+    return {"suggestions": row.suggestions}, row.generated_at < timezone.now() - _max_age()
+
+
+def store(key: IndexKey, payload: Dict[str, Any]) -> None:
+    if not _is_storable(payload):
+        return
+    SuggestionSet.objects.update_or_create(
+        **key._asdict(),
+        defaults={"suggestions": payload["suggestions"], "generated_at": timezone.now()},
+    )
+
+
+def build_entry(key: IndexKey) -> bool:
+    """Generate and persist suggestions for an index key using the key's representative budget/duration."""
+    payload = generate_trip_suggestions(*_representative(key))
+    store(key, payload)
+    return _is_storable(payload)
+
+
+_refresh_executor: ThreadPoolExecutor | None = None
+_refreshing: set[IndexKey] = set()
+_refresh_lock = threading.Lock()
+
+
+def _refresh(key: IndexKey) -> None:
+    try:
+        build_entry(key)
+    finally:
+        with _refresh_lock:
+            _refreshing.discard(key)
+        close_old_connections()
+
+
+def schedule_refresh(key: IndexKey) -> None:
+    """Refresh a stale entry in the background; at most one refresh per key at a time."""
+    global _refresh_executor
+    with _refresh_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+        if _refresh_executor is None:
+            _refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="suggestion-refresh")
+    _refresh_executor.submit(_refresh, key)
+
+
+def get_suggestions(location: str, budget: int | None = None, duration: int | None = None, interests: List[str] | None = None) -> Dict[str, Any]:
+    """Serve suggestions from the precomputed index, falling back to live generation on a miss."""
+    if not getattr(settings, "SUGGESTION_INDEX_ENABLED", True):
+        return generate_trip_suggestions(location, budget, duration, interests)
+
+    key = index_key(location, budget, duration, interests)
+    payload, stale = lookup(key)
+    if payload is not None:
+        if stale:
+            schedule_refresh(key)
+        return payload
+
+    # A miss is generated for the bucket, not the exact request, since it is stored for the bucket.
+    payload = generate_trip_suggestions(*_representative(key))
+    store(key, payload)
+    return payload
+
+
+async def get_suggestions_async(location: str, budget: int | None = None, duration: int | None = None, interests: List[str] | None = None) -> Dict[str, Any]:
+    if not getattr(settings, "SUGGESTION_INDEX_ENABLED", True):
+        return await generate_trip_suggestions_async(location, budget, duration, interests)
+
+    key = index_key(location, budget, duration, interests)
+    payload, stale = await sync_to_async(lookup)(key)
+    if payload is not None:
+        if stale:
+            schedule_refresh(key)
+        return payload
+
+    payload = await generate_trip_suggestions_async(*_representative(key))
+    await sync_to_async(store)(key, payload)
+    return payload
+
+
+def top_locations(limit: int) -> List[str]:
+    """Most planned trip destinations, used to seed the index."""
+    rows = (
+        Trip.objects.exclude(location="")
+        .values("location")
+        .annotate(n=Count("id"))
+        .order_by("-n")[: limit * 2]
+    )
+    seen: Dict[str, None] = {}
+    for row in rows:
+        seen.setdefault(normalize_location(row["location"]), None)
+    return list(seen)[:limit]
+
+
+def precompute_keys(
+    locations: Iterable[str],
+    stale_only: bool = False,
+    interest_sets: Iterable[Iterable[str]] = ((),),
+) -> List[IndexKey]:
+    """
+    Keys for every location x budget tier x duration bucket x interest set (by default only
+    "no interests"), plus the interest sets already indexed for those locations, so entries
+    first stored by live misses are refreshed too.
+    """
+    locations = [normalize_location(location) for location in locations]
+    indexed = SuggestionSet.objects.filter(location_key__in=locations).exclude(interests_key="")
+    per_location = {location: dict.fromkeys(interests_key(interests) for interests in interest_sets) for location in locations}
+    for location, key in indexed.values_list("location_key", "interests_key").distinct():
+        per_location[location].setdefault(key, None)
+    keys = [
+        IndexKey(location, tier, bucket, interests)
+        for location in locations
+        for interests in per_location[location]
+        for tier in [t for t, _, _ in BUDGET_TIERS]
+        for bucket in [b for b, _, _ in DURATION_BUCKETS]
+    ]
+    if not stale_only:
+        return keys
+    fresh_after = timezone.now() - _max_age()
+    fresh = set(
+        SuggestionSet.objects.filter(generated_at__gte=fresh_after, location_key__in=locations).values_list(
+            "location_key", "budget_tier", "duration_bucket", "interests_key"
+        )
+    )
+    return [key for key in keys if tuple(key) not in fresh]
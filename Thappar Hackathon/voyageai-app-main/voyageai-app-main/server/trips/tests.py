@@ -0,0 +1,746 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import io
+import threading
+import time
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from users.models import User
+
+from .ai import _generate_json, _generate_json_async, _get_semaphore, ai_chat_stream_async
+from .batch import run_batch
+from .suggestions import get_suggestions, index_key, precompute_keys, store
+from .cache import MemoryBackend, ResponseCache, get_response_cache, make_cache_key
+from .itinerary import assemble_itinerary, days_by_trip, generation_inputs, regenerate_itinerary, store_itinerary
+from .jobs import enqueue_generation, expire_stale_jobs, run_job
+from .jsonstream import extract_json, extract_json_checked
+from .models import GenerationJob, ItineraryDay, Trip
+from .serializers import TRIP_FIELDS, TRIP_LIST_FIELDS, TripSerializer, trip_rows_to_data, trip_values
+from .client import ModelRegistry
+from .streaming import sse_event, sse_response, wants_stream
+from .singleflight import AsyncSingleFlight, SingleFlight
+
+
+def make_trip(**fields) -> Trip:
+    owner = User.objects.create(email=f"{uuid.uuid4().hex}@example.com", name="Tester")
+    return Trip.objects.create(owner=owner, title="Goa Trip", location="Goa", **fields)
+
+
+@override_settings(GENERATION_JOB_LEASE_SECONDS=600)
+@mock.patch("trips.jobs.close_old_connections")
+class GenerationJobTests(TestCase):
+    def setUp(self):
+        self.trip = make_trip()
+
+    def test_identical_requests_coalesce(self, _close):
+        job, created = enqueue_generation(self.trip, {"mode": "full"})
+        again, created_again = enqueue_generation(self.trip, {"mode": "full"})
+        other, created_other = enqueue_generation(self.trip, {"mode": "auto"})
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(again.id, job.id)
+        self.assertTrue(created_other)
+        self.assertNotEqual(other.id, job.id)
+
+    def test_expired_running_job_is_failed_and_replaced(self, _close):
+        job, _ = enqueue_generation(self.trip)
+        GenerationJob.objects.filter(id=job.id).update(
+            status="running", started_at=timezone.now() - timedelta(seconds=601)
+        )
+        fresh, created = enqueue_generation(self.trip)
+        self.assertTrue(created)
+        self.assertNotEqual(fresh.id, job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.status, "failed")
+        self.assertIsNotNone(job.finished_at)
+
+    def test_expire_keeps_jobs_within_lease(self, _close):
+        job, _ = enqueue_generation(self.trip)
+        GenerationJob.objects.filter(id=job.id).update(status="running", started_at=timezone.now())
+        GenerationJob.objects.create(
+            trip=self.trip, params_hash="x", created_at=timezone.now() - timedelta(seconds=601)
+        )
+        self.assertEqual(expire_stale_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, "running")
+
+    @mock.patch("trips.jobs.regenerate_itinerary", return_value="full")
+    def test_job_is_claimed_once(self, regenerate, _close):
+        job, _ = enqueue_generation(self.trip)
+        self.assertTrue(run_job(job.id))
+        self.assertFalse(run_job(job.id))
+        regenerate.assert_called_once()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.strategy, job.progress), ("succeeded", "full", 100))
+
+    @mock.patch("trips.jobs.regenerate_itinerary", side_effect=ValueError("bad reply"))
+    def test_failure_is_recorded(self, _regenerate, _close):
+        job, _ = enqueue_generation(self.trip)
+        run_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), ("failed", "bad reply"))
+
+    def test_late_result_does_not_revive_expired_job(self, _close):
+        job, _ = enqueue_generation(self.trip)
+
+        def expire_meanwhile(*args, **kwargs):
+            GenerationJob.objects.filter(id=job.id).update(status="failed", error="expired")
+            return "full"
+
+        with mock.patch("trips.jobs.regenerate_itinerary", side_effect=expire_meanwhile):
+            run_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), ("failed", "expired"))
+
+
+    def test_generate_endpoints_reject_malformed_input(self, _close):
+        client = APIClient()
+        client.force_authenticate(self.trip.owner)
+        base = f"/api/trips/{self.trip.id}/generate"
+        self.assertEqual(client.post(base, [{"mode": "full"}], format="json").status_code, 400)
+        self.assertFalse(GenerationJob.objects.filter(trip=self.trip).exists())
+        self.assertEqual(client.get(f"{base}/status", {"job": "abc"}).status_code, 400)
+        self.assertEqual(client.get(f"{base}/status", {"job": str(uuid.uuid4())}).status_code, 404)
+
+    def test_worker_command_expires_stuck_jobs(self, _close):
+        job, _ = enqueue_generation(self.trip)
+        GenerationJob.objects.filter(id=job.id).update(
+            status="running", started_at=timezone.now() - timedelta(seconds=601)
+        )
+        call_command("process_generation_jobs", stdout=io.StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, "failed")
+
+class ExtractJsonTests(SimpleTestCase):
+    def test_fenced_and_prose_wrapped_values(self):
+        self.assertEqual(extract_json('Sure!\n```json\n{"a": [1, 2]}\n```\nEnjoy.'), {"a": [1, 2]})
+        self.assertEqual(extract_json('Here you go: [{"x": 1}] hope it helps'), [{"x": 1}])
+        self.assertEqual(extract_json('Use [optional] fields: {"ok": true}'), {"ok": True})
+
+    def test_complete_values_are_not_reported_as_repaired(self):
+        self.assertEqual(extract_json_checked('{"days": [{"day": 1}]}'), ({"days": [{"day": 1}]}, False))
+
+    def test_truncated_values_are_repaired_and_flagged(self):
+        self.assertEqual(extract_json_checked('[1, 2, {"x": tru'), ([1, 2, {}], True))
+        self.assertEqual(extract_json_checked('{"days": [{"day": 1}, {"day": 2, "theme": "Bea'), (
+            {"days": [{"day": 1}, {"day": 2, "theme": "Bea"}]},
+            True,
+        ))
+
+    def test_unparseable_reply_raises(self):
+        with self.assertRaises(ValueError):
+            extract_json("no json here")
+        with self.assertRaises(ValueError):
+            extract_json('[1, 2, {"x": tru', repair=False)
+
+
+class ResponseCacheTests(SimpleTestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        backend = MemoryBackend(max_entries=2)
+        backend.set("a", 1, 60)
+        backend.set("b", 2, 60)
+        backend.get("a")
+        backend.set("c", 3, 60)
+        self.assertEqual((backend.get("a"), backend.get("b"), backend.get("c")), (1, None, 3))
+        self.assertEqual(len(backend), 2)
+
+    def test_entries_expire_after_their_endpoint_ttl(self):
+        cache = ResponseCache(MemoryBackend(), ttls={"suggestions": 100, "packing_list": 0})
+        self.assertEqual((cache.ttl_for("recommendations"), cache.ttl_for("unknown")), (60 * 60 * 12, 60 * 60))
+        cache.set("suggestions", "s", ["Goa"])
+        cache.set("packing_list", "p", ["Socks"])
+        self.assertIsNone(cache.peek("p"))
+        now = time.monotonic()
+        with mock.patch("trips.cache.time.monotonic", return_value=now + 99):
+            self.assertEqual(cache.get("s"), ["Goa"])
+        with mock.patch("trips.cache.time.monotonic", return_value=now + 101):
+            self.assertIsNone(cache.get("s"))
+
+    def test_hits_and_misses_are_counted(self):
+        cache = ResponseCache(MemoryBackend())
+        cache.get("k")
+        cache.set("itinerary", "k", {"summary": "ok"})
+        cache.get("k")
+        cache.get("k")
+        cache.peek("k")
+        self.assertEqual(cache.stats(), {"backend": "MemoryBackend", "hits": 2, "misses": 1, "hitRate": 0.6667})
+        cache.clear()
+        self.assertEqual((cache.stats()["hits"], cache.get("k")), (0, None))
+
+    def test_disabled_cache_stores_nothing(self):
+        cache = ResponseCache(MemoryBackend(), enabled=False)
+        cache.set("itinerary", "k", {"summary": "ok"})
+        self.assertIsNone(cache.get("k"))
+        self.assertEqual(len(cache.backend), 0)
+
+    def test_keys_ignore_dict_order_but_not_content(self):
+        key = make_cache_key("itinerary", "m", {"a": 1, "b": 2}, {"temperature": 0.7})
+        self.assertEqual(key, make_cache_key("itinerary", "m", {"b": 2, "a": 1}, {"temperature": 0.7}))
+        self.assertNotEqual(key, make_cache_key("itinerary", "m", {"a": 1, "b": 3}, {"temperature": 0.7}))
+        self.assertNotEqual(key, make_cache_key("suggestions", "m", {"a": 1, "b": 2}, {"temperature": 0.7}))
+
+
+@mock.patch("trips.client.genai")
+class ModelRegistryTests(SimpleTestCase):
+    def setUp(self):
+        self.registry = ModelRegistry()
+        patcher = mock.patch.dict("os.environ", {"GEMINI_API_KEY": "key-1", "GEMINI_MODEL": "gemini-test"})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_models_are_built_once_per_name_and_config(self, genai):
+        genai.GenerativeModel.side_effect = lambda *args, **kwargs: mock.Mock()
+        model = self.registry.get()
+        self.assertIs(self.registry.get(), model)
+        self.assertIs(self.registry.get("gemini-test"), model)
+        configured = self.registry.get(generation_config={"temperature": 0.2})
+        self.assertIsNot(configured, model)
+        self.assertIs(self.registry.get(generation_config={"temperature": 0.2}), configured)
+        genai.configure.assert_called_once_with(api_key="key-1")
+        self.assertEqual(genai.GenerativeModel.call_count, 2)
+
+    def test_env_changes_reconfigure(self, genai):
+        genai.GenerativeModel.side_effect = lambda *args, **kwargs: mock.Mock()
+        model = self.registry.get()
+        with mock.patch.dict("os.environ", {"GEMINI_API_KEY": "key-2"}):
+            self.assertIsNot(self.registry.get(), model)
+            genai.configure.assert_called_with(api_key="key-2")
+        with mock.patch.dict("os.environ", {"GEMINI_MODEL": "gemini-other"}):
+            self.registry.get()
+            self.assertEqual(genai.GenerativeModel.call_args.args, ("gemini-other",))
+        self.assertEqual(genai.configure.call_count, 3)
+
+    def test_missing_key_or_sdk_error_gives_no_model(self, genai):
+        with mock.patch.dict("os.environ", {"GEMINI_API_KEY": ""}):
+            self.assertIsNone(self.registry.get())
+        genai.GenerativeModel.side_effect = ValueError("bad model")
+        self.assertIsNone(self.registry.get())
+
+    def test_installed_factory_replaces_the_sdk(self, genai):
+        factory = mock.Mock(side_effect=lambda name, config: (name, config))
+        self.registry.install_factory(factory)
+        self.assertEqual(self.registry.get(generation_config={"t": 1}), ("gemini-test", {"t": 1}))
+        self.registry.get(generation_config={"t": 1})
+        factory.assert_called_once()
+        genai.configure.assert_not_called()
+        self.registry.install_factory(None)
+        self.assertIsNot(self.registry.get(), ("gemini-test", None))
+        genai.configure.assert_called_once()
+
+
+class StreamingTests(SimpleTestCase):
+    def test_events_are_framed_line_by_line(self):
+        self.assertEqual(sse_event({"day": 1}, event="day"), 'event: day\ndata: {"day": 1}\n\n')
+        self.assertEqual(sse_event("first\nsecond"), "data: first\ndata: second\n\n")
+        self.assertEqual(sse_event(""), "data: \n\n")
+
+    def test_stream_is_requested_by_header_or_query(self):
+        factory = RequestFactory()
+        self.assertTrue(wants_stream(factory.get("/", HTTP_ACCEPT="text/event-stream")))
+        self.assertTrue(wants_stream(factory.get("/", {"stream": "true"})))
+        self.assertFalse(wants_stream(factory.get("/", HTTP_ACCEPT="application/json")))
+
+    def test_wsgi_response_streams_the_events(self):
+        response = sse_response(RequestFactory().get("/"), iter(["data: a\n\n", "data: b\n\n"]))
+        self.assertEqual((response["Content-Type"], response["Cache-Control"], response["X-Accel-Buffering"]), (
+            "text/event-stream",
+            "no-cache",
+            "no",
+        ))
+        self.assertEqual(b"".join(response.streaming_content), b"data: a\n\ndata: b\n\n")
+
+    def test_asgi_response_pulls_events_off_the_event_loop(self):
+        threads = []
+
+        def events():
+            for chunk in ("data: a\n\n", "data: b\n\n"):
+                threads.append(threading.get_ident())
+                yield chunk
+
+        scope = {"type": "http", "method": "GET", "path": "/", "headers": [], "query_string": b""}
+        response = sse_response(ASGIRequest(scope, io.BytesIO()), events())
+        self.assertTrue(response.is_async)
+
+        async def consume():
+            return [chunk async for chunk in response.streaming_content], threading.get_ident()
+
+        chunks, loop_thread = asyncio.run(consume())
+        self.assertEqual(b"".join(chunks), b"data: a\n\ndata: b\n\n")
+        self.assertNotIn(loop_thread, threads)
+
+
+class FakeModel:
+    model_name = "fake-model"
+
+    def __init__(self, text: str):
+        self.text = text
+        self.calls = 0
+
+    def generate_content(self, prompt, generation_config=None):
+        self.calls += 1
+        return mock.Mock(text=self.text)
+
+
+class GenerateJsonCacheTests(SimpleTestCase):
+    def test_complete_reply_is_cached(self):
+        prompt = f"complete {uuid.uuid4()}"
+        model = FakeModel('{"summary": "ok"}')
+        self.assertEqual(_generate_json("itinerary", model, prompt), {"summary": "ok"})
+        self.assertEqual(_generate_json("itinerary", model, prompt), {"summary": "ok"})
+        self.assertEqual(model.calls, 1)
+
+    def test_truncated_reply_is_returned_but_not_cached(self):
+        prompt = f"truncated {uuid.uuid4()}"
+        model = FakeModel('{"summary": "ok", "days": [{"day": 1}, {"da')
+        self.assertEqual(_generate_json("itinerary", model, prompt), {"summary": "ok", "days": [{"day": 1}, {}]})
+        self.assertIsNone(get_response_cache().get(make_cache_key("itinerary", "fake-model", prompt, None)))
+        _generate_json("itinerary", model, prompt)
+        self.assertEqual(model.calls, 2)
+
+
+class MoveItineraryDaysMigrationTests(TransactionTestCase):
+    before = [("trips", "0007_itineraryday_activity")]
+    after = [("trips", "0008_move_itinerary_days")]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_days_move_to_rows_and_back(self):
+        apps = self.migrate(self.before)
+        owner = apps.get_model("users", "User").objects.create(email="m@example.com", username="m@example.com", name="M")
+        itinerary = {
+            "summary": "Beach week",
+            "days": [
+                {"day": 1, "theme": "Arrival", "activities": [{"time": "09:00", "activity": "Check in", "tip": "Early"}, "Walk"]},
+                {"day": 2, "activities": []},
+            ],
+        }
+        trip = apps.get_model("trips", "Trip").objects.create(owner=owner, title="Goa", itinerary=itinerary)
+
+        apps = self.migrate(self.after)
+        stored = apps.get_model("trips", "Trip").objects.get(pk=trip.pk)
+        self.assertEqual(stored.itinerary, {"summary": "Beach week"})
+        days = apps.get_model("trips", "ItineraryDay").objects.filter(trip_id=trip.pk).order_by("number")
+        self.assertEqual([(day.number, day.theme) for day in days], [(1, "Arrival"), (2, "")])
+        activities = apps.get_model("trips", "Activity").objects.filter(day=days[0]).order_by("position")
+        self.assertEqual([(a.activity, a.details, a.text_only) for a in activities], [("Check in", {"tip": "Early"}, False), ("Walk", None, True)])
+
+        apps = self.migrate(self.before)
+        restored = apps.get_model("trips", "Trip").objects.get(pk=trip.pk).itinerary
+        self.assertEqual(restored["days"][0], {"day": 1, "theme": "Arrival", "activities": [{"time": "09:00", "activity": "Check in", "tip": "Early"}, "Walk"]})
+        self.assertEqual(restored["days"][1], {"day": 2, "activities": []})
+
+
+class RunBatchTests(TestCase):
+    def test_invalid_operations_get_per_item_errors(self):
+        trip = make_trip()
+        results = run_batch(
+            [
+                {"tripId": str(trip.id), "operation": ["recommendations"]},
+                {"tripId": str(trip.id), "operation": {"name": "packing_list"}},
+                {"tripId": str(trip.id), "operation": "teleport"},
+                {"tripId": "not-a-uuid", "operation": "budget_analysis"},
+            ]
+        )
+        self.assertEqual([result["error"][:7] for result in results], ["Unknown", "Unknown", "Unknown", "Trip no"])
+
+    def test_identical_items_run_once_in_request_order(self):
+        trip = make_trip()
+        calls = []
+
+        def analyze(trip, params):
+            calls.append(params)
+            return {"total": len(calls)}
+
+        with mock.patch.dict("trips.batch.OPERATIONS", {"budget_analysis": ("analysis", analyze)}):
+            results = run_batch(
+                [
+                    {"tripId": str(trip.id), "operation": "budget_analysis"},
+                    {"tripId": str(trip.id), "operation": "budget_analysis"},
+                ]
+            )
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([result["analysis"] for result in results], [{"total": 1}, {"total": 1}])
+
+
+@override_settings(SUGGESTION_INDEX_ENABLED=True)
+class SuggestionIndexTests(TestCase):
+    @mock.patch("trips.suggestions.generate_trip_suggestions", return_value={"suggestions": [{"name": "Fort"}]})
+    def test_miss_is_generated_for_the_bucket(self, generate):
+        # 1800 USD over 5 days falls in the "mid" tier and "week" bucket (200000 cents, 7 days).
+        get_suggestions("Jaipur, India", 180_000, 5, ["Food"])
+        generate.assert_called_once_with("jaipur india", 200_000, 7, ["food"])
+        self.assertEqual(get_suggestions("jaipur india", 250_000, 6, ["food"]), {"suggestions": [{"name": "Fort"}]})
+        generate.assert_called_once()
+
+    def test_precompute_includes_requested_and_indexed_interest_sets(self):
+        store(index_key("Goa", 75_000, 3, ["beach"]), {"suggestions": [{"name": "Baga"}]})
+        keys = precompute_keys(["Goa"], interest_sets=[(), ("Food", "culture")])
+        self.assertEqual({key.interests_key for key in keys}, {"", "culture,food", "beach"})
+        self.assertEqual(len(keys), 3 * 3 * 3)
+        stale = precompute_keys(["Goa"], stale_only=True, interest_sets=[()])
+        self.assertNotIn(index_key("Goa", 75_000, 3, ["beach"]), stale)
+        self.assertEqual(len(stale), 2 * 3 * 3 - 1)
+
+
+class GeminiSemaphoreTests(SimpleTestCase):
+    def test_each_event_loop_gets_its_own_semaphore(self):
+        async def semaphore():
+            return _get_semaphore()
+
+        async def same_loop():
+            return await semaphore() is await semaphore()
+
+        self.assertTrue(asyncio.run(same_loop()))
+        self.assertIsNot(asyncio.run(semaphore()), asyncio.run(semaphore()))
+
+    @override_settings(GEMINI_MAX_CONCURRENCY=2)
+    def test_calls_are_capped_on_every_loop(self):
+        class SlowModel:
+            model_name = "slow-model"
+            active = peak = 0
+
+            async def generate_content_async(self, prompt):
+                SlowModel.active += 1
+                SlowModel.peak = max(SlowModel.peak, SlowModel.active)
+                await asyncio.sleep(0.01)
+                SlowModel.active -= 1
+                return mock.Mock(text="[1]")
+
+        async def burst():
+            model = SlowModel()
+            await asyncio.gather(*(_generate_json_async("suggestions", model, f"cap {uuid.uuid4()}") for _ in range(6)))
+
+        for _ in range(2):
+            SlowModel.peak = 0
+            asyncio.run(burst())
+            self.assertEqual(SlowModel.peak, 2)
+
+
+    @override_settings(GEMINI_MAX_CONCURRENCY=2)
+    def test_chat_streams_hold_a_slot_until_they_finish(self):
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        class StreamingModel:
+            def generate_content(self, contents, generation_config=None, stream=False):
+                with lock:
+                    state["active"] += 1
+                    state["peak"] = max(state["peak"], state["active"])
+                try:
+                    for word in ("Hello", " there"):
+                        time.sleep(0.01)
+                        yield mock.Mock(text=word)
+                finally:
+                    with lock:
+                        state["active"] -= 1
+
+        async def chat():
+            return "".join([text async for text in ai_chat_stream_async("Hi")])
+
+        async def burst():
+            return await asyncio.gather(*(chat() for _ in range(5)))
+
+        with mock.patch("trips.ai._get_model", return_value=StreamingModel()):
+            self.assertEqual(asyncio.run(burst()), ["Hello there"] * 5)
+        self.assertEqual(state["peak"], 2)
+
+class SingleFlightTests(SimpleTestCase):
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "plan"
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do("k", fn)))
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=lambda: results.append(flight.do("k", fn))) for _ in range(3)]
+        for thread in followers:
+            thread.start()
+        while flight.stats()["shared"] < 3:
+            threading.Event().wait(0.001)
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+        self.assertEqual((results, len(calls)), (["plan"] * 4, 1))
+        self.assertEqual(flight.stats(), {"executed": 1, "shared": 3, "inflight": 0})
+
+    def test_errors_reach_every_waiter_and_are_not_remembered(self):
+        flight = SingleFlight()
+        with self.assertRaises(ValueError):
+            flight.do("k", mock.Mock(side_effect=ValueError("upstream")))
+        self.assertEqual(flight.do("k", lambda: "retried"), "retried")
+
+
+class AsyncSingleFlightTests(SimpleTestCase):
+    def test_concurrent_calls_share_one_execution(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "plan"
+
+        async def burst():
+            return await asyncio.gather(*(flight.do("k", fn) for _ in range(4)))
+
+        self.assertEqual(asyncio.run(burst()), ["plan"] * 4)
+        self.assertEqual((len(calls), flight.stats()), (1, {"executed": 1, "shared": 3, "inflight": 0}))
+
+    def test_cancelled_leader_hands_the_call_to_a_follower(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            await asyncio.sleep(0.05 if len(calls) == 1 else 0)
+            return "plan"
+
+        async def scenario():
+            leader = asyncio.create_task(flight.do("k", fn))
+            await asyncio.sleep(0)
+            followers = [asyncio.create_task(flight.do("k", fn)) for _ in range(2)]
+            await asyncio.sleep(0)
+            leader.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await leader
+            return await asyncio.gather(*followers)
+
+        self.assertEqual(asyncio.run(scenario()), ["plan", "plan"])
+        self.assertEqual(len(calls), 2)
+
+    def test_cancelled_follower_does_not_affect_the_leader(self):
+        flight = AsyncSingleFlight()
+
+        async def fn():
+            await asyncio.sleep(0.01)
+            return "plan"
+
+        async def scenario():
+            leader = asyncio.create_task(flight.do("k", fn))
+            await asyncio.sleep(0)
+            follower = asyncio.create_task(flight.do("k", fn))
+            await asyncio.sleep(0)
+            follower.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await follower
+            return await leader
+
+        self.assertEqual(asyncio.run(scenario()), "plan")
+
+    def test_each_event_loop_tracks_its_own_calls(self):
+        flight = AsyncSingleFlight()
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        release = asyncio.Event()
+
+        async def slow():
+            await release.wait()
+            return "first loop"
+
+        async def quick():
+            return "second loop"
+
+        first = loop.create_task(flight.do("k", slow))
+        loop.run_until_complete(asyncio.sleep(0))
+        # Another loop (another thread or test run) starts the same call meanwhile.
+        result = []
+        worker = threading.Thread(target=lambda: result.append(asyncio.run(flight.do("k", quick))))
+        worker.start()
+        worker.join(5)
+        self.assertEqual(result, ["second loop"])
+        release.set()
+        self.assertEqual(loop.run_until_complete(first), "first loop")
+
+
+class ItineraryDayViewTests(TestCase):
+    ITINERARY = {
+        "summary": "Beaches",
+        "days": [
+            {"day": 1, "theme": "Arrive", "activities": ["Check in", {"time": "18:00", "activity": "Dinner", "tip": "Book"}]},
+            {"day": 2, "theme": "North Goa", "activities": ["Fort Aguada"]},
+        ],
+    }
+
+    def setUp(self):
+        self.trip = make_trip(itinerary=self.ITINERARY)
+        self.client = APIClient()
+        self.client.force_authenticate(self.trip.owner)
+
+    def url(self, number: int, suffix: str = "") -> str:
+        return f"/api/trips/{self.trip.id}/days/{number}{suffix}"
+
+    def test_get_reads_an_embedded_itinerary_without_writing(self):
+        reply = self.client.get(self.url(1))
+        self.assertEqual(reply.status_code, 200)
+        self.assertEqual(reply.json()["day"], self.ITINERARY["days"][0])
+        self.assertEqual(self.client.get(self.url(3)).status_code, 404)
+        self.assertFalse(ItineraryDay.objects.filter(trip=self.trip).exists())
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.itinerary, self.ITINERARY)
+
+    def test_patch_normalizes_and_updates_one_day(self):
+        reply = self.client.patch(self.url(2), {"theme": "Forts", "activities": ["Chapora Fort"]}, format="json")
+        self.assertEqual(reply.json()["day"], {"day": 2, "theme": "Forts", "activities": ["Chapora Fort"]})
+        self.assertEqual(self.client.get(self.url(1)).json()["day"], self.ITINERARY["days"][0])
+        self.assertEqual(ItineraryDay.objects.filter(trip=self.trip).count(), 2)
+        self.assertEqual(self.client.patch(self.url(1), {"activities": "none"}, format="json").status_code, 400)
+        self.assertEqual(self.client.patch(self.url(1), ["x"], format="json").status_code, 400)
+
+    def test_only_the_owner_can_change_a_day(self):
+        self.client.force_authenticate(User.objects.create(email=f"{uuid.uuid4().hex}@example.com", name="Other"))
+        self.assertEqual(self.client.get(self.url(1)).status_code, 200)
+        self.assertEqual(self.client.patch(self.url(1), {"theme": "Mine"}, format="json").status_code, 404)
+        self.assertEqual(self.client.post(self.url(1, "/regenerate"), {}, format="json").status_code, 404)
+
+    def test_regenerate_replaces_only_that_day(self):
+        new_day = {"day": 2, "theme": "South Goa", "activities": ["Palolem"]}
+        with mock.patch("trips.itinerary.generate_itinerary_day", return_value=new_day) as generate:
+            reply = self.client.post(self.url(2, "/regenerate"), {}, format="json")
+        self.assertEqual(reply.json()["day"], new_day)
+        self.assertEqual(generate.call_args.args[3], [self.ITINERARY["days"][0]])
+        self.assertEqual(self.client.get(self.url(1)).json()["day"], self.ITINERARY["days"][0])
+        with mock.patch("trips.itinerary.generate_itinerary_day", return_value=None):
+            self.assertEqual(self.client.post(self.url(2, "/regenerate"), {}, format="json").status_code, 503)
+        self.assertEqual(self.client.get(self.url(2)).json()["day"], new_day)
+
+
+@mock.patch("trips.itinerary.generate_itinerary", return_value={"summary": "New", "days": [{"day": 1, "activities": ["Fresh"]}]})
+class RegenerateItineraryTests(TestCase):
+    def setUp(self):
+        self.trip = make_trip(budget_cents=50000)
+        itinerary = {"summary": "Old", "days": [{"day": 1, "activities": ["Beach"]}, {"day": 2, "activities": ["Fort"]}]}
+        store_itinerary(self.trip, itinerary, generation_inputs(self.trip, {"interests": ["food"]}))
+
+    def days(self):
+        return [day["activities"] for day in assemble_itinerary(Trip.objects.get(pk=self.trip.pk))["days"]]
+
+    def update(self, result):
+        return mock.patch("trips.itinerary.generate_itinerary_update", return_value=result)
+
+    def test_changed_preferences_patch_only_the_returned_days(self, generate):
+        result = {"days": [{"day": "2", "activities": ["Spice farm"]}], "sections": {"budget_tips": ["Eat local"]}}
+        with self.update(result) as update:
+            self.assertEqual(regenerate_itinerary(self.trip, {"interests": ["nature", "food"]}), "incremental")
+        self.assertEqual(update.call_args.args[2], {"interests": {"from": ["food"], "to": ["food", "nature"]}})
+        generate.assert_not_called()
+        self.assertEqual(self.days(), [["Beach"], ["Spice farm"]])
+        self.trip.refresh_from_db()
+        self.assertEqual((self.trip.itinerary["budget_tips"], self.trip.generated_with["interests"]), (["Eat local"], ["food", "nature"]))
+
+    def test_update_matching_no_day_regenerates_everything(self, generate):
+        with self.update({"days": [{"day": 9, "activities": ["Nowhere"]}]}):
+            self.assertEqual(regenerate_itinerary(self.trip, {"interests": ["nature"]}), "full")
+        self.assertEqual(self.days(), [["Fresh"]])
+
+    def test_unchanged_inputs_reroll_unless_incremental(self, generate):
+        with self.update(None) as update:
+            self.assertEqual(regenerate_itinerary(self.trip, {"interests": ["food"]}, mode="incremental"), "unchanged")
+            generate.assert_not_called()
+            self.assertEqual(regenerate_itinerary(self.trip, {"interests": ["food"]}), "full")
+        update.assert_not_called()
+        generate.assert_called_once()
+
+    def test_new_dates_regenerate_everything(self, generate):
+        self.trip.start_date = timezone.now().date()
+        with self.update(None) as update:
+            self.assertEqual(regenerate_itinerary(self.trip, {"interests": ["food"]}), "full")
+        update.assert_not_called()
+
+
+class DiscoverPaginationTests(TestCase):
+    def setUp(self):
+        first = make_trip()
+        self.owner = first.owner
+        base = timezone.now()
+        # Two pairs share a timestamp, so the id tie-break decides their order.
+        stamps = [base - timedelta(minutes=minutes) for minutes in (0, 0, 1, 2, 2, 3)]
+        Trip.objects.filter(id=first.id).update(created_at=base - timedelta(minutes=4))
+        for n, created_at in enumerate(stamps):
+            Trip.objects.create(owner=self.owner, title=f"Trip {n}", location="Goa", created_at=created_at)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def walk(self, limit: int, between_pages=None) -> list:
+        ids, cursor = [], None
+        while True:
+            params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+            page = self.client.get("/api/trips/discover", params).json()
+            ids += [item["id"] for item in page["items"]]
+            cursor = page["nextCursor"]
+            if cursor is None:
+                return ids
+            if between_pages:
+                between_pages()
+
+    def test_pages_cover_every_trip_once_newest_first(self):
+        expected = [str(pk) for pk in Trip.objects.order_by("-created_at", "-id").values_list("id", flat=True)]
+        self.assertEqual(self.walk(3), expected)
+        self.assertEqual(self.walk(100), expected)
+
+    def test_new_trips_do_not_shift_later_pages(self):
+        expected = [str(pk) for pk in Trip.objects.order_by("-created_at", "-id").values_list("id", flat=True)]
+        self.assertEqual(self.walk(2, lambda: Trip.objects.create(owner=self.owner, title="New", location="Goa")), expected)
+
+    def test_each_page_is_one_query(self):
+        cursor = self.client.get("/api/trips/discover", {"limit": 2}).json()["nextCursor"]
+        with self.assertNumQueries(1):
+            self.client.get("/api/trips/discover", {"limit": 2, "cursor": cursor})
+
+    def test_invalid_cursor_is_a_bad_request(self):
+        self.assertEqual(self.client.get("/api/trips/discover", {"cursor": "bm9wZQ"}).status_code, 400)
+
+
+class TripValuesTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create(email=f"{uuid.uuid4().hex}@example.com", name="Tester", bio="Hi", preferences={"pace": "slow"})
+        itinerary = {"summary": "Beaches", "days": [{"day": 1, "theme": "Arrive", "activities": ["Check in", {"activity": "Dinner"}]}]}
+        normalized = Trip.objects.create(
+            owner=owner,
+            title="Goa",
+            location="Goa",
+            start_date=timezone.now().date(),
+            budget_cents=50000,
+            accessibility={"wheelchair": True},
+        )
+        store_itinerary(normalized, itinerary)
+        Trip.objects.create(owner=owner, title="Embedded", location="Rome", itinerary=itinerary)
+        Trip.objects.create(owner=owner, title="Bare", location="")
+
+    def test_fast_path_matches_trip_serializer(self):
+        trips = Trip.objects.order_by("-created_at", "-id")
+        for fields in (TRIP_FIELDS, TRIP_LIST_FIELDS, ("id", "startDate", "owner")):
+            with self.subTest(fields=fields):
+                request = Request(APIRequestFactory().get("/", {"fields": ",".join(fields)}))
+                expected = TripSerializer(trips, many=True, context={"request": request}).data
+                rows = list(trip_values(trips, fields))
+                days = days_by_trip([row["id"] for row in rows])
+                self.assertEqual(json.loads(json.dumps(trip_rows_to_data(rows, fields, days))), json.loads(json.dumps(expected)))
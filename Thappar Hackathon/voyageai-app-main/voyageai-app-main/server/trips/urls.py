@@ -1,25 +1,56 @@
+from django.conf import settings
 from django.urls import path
 
+from .async_views import (
+    AsyncAITravelChatView,
+    AsyncTripBudgetAnalysisView,
+    AsyncTripPackingListView,
+    AsyncTripRecommendationsView,
+    AsyncTripSuggestionsView,
+)
 from .views import (
+    AIBatchView,
+    AICacheStatsView,
     AITravelChatView,
     TripBudgetAnalysisView,
     TripCarpoolListCreateView,
     TripDetailView,
     TripDiscoverView,
+    TripGenerateStatusView,
+    TripGenerateStreamView,
     TripGenerateView,
+    TripItineraryDayRegenerateView,
+    TripItineraryDayView,
     TripListCreateView,
     TripPackingListView,
     TripRecommendationsView,
     TripSuggestionsView,
 )
 
+if settings.ASYNC_AI_VIEWS:
+    TripRecommendationsView = AsyncTripRecommendationsView  # noqa: F811
+    TripPackingListView = AsyncTripPackingListView  # noqa: F811
+    TripBudgetAnalysisView = AsyncTripBudgetAnalysisView  # noqa: F811
+    TripSuggestionsView = AsyncTripSuggestionsView  # noqa: F811
+    AITravelChatView = AsyncAITravelChatView  # noqa: F811
+
 urlpatterns = [
     path("", TripListCreateView.as_view(), name="trip-create"),
     path("discover", TripDiscoverView.as_view(), name="trip-discover"),
     path("suggestions", TripSuggestionsView.as_view(), name="trip-suggestions"),
     path("chat", AITravelChatView.as_view(), name="ai-chat"),
+    path("ai/batch", AIBatchView.as_view(), name="ai-batch"),
+    path("ai/cache", AICacheStatsView.as_view(), name="ai-cache"),
     path("<uuid:trip_id>", TripDetailView.as_view(), name="trip-detail"),
     path("<uuid:trip_id>/generate", TripGenerateView.as_view(), name="trip-generate"),
+    path("<uuid:trip_id>/generate/status", TripGenerateStatusView.as_view(), name="trip-generate-status"),
+    path("<uuid:trip_id>/generate/stream", TripGenerateStreamView.as_view(), name="trip-generate-stream"),
+    path("<uuid:trip_id>/days/<int:number>", TripItineraryDayView.as_view(), name="trip-itinerary-day"),
+    path(
+        "<uuid:trip_id>/days/<int:number>/regenerate",
+        TripItineraryDayRegenerateView.as_view(),
+        name="trip-itinerary-day-regenerate",
+    ),
     path("<uuid:trip_id>/recommendations", TripRecommendationsView.as_view(), name="trip-recommendations"),
     path("<uuid:trip_id>/packing-list", TripPackingListView.as_view(), name="trip-packing-list"),
     path("<uuid:trip_id>/budget-analysis", TripBudgetAnalysisView.as_view(), name="trip-budget-analysis"),
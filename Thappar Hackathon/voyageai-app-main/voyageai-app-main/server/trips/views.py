@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import uuid
 from datetime import datetime
 
+from django.conf import settings
+from django.db import close_old_connections
 from django.shortcuts import get_object_or_404
 from rest_framework import permissions, status
 from rest_framework.response import Response
@@ -9,14 +12,40 @@ from rest_framework.views import APIView
 
 from .ai import (
     ai_chat,
+    ai_chat_stream,
     analyze_trip_budget,
     generate_ai_recommendations,
-    generate_itinerary,
+    generate_itinerary_stream,
     generate_packing_list,
-    generate_trip_suggestions,
 )
-from .models import Carpool, Trip
-from .serializers import CarpoolSerializer, TripCreateSerializer, TripSerializer
+from .batch import run_batch
+from .cache import get_response_cache
+from .itinerary import (
+    day_to_dict,
+    days_by_trip,
+    generation_inputs,
+    get_day,
+    regenerate_day,
+    store_itinerary,
+    update_day,
+)
+from .jobs import enqueue_generation
+from .models import Carpool, GenerationJob, ItineraryDay, Trip
+from .pagination import InvalidCursor, keyset_page, page_size
+from .serializers import (
+    TRIP_FIELDS,
+    TRIP_LIST_FIELDS,
+    CarpoolSerializer,
+    GenerationJobSerializer,
+    TripCreateSerializer,
+    TripSerializer,
+    requested_fields,
+    trip_rows_to_data,
+    trip_values,
+)
+from .singleflight import get_async_single_flight, get_single_flight
+from .streaming import STREAMING_RENDERER_CLASSES, sse_event, sse_response, wants_stream
+from .suggestions import get_suggestions
 
 
 class TripListCreateView(APIView):
@@ -34,7 +63,11 @@ class TripDetailView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, trip_id: str):
-        trip = get_object_or_404(Trip, id=trip_id)
+        fields = requested_fields(request, TRIP_FIELDS)
+        trips = Trip.objects.select_related("owner").defer(*(f for f in ("itinerary", "accessibility") if f not in fields))
+        if "itinerary" in fields:
+            trips = trips.prefetch_related("itinerary_days__activities")
+        trip = get_object_or_404(trips, id=trip_id)
         return Response({"trip": TripSerializer(trip, context={"request": request}).data})
 
 
@@ -43,19 +76,114 @@ class TripGenerateView(APIView):
 
     def post(self, request, trip_id: str):
         trip = get_object_or_404(Trip, id=trip_id, owner=request.user)
-        itinerary = generate_itinerary(trip, extra_context=request.data or {})
-        trip.itinerary = itinerary
-        trip.save(update_fields=["itinerary", "updated_at"])
-        return Response({"trip": TripSerializer(trip, context={"request": request}).data})
+        if not isinstance(request.data, dict):
+            return Response({"error": "Expected a JSON object"}, status=status.HTTP_400_BAD_REQUEST)
+        job, created = enqueue_generation(trip, request.data)
+        return Response(
+            {"job": GenerationJobSerializer(job).data, "coalesced": not created},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class TripGenerateStatusView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, trip_id: str):
+        trip = get_object_or_404(Trip, id=trip_id, owner=request.user)
+        jobs = GenerationJob.objects.filter(trip=trip)
+        job_id = request.query_params.get("job")
+        if job_id:
+            try:
+                jobs = jobs.filter(id=uuid.UUID(job_id))
+            except ValueError:
+                return Response({"error": "Invalid job id"}, status=status.HTTP_400_BAD_REQUEST)
+        job = jobs.order_by("-created_at").first()
+        if job is None:
+            return Response({"error": "No generation job found"}, status=status.HTTP_404_NOT_FOUND)
+        payload = {"job": GenerationJobSerializer(job).data}
+        if job.status == "succeeded":
+            trip.refresh_from_db()
+            payload["trip"] = TripSerializer(trip, context={"request": request}).data
+        return Response(payload)
+
+
+class TripGenerateStreamView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = STREAMING_RENDERER_CLASSES
+
+    def post(self, request, trip_id: str):
+        trip = get_object_or_404(Trip, id=trip_id, owner=request.user)
+        extra_context = request.data or {}
+
+        def events():
+            for event in generate_itinerary_stream(trip, extra_context):
+                kind = event["type"]
+                if kind == "itinerary":
+                    store_itinerary(trip, event["itinerary"], generation_inputs(trip, extra_context))
+                    close_old_connections()
+                yield sse_event(event[kind], event=kind)
+            yield sse_event({"tripId": str(trip.id)}, event="done")
+
+        return sse_response(request, events())
+
+
+class TripItineraryDayView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, trip_id: str, number: int):
+        # Readable like the trip itself (TripDetailView); only the owner may change it.
+        trip = get_object_or_404(Trip, id=trip_id)
+        try:
+            day = get_day(trip, number)
+        except ItineraryDay.DoesNotExist:
+            return Response({"error": f"Day {number} not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"day": day})
+
+    def patch(self, request, trip_id: str, number: int):
+        trip = get_object_or_404(Trip, id=trip_id, owner=request.user)
+        if not isinstance(request.data, dict):
+            return Response({"error": "Expected a JSON object"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            day = update_day(trip, number, request.data)
+        except ItineraryDay.DoesNotExist:
+            return Response({"error": f"Day {number} not found"}, status=status.HTTP_404_NOT_FOUND)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"day": day_to_dict(day)})
+
+
+class TripItineraryDayRegenerateView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, trip_id: str, number: int):
+        trip = get_object_or_404(Trip, id=trip_id, owner=request.user)
+        if not isinstance(request.data, dict):
+            return Response({"error": "Expected a JSON object"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            day = regenerate_day(trip, number, request.data)
+        except ItineraryDay.DoesNotExist:
+            return Response({"error": f"Day {number} not found"}, status=status.HTTP_404_NOT_FOUND)
+        if day is None:
+            return Response({"error": "Could not regenerate this day"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response({"day": day_to_dict(day)})
 
 
 class TripDiscoverView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        items = Trip.objects.order_by("-created_at")[:20]
-        data = TripSerializer(items, many=True, context={"request": request}).data
-        return Response({"items": data})
+        # Slim fields by default; ?fields= may still ask for any TripSerializer field.
+        if request.query_params.get("fields"):
+            fields = requested_fields(request, TRIP_FIELDS)
+        else:
+            fields = requested_fields(request, TRIP_LIST_FIELDS)
+        trips = trip_values(Trip.objects.all(), fields)
+        try:
+            rows, next_cursor = keyset_page(trips, request.query_params.get("cursor"), page_size(request.query_params.get("limit")))
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        days = days_by_trip([row["id"] for row in rows]) if "itinerary" in fields else None
+        return Response({"items": trip_rows_to_data(rows, fields, days), "nextCursor": next_cursor})
 
 
 class TripRecommendationsView(APIView):
@@ -105,12 +233,13 @@ class TripSuggestionsView(APIView):
         # Parse interests from comma-separated string
         interests = [i.strip() for i in interests_str.split(",") if i.strip()] if interests_str else None
 
-        suggestions = generate_trip_suggestions(location, budget_int, duration_int, interests)
+        suggestions = get_suggestions(location, budget_int, duration_int, interests)
         return Response({"tripSuggestions": suggestions})
 
 
 class AITravelChatView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = STREAMING_RENDERER_CLASSES
 
     def post(self, request):
         message = request.data.get("message", "")
@@ -133,10 +262,50 @@ class AITravelChatView(APIView):
             except Trip.DoesNotExist:
                 pass
 
+        if wants_stream(request):
+            def events():
+                for text in ai_chat_stream(message, chat_context):
+                    yield sse_event({"text": text}, event="chunk")
+                yield sse_event({}, event="done")
+
+            return sse_response(request, events())
+
         response_text = ai_chat(message, chat_context)
         return Response({"response": response_text})
 
 
+class AIBatchView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        items = request.data.get("operations")
+        if not isinstance(items, list) or not items:
+            return Response({"error": "operations must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+        max_items = settings.AI_BATCH_MAX_OPERATIONS
+        if len(items) > max_items:
+            return Response({"error": f"At most {max_items} operations per batch"}, status=status.HTTP_400_BAD_REQUEST)
+        if not all(isinstance(item, dict) for item in items):
+            return Response({"error": "each operation must be an object"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"results": run_batch(items)})
+
+
+class AICacheStatsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(
+            {
+                "cache": get_response_cache().stats(),
+                "singleFlight": get_single_flight().stats(),
+                "asyncSingleFlight": get_async_single_flight().stats(),
+            }
+        )
+
+    def delete(self, request):
+        get_response_cache().clear()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 class TripCarpoolListCreateView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
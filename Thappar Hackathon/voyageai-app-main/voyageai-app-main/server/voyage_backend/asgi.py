@@ -6,5 +6,7 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "voyage_backend.settings")
 
+# Serve with an ASGI server (e.g. `uvicorn voyage_backend.asgi:application`) so the
+# Server-Sent Events endpoints (chat and itinerary streaming) flush each chunk as it arrives.
 application = get_asgi_application()
 
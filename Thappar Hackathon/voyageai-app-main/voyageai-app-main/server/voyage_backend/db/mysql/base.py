@@ -0,0 +1,51 @@
+"""
+MySQL backend with a process-wide connection pool (``DATABASES[alias]["POOL"]``).
+
+Django opens a connection when a request first touches the database and closes it at the
+end of the request (``CONN_MAX_AGE = 0``); with this backend "open" checks a connection
+out of the pool and "close" rolls it back and returns it, so a request costs a checkout
+instead of a TCP + auth handshake. ``init_connection_state`` still runs on every checkout.
+"""
+from __future__ import annotations
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.mysql.base import DatabaseWrapper as MySQLDatabaseWrapper
+
+from ..pool import ConnectionPool, get_pool
+
+
+class DatabaseWrapper(MySQLDatabaseWrapper):
+    @property
+    def pool(self) -> ConnectionPool | None:
+        options = self.settings_dict.get("POOL")
+        if not options:
+            return None
+        if self.settings_dict["CONN_MAX_AGE"] != 0:
+            raise ImproperlyConfigured("Pooled MySQL connections require CONN_MAX_AGE = 0.")
+
+        def create_pool() -> ConnectionPool:
+            conn_params = self.get_connection_params()
+            connect = MySQLDatabaseWrapper.get_new_connection
+            return ConnectionPool(lambda: connect(self, conn_params), ping=self._ping, **options)
+
+        return get_pool(self.alias, create_pool)
+
+    @staticmethod
+    def _ping(connection) -> bool:
+        connection.ping()
+        return True
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        return pool.getconn()
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            # A connection that saw errors goes back only if the pool's rollback succeeds.
+            pool.putconn(self.connection)
+            self.connection = None
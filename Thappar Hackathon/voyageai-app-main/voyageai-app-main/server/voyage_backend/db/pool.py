@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Tuple
+
+
+class PoolTimeout(Exception):
+    """No connection became free within the pool timeout."""
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of DB-API connections. Up to ``size`` idle connections are kept;
+    ``max_overflow`` more may be opened under load and are closed when returned to a full
+    pool. Checkouts wait up to ``timeout`` seconds for a free connection. Connections
+    older than ``recycle`` seconds or idle for more than ``max_idle`` are closed instead of
+    reused (MySQL drops idle sessions after ``wait_timeout``), and with ``pre_ping`` each
+    reused connection is pinged before it is handed out.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        size: int = 5,
+        max_overflow: int = 10,
+        timeout: float = 30.0,
+        recycle: float | None = 1800.0,
+        max_idle: float | None = 300.0,
+        pre_ping: bool = True,
+        ping: Callable[[Any], bool] | None = None,
+        reset: Callable[[Any], None] | None = None,
+    ):
+        self._connect = connect
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.max_idle = max_idle
+        self.pre_ping = pre_ping
+        self._ping = ping or (lambda conn: conn.ping() is not False)
+        self._reset = reset or (lambda conn: conn.rollback())
+        self._cond = threading.Condition()
+        # (connection, opened_at, returned_at), most recently returned on the right.
+        self._idle: Deque[Tuple[Any, float, float]] = deque()
+        self._opened_at: Dict[int, float] = {}
+        self._open = 0
+        self._waiting = 0
+        self._counters = {
+            "checkouts": 0,
+            "opened": 0,
+            "closed": 0,
+            "recycled": 0,
+            "idleClosed": 0,
+            "failedPings": 0,
+            "timeouts": 0,
+            "waits": 0,
+        }
+        self._wait_seconds = 0.0
+        self._max_wait = 0.0
+        self._peak_in_use = 0
+
+    @property
+    def in_use(self) -> int:
+        return self._open - len(self._idle)
+
+    def _forget(self, conn: Any, counter: str | None = None) -> None:
+        """Stop counting ``conn`` as open. Lock held."""
+        self._opened_at.pop(id(conn), None)
+        self._open -= 1
+        self._counters["closed"] += 1
+        if counter:
+            self._counters[counter] += 1
+        self._cond.notify()
+
+    @staticmethod
+    def _close_raw(conns) -> None:
+        for conn in conns:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def _close_quietly(self, conn: Any, counter: str | None = None) -> None:
+        with self._cond:
+            self._forget(conn, counter)
+        self._close_raw([conn])
+
+    def _prune_idle(self, now: float) -> list:
+        """Drop idle connections past ``max_idle`` (oldest returns are on the left). Lock held."""
+        stale = []
+        while self._idle and self.max_idle is not None and now - self._idle[0][2] > self.max_idle:
+            conn = self._idle.popleft()[0]
+            self._forget(conn, "idleClosed")
+            stale.append(conn)
+        return stale
+
+    def getconn(self) -> Any:
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+        while True:
+            conn = None
+            create = False
+            with self._cond:
+                stale = self._prune_idle(started)
+                while not self._idle and self._open >= self.size + self.max_overflow:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._counters["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"No connection available within {self.timeout}s "
+                            f"({self._open} open, pool size {self.size} + overflow {self.max_overflow})"
+                        )
+                    waited = True
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+                if self._idle:
+                    conn, opened_at, _ = self._idle.pop()
+                else:
+                    create = True
+                    self._open += 1
+            self._close_raw(stale)
+            if create:
+                try:
+                    conn = self._connect()
+                except BaseException:
+                    with self._cond:
+                        self._open -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._opened_at[id(conn)] = time.monotonic()
+                    self._counters["opened"] += 1
+            else:
+                if self.recycle is not None and time.monotonic() - opened_at > self.recycle:
+                    self._close_quietly(conn, "recycled")
+                    continue
+                if self.pre_ping and not self._safe_ping(conn):
+                    self._close_quietly(conn, "failedPings")
+                    continue
+            with self._cond:
+                self._counters["checkouts"] += 1
+                self._peak_in_use = max(self._peak_in_use, self.in_use)
+                if waited:
+                    wait = time.monotonic() - started
+                    self._counters["waits"] += 1
+                    self._wait_seconds += wait
+                    self._max_wait = max(self._max_wait, wait)
+            return conn
+
+    def _safe_ping(self, conn: Any) -> bool:
+        try:
+            return bool(self._ping(conn))
+        except Exception:
+            return False
+
+    def putconn(self, conn: Any, discard: bool = False) -> None:
+        """Return a connection; it is rolled back first and closed if that fails or ``discard``."""
+        if not discard:
+            try:
+                self._reset(conn)
+            except Exception:
+                discard = True
+        if not discard:
+            now = time.monotonic()
+            with self._cond:
+                stale = self._prune_idle(now)
+                if len(self._idle) < self.size:
+                    self._idle.append((conn, self._opened_at.get(id(conn), now), now))
+                    self._cond.notify()
+                    conn = None
+            self._close_raw(stale)
+            if conn is None:
+                return
+        self._close_quietly(conn)
+
+    def close_all(self) -> None:
+        """Close the idle connections."""
+        with self._cond:
+            idle = [conn for conn, _, _ in self._idle]
+            self._idle.clear()
+            for conn in idle:
+                self._forget(conn)
+        self._close_raw(idle)
+
+    def stats(self) -> Dict[str, float]:
+        with self._cond:
+            waits = self._counters["waits"]
+            return {
+                "size": self.size,
+                "maxOverflow": self.max_overflow,
+                "open": self._open,
+                "inUse": self.in_use,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "peakInUse": self._peak_in_use,
+                **self._counters,
+                "avgWaitMs": round(self._wait_seconds / waits * 1000, 2) if waits else 0.0,
+                "maxWaitMs": round(self._max_wait * 1000, 2),
+            }
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias: str, factory: Callable[[], ConnectionPool]) -> ConnectionPool:
+    """The process-wide pool for a database alias, created by ``factory`` on first use."""
+    pool = _pools.get(alias)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(alias)
+            if pool is None:
+                pool = _pools[alias] = factory()
+    return pool
+
+
+def pool_stats() -> Dict[str, Dict[str, float]]:
+    return {alias: pool.stats() for alias, pool in list(_pools.items())}
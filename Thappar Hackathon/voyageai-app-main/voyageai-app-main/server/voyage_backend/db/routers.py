@@ -0,0 +1,65 @@
+"""
+Read-alias routing: reads made while serving a GET, HEAD or OPTIONS request go to
+``settings.READ_ALIAS`` (a ``query_only`` connection to the same SQLite file, so there is
+no replication lag); everything else, every write and reads inside an ``atomic`` block on
+``default`` use ``default``.
+"""
+from __future__ import annotations
+
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.decorators import sync_and_async_middleware
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+_read_only_request: ContextVar[bool] = ContextVar("read_only_request", default=False)
+
+
+@sync_and_async_middleware
+def read_alias_middleware(get_response):
+    """Marks safe-method requests so ``ReadAliasRouter`` sends their reads to the read alias."""
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            token = _read_only_request.set(request.method in SAFE_METHODS)
+            try:
+                return await get_response(request)
+            finally:
+                _read_only_request.reset(token)
+
+    else:
+
+        def middleware(request):
+            token = _read_only_request.set(request.method in SAFE_METHODS)
+            try:
+                return get_response(request)
+            finally:
+                _read_only_request.reset(token)
+
+    return middleware
+
+
+class ReadAliasRouter:
+    def db_for_read(self, model, **hints):
+        alias = getattr(settings, "READ_ALIAS", None)
+        if (
+            alias in settings.DATABASES
+            and _read_only_request.get()
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return alias
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Explicit: otherwise Django would write an instance back to the alias it was read from.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, getattr(settings, "READ_ALIAS", None)}
+        return obj1._state.db in aliases and obj2._state.db in aliases
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -3,7 +3,7 @@ from __future__ import annotations
 import os
 from datetime import timedelta
 from pathlib import Path
-from urllib.parse import urlparse
+from urllib.parse import parse_qs, urlparse
 
 from dotenv import load_dotenv
 
@@ -67,13 +67,82 @@ WSGI_APPLICATION = "voyage_backend.wsgi.application"
 ASGI_APPLICATION = "voyage_backend.asgi.application"
 
 
+def _flag(value: str) -> bool:
+    return value.lower() in {"1", "true", "yes", "on"}
+
+
+# DATABASE_URL query parameters, e.g.
+#   mysql://user:pw@db:3306/voyageai?conn_max_age=60&conn_health_checks=true
+#   mysql://user:pw@db:3306/voyageai?pool=true&pool_size=10&pool_max_overflow=20
+# conn_max_age keeps one connection per thread open for that many seconds ("none" = forever);
+# pool=true shares a process-wide pool instead (voyage_backend.db.mysql) and needs
+# conn_max_age=0. pool_recycle caps a connection's lifetime and pool_max_idle closes
+# connections idle longer than that (keep it under MySQL's wait_timeout).
+DATABASE_URL_PARAMS = {
+    "conn_max_age": lambda value: None if value.lower() == "none" else int(value),
+    "conn_health_checks": _flag,
+    "pool": _flag,
+    "pool_size": int,
+    "pool_max_overflow": int,
+    "pool_timeout": float,
+    "pool_recycle": float,
+    "pool_max_idle": float,
+    "pool_pre_ping": _flag,
+}
+
+
+# SQLite (no DATABASE_URL). SQLITE_OPTIMIZED=true switches the file to WAL (readers no
+# longer block on a writer), syncs on checkpoints instead of every commit, memory-maps
+# SQLITE_MMAP_SIZE bytes and caches SQLITE_CACHE_SIZE pages (negative = KiB). Writers start
+# IMMEDIATE transactions and wait up to SQLITE_BUSY_TIMEOUT seconds for the write lock
+# instead of failing on a read->write upgrade. SQLITE_READ_ALIAS=true adds a read-only
+# "readonly" alias on the same file that GET/HEAD/OPTIONS requests read from.
+SQLITE_OPTIMIZED = _flag(os.getenv("SQLITE_OPTIMIZED", "false"))
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", "20"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))
+SQLITE_READ_ALIAS = _flag(os.getenv("SQLITE_READ_ALIAS", "false"))
+READ_ALIAS = "readonly"
+
+
+def build_sqlite_config(read_only: bool = False) -> dict[str, object]:
+    config: dict[str, object] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "db.sqlite3",
+    }
+    if SQLITE_OPTIMIZED or read_only:
+        pragmas = [
+            "PRAGMA journal_mode = WAL",
+            "PRAGMA synchronous = NORMAL",
+            f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}",
+            f"PRAGMA cache_size = {SQLITE_CACHE_SIZE}",
+            "PRAGMA temp_store = MEMORY",
+        ]
+        if read_only:
+            pragmas.append("PRAGMA query_only = ON")
+        config["OPTIONS"] = {
+            "timeout": SQLITE_BUSY_TIMEOUT,
+            # Readers never take the write lock, so they keep the default DEFERRED mode.
+            "transaction_mode": None if read_only else "IMMEDIATE",
+            "init_command": "; ".join(pragmas),
+        }
+    if read_only:
+        config["TEST"] = {"MIRROR": "default"}
+    return config
+
+
 def build_database_config() -> dict[str, object]:
     url = os.getenv("DATABASE_URL")
     if url:
         parsed = urlparse(url)
         if parsed.scheme not in {"mysql", "mariadb"}:
             raise ValueError("DATABASE_URL must use mysql:// or mariadb://")
-        return {
+        params = {}
+        for key, values in parse_qs(parsed.query).items():
+            if key not in DATABASE_URL_PARAMS:
+                raise ValueError(f"Unknown DATABASE_URL parameter: {key}")
+            params[key] = DATABASE_URL_PARAMS[key](values[-1])
+        config: dict[str, object] = {
             "ENGINE": "django.db.backends.mysql",
             "NAME": parsed.path.lstrip("/") or "",
             "USER": parsed.username or "",
@@ -81,14 +150,30 @@ def build_database_config() -> dict[str, object]:
             "HOST": parsed.hostname or "127.0.0.1",
             "PORT": parsed.port or 3306,
             "OPTIONS": {"charset": "utf8mb4"},
+            "CONN_MAX_AGE": params.get("conn_max_age", 0),
+            "CONN_HEALTH_CHECKS": params.get("conn_health_checks", False),
         }
-    return {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
+        if params.get("pool"):
+            if config["CONN_MAX_AGE"] != 0:
+                raise ValueError("DATABASE_URL: pool=true needs conn_max_age=0")
+            config["ENGINE"] = "voyage_backend.db.mysql"
+            config["POOL"] = {
+                "size": params.get("pool_size", 5),
+                "max_overflow": params.get("pool_max_overflow", 10),
+                "timeout": params.get("pool_timeout", 30.0),
+                "recycle": params.get("pool_recycle", 1800.0),
+                "max_idle": params.get("pool_max_idle", 300.0),
+                "pre_ping": params.get("pool_pre_ping", True),
+            }
+        return config
+    return build_sqlite_config()
 
 
 DATABASES = {"default": build_database_config()}
+if SQLITE_READ_ALIAS and DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    DATABASES[READ_ALIAS] = build_sqlite_config(read_only=True)
+    DATABASE_ROUTERS = ["voyage_backend.db.routers.ReadAliasRouter"]
+    MIDDLEWARE.insert(0, "voyage_backend.db.routers.read_alias_middleware")
 
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -131,6 +216,76 @@ CSRF_TRUSTED_ORIGINS = [
 
 AUTH_USER_MODEL = "users.User"
 
+# Gemini response cache: "memory" keeps an in-process LRU, "django" uses the
+# Django CACHES alias named by AI_CACHE_ALIAS (a DatabaseCache gives a shared DB table).
+AI_CACHE_ENABLED = _flag(os.getenv("AI_CACHE_ENABLED", "true"))
+AI_CACHE_BACKEND = os.getenv("AI_CACHE_BACKEND", "memory")
+AI_CACHE_ALIAS = os.getenv("AI_CACHE_ALIAS", "default")
+AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "512"))
+AI_CACHE_TTLS = {
+    "itinerary": int(os.getenv("AI_CACHE_TTL_ITINERARY", str(60 * 60 * 6))),
+    "itinerary_day": int(os.getenv("AI_CACHE_TTL_ITINERARY_DAY", str(60 * 60 * 6))),
+    "itinerary_update": int(os.getenv("AI_CACHE_TTL_ITINERARY_UPDATE", str(60 * 60 * 6))),
+    "suggestions": int(os.getenv("AI_CACHE_TTL_SUGGESTIONS", str(60 * 60 * 24))),
+    "recommendations": int(os.getenv("AI_CACHE_TTL_RECOMMENDATIONS", str(60 * 60 * 12))),
+    "packing_list": int(os.getenv("AI_CACHE_TTL_PACKING_LIST", str(60 * 60 * 24))),
+    "budget_analysis": int(os.getenv("AI_CACHE_TTL_BUDGET_ANALYSIS", str(60 * 60 * 12))),
+}
+
+# Identical concurrent Gemini requests always share one call within a process. The DB
+# lease extends that across processes; followers read the leader's result from the
+# response cache, so pair it with AI_CACHE_BACKEND=django.
+AI_SINGLEFLIGHT_DB_LEASE = _flag(os.getenv("AI_SINGLEFLIGHT_DB_LEASE", "false"))
+AI_SINGLEFLIGHT_LEASE_SECONDS = int(os.getenv("AI_SINGLEFLIGHT_LEASE_SECONDS", "60"))
+
+# Serve the Gemini endpoints with native async views (run under ASGI) and cap the
+# number of in-flight Gemini calls per event loop.
+ASYNC_AI_VIEWS = _flag(os.getenv("ASYNC_AI_VIEWS", "false"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "64"))
+
+# OpenWeather results, cached per normalized location. Fresh for WEATHER_CACHE_TTL seconds,
+# then served stale for up to WEATHER_CACHE_STALE_TTL more while a background refresh runs.
+# Unknown locations are remembered for WEATHER_CACHE_NEGATIVE_TTL seconds.
+WEATHER_CACHE_ENABLED = _flag(os.getenv("WEATHER_CACHE_ENABLED", "true"))
+WEATHER_CACHE_BACKEND = os.getenv("WEATHER_CACHE_BACKEND", "memory")
+WEATHER_CACHE_ALIAS = os.getenv("WEATHER_CACHE_ALIAS", "default")
+WEATHER_CACHE_MAX_ENTRIES = int(os.getenv("WEATHER_CACHE_MAX_ENTRIES", "2048"))
+WEATHER_CACHE_TTL = int(os.getenv("WEATHER_CACHE_TTL", "600"))
+WEATHER_CACHE_STALE_TTL = int(os.getenv("WEATHER_CACHE_STALE_TTL", "3600"))
+WEATHER_CACHE_NEGATIVE_TTL = int(os.getenv("WEATHER_CACHE_NEGATIVE_TTL", "3600"))
+# POST /api/integrations/weather/batch: distinct locations are fetched in parallel on this many threads.
+WEATHER_BATCH_WORKERS = int(os.getenv("WEATHER_BATCH_WORKERS", "8"))
+WEATHER_BATCH_MAX_LOCATIONS = int(os.getenv("WEATHER_BATCH_MAX_LOCATIONS", "50"))
+
+# Shared outbound HTTP client for integrations (integrations.http): keep-alive pools with at
+# most HTTP_POOL_MAXSIZE connections per host, jittered retries for idempotent requests and a
+# per-host circuit breaker that opens after HTTP_BREAKER_FAILURES consecutive failures.
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
+HTTP_POOL_BLOCK = _flag(os.getenv("HTTP_POOL_BLOCK", "true"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.2"))
+HTTP_BACKOFF_JITTER = float(os.getenv("HTTP_BACKOFF_JITTER", "0.2"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "8"))
+HTTP_BREAKER_FAILURES = int(os.getenv("HTTP_BREAKER_FAILURES", "5"))
+HTTP_BREAKER_RESET_SECONDS = float(os.getenv("HTTP_BREAKER_RESET_SECONDS", "30"))
+
+# Precomputed destination suggestions (see `manage.py build_suggestion_index`). Entries
+# older than SUGGESTION_INDEX_MAX_AGE are still served but refreshed in the background.
+SUGGESTION_INDEX_ENABLED = _flag(os.getenv("SUGGESTION_INDEX_ENABLED", "true"))
+SUGGESTION_INDEX_MAX_AGE = int(os.getenv("SUGGESTION_INDEX_MAX_AGE", str(60 * 60 * 24 * 7)))
+SUGGESTION_INDEX_TOP_N = int(os.getenv("SUGGESTION_INDEX_TOP_N", "50"))
+
+# POST /api/trips/ai/batch: operations accepted per request and threads running them.
+AI_BATCH_MAX_OPERATIONS = int(os.getenv("AI_BATCH_MAX_OPERATIONS", "50"))
+AI_BATCH_WORKERS = int(os.getenv("AI_BATCH_WORKERS", "8"))
+
+# Local worker threads that run queued itinerary generation jobs.
+GENERATION_JOB_WORKERS = int(os.getenv("GENERATION_JOB_WORKERS", "4"))
+# Active jobs not finished within this many seconds are failed so a new request can retry.
+GENERATION_JOB_LEASE_SECONDS = int(os.getenv("GENERATION_JOB_LEASE_SECONDS", "900"))
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # Disable trailing slash redirect for API endpoints
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import itertools
+import threading
+from unittest import mock
+
+from django.test import RequestFactory, SimpleTestCase
+
+from .db.pool import ConnectionPool, PoolTimeout
+from .db.routers import ReadAliasRouter, read_alias_middleware
+
+
+class FakeConnection:
+    ids = itertools.count(1)
+
+    def __init__(self):
+        self.id = next(self.ids)
+        self.alive = True
+        self.closed = False
+        self.rollback_fails = False
+
+    def ping(self):
+        if not self.alive:
+            raise OSError("server has gone away")
+
+    def rollback(self):
+        if self.rollback_fails:
+            raise OSError("lost connection")
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def pool(self, **options) -> ConnectionPool:
+        return ConnectionPool(FakeConnection, **{"size": 2, "max_overflow": 1, "timeout": 0.05, **options})
+
+    def test_returned_connections_are_reused(self):
+        pool = self.pool()
+        conn = pool.getconn()
+        pool.putconn(conn)
+        self.assertIs(pool.getconn(), conn)
+        self.assertEqual(pool.stats()["opened"], 1)
+
+    def test_overflow_is_closed_when_returned_to_a_full_pool(self):
+        pool = self.pool()
+        conns = [pool.getconn() for _ in range(3)]
+        for conn in conns:
+            pool.putconn(conn)
+        self.assertEqual([conn.closed for conn in conns], [False, False, True])
+        self.assertEqual((pool.stats()["open"], pool.stats()["idle"]), (2, 2))
+
+    def test_checkout_times_out_when_exhausted(self):
+        pool = self.pool()
+        held = [pool.getconn() for _ in range(3)]
+        with self.assertRaises(PoolTimeout):
+            pool.getconn()
+        self.assertEqual(pool.stats()["timeouts"], 1)
+        # A waiter gets the next connection returned.
+        pool.timeout = 5
+        threading.Timer(0.01, pool.putconn, [held[0]]).start()
+        self.assertIs(pool.getconn(), held[0])
+        self.assertEqual(pool.stats()["waits"], 1)
+
+    def test_dead_and_old_connections_are_replaced(self):
+        pool = self.pool(recycle=60, max_idle=None)
+        dead = pool.getconn()
+        pool.putconn(dead)
+        dead.alive = False
+        fresh = pool.getconn()
+        self.assertIsNot(fresh, dead)
+        self.assertTrue(dead.closed)
+        pool.putconn(fresh)
+        with mock.patch("voyage_backend.db.pool.time.monotonic", return_value=10**9):
+            self.assertIsNot(pool.getconn(), fresh)
+        stats = pool.stats()
+        self.assertEqual((stats["failedPings"], stats["recycled"]), (1, 1))
+
+    def test_connection_that_fails_to_reset_is_discarded(self):
+        pool = self.pool()
+        conn = pool.getconn()
+        conn.rollback_fails = True
+        pool.putconn(conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()["open"], 0)
+
+
+class ReadAliasRouterTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch(
+            "voyage_backend.db.routers.settings",
+            READ_ALIAS="readonly",
+            DATABASES={"default": {}, "readonly": {}},
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.router = ReadAliasRouter()
+
+    def route(self, method: str) -> tuple[str, str]:
+        handler = read_alias_middleware(lambda request: (self.router.db_for_read(None), self.router.db_for_write(None)))
+        return handler(RequestFactory().generic(method, "/"))
+
+    def test_safe_requests_read_from_the_read_alias(self):
+        self.assertEqual(self.route("GET"), ("readonly", "default"))
+        self.assertEqual(self.route("HEAD"), ("readonly", "default"))
+
+    def test_unsafe_requests_and_other_code_use_default(self):
+        self.assertEqual(self.route("POST"), ("default", "default"))
+        self.assertEqual(self.router.db_for_read(None), "default")
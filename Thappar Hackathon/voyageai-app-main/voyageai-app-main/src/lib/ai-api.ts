@@ -12,7 +12,17 @@ export function createAIApiClient(options: ApiOptions = {}) {
   return {
     // Trip Itinerary Generation
     generateItinerary: <T>(tripId: string, context?: Record<string, any>) =>
-      client.post<T>(`/api/trips/${tripId}/generate/`, context),
+      client.post<T>(`/api/trips/${tripId}/generate`, context),
+
+    getGenerationStatus: <T>(tripId: string, jobId?: string) =>
+      client.get<T>(`/api/trips/${tripId}/generate/status${jobId ? `?job=${jobId}` : ''}`),
+
+    // Single itinerary day (fetch / regenerate with Gemini without touching the other days)
+    getItineraryDay: <T>(tripId: string, day: number) =>
+      client.get<T>(`/api/trips/${tripId}/days/${day}`),
+
+    regenerateItineraryDay: <T>(tripId: string, day: number, context?: Record<string, any>) =>
+      client.post<T>(`/api/trips/${tripId}/days/${day}/regenerate`, context),
 
     // AI Recommendations
     getRecommendations: <T>(tripId: string, type: string = 'attractions') =>
@@ -37,6 +47,10 @@ export function createAIApiClient(options: ApiOptions = {}) {
       return client.get<T>(`/api/trips/suggestions?${params.toString()}`);
     },
 
+    // Batched recommendations / packing lists / budget analyses for many trips
+    runBatch: <T>(operations: BatchOperation[]) =>
+      client.post<T>('/api/trips/ai/batch', { operations }),
+
     // AI Travel Chat
     chatWithAI: <T>(message: string, context?: Record<string, any>, tripId?: string) =>
       client.post<T>('/api/trips/chat', {
@@ -48,6 +62,40 @@ export function createAIApiClient(options: ApiOptions = {}) {
 }
 
 // Response types
+export interface GenerationJob {
+  id: string;
+  tripId: string;
+  status: 'queued' | 'running' | 'succeeded' | 'failed';
+  progress: number;
+  error: string;
+  strategy: '' | 'full' | 'incremental' | 'unchanged';
+  createdAt: string;
+  startedAt: string | null;
+  finishedAt: string | null;
+}
+
+export interface GenerationJobResponse {
+  job: GenerationJob;
+  coalesced?: boolean;
+}
+
+export interface BatchOperation {
+  tripId: string;
+  operation: 'recommendations' | 'packing_list' | 'budget_analysis';
+  params?: { type?: string; context?: string };
+}
+
+export interface BatchResponse {
+  results: Array<{
+    tripId: string;
+    operation: string;
+    error?: string;
+    recommendations?: RecommendationsResponse['recommendations'];
+    packingList?: PackingListResponse['packingList'];
+    analysis?: BudgetAnalysisResponse['analysis'];
+  }>;
+}
+
 export interface ItineraryResponse {
   trip: {
     id: string;
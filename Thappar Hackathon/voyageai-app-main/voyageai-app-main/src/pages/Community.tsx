@@ -39,7 +39,7 @@ const Community = () => {
   const [newCarpool, setNewCarpool] = useState({ tripId: "", seats: 3, from: "", to: "", departure: "" });
 
   useEffect(() => {
-    api.get<{ items: any[] }>(`/api/trips/discover`).then((r) => setDiscover(r.items));
+    api.get<{ items: any[] }>(`/api/trips/discover?fields=id,title,owner`).then((r) => setDiscover(r.items));
   // eslint-disable-next-line react-hooks/exhaustive-deps
   }, []);
 
@@ -26,6 +26,10 @@ import { useNavigate } from "react-router-dom";
  * - Trip suggestions integration
  */
 
+// Generation jobs are polled at this interval and given up on after the timeout.
+const GENERATION_POLL_MS = 1500;
+const GENERATION_TIMEOUT_MS = 5 * 60 * 1000;
+
 const Planner = () => {
   const { toast } = useToast();
   const { token } = useAuth();
@@ -201,14 +205,29 @@ const Planner = () => {
         accessibility: { notes: interests.join(", ") },
       });
       
-      const gen = await api.post<{ trip: any }>(`/api/trips/${created.trip.id}/generate`, {});
+      const gen = await api.post<{ job: any }>(`/api/trips/${created.trip.id}/generate`, {});
+
+      // Generation runs as a background job; poll until it finishes or the timeout passes.
+      let job = gen.job;
+      const deadline = Date.now() + GENERATION_TIMEOUT_MS;
+      while (job.status === "queued" || job.status === "running") {
+        if (Date.now() >= deadline) {
+          throw new Error("Itinerary generation is taking too long. Please try again.");
+        }
+        await new Promise((resolve) => setTimeout(resolve, GENERATION_POLL_MS));
+        const res = await api.get<{ job: any }>(`/api/trips/${created.trip.id}/generate/status?job=${job.id}`);
+        job = res.job;
+      }
+      if (job.status === "failed") {
+        throw new Error(job.error || "Itinerary generation failed");
+      }
       
       toast({
         title: "Itinerary Generated!",
         description: "Your personalized trip plan is ready",
       });
       
-      navigate(`/trips/${gen.trip.id}`);
+      navigate(`/trips/${created.trip.id}`);
     } catch (err: any) {
       toast({
         title: "Generation failed",
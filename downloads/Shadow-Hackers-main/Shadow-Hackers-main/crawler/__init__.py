@@ -0,0 +1,9 @@
+from .engine import Crawler, Page
+from .fetcher import Fetcher, FetchResult
+from .frontier import Frontier, normalize_url
+from .pagestore import PageRecord, PageStore
+from .pricestore import PricePoint, PriceStore
+from .products import Product
+from .shards import FrontierStore, ShardFrontier, crawl_sharded
+
+__all__ = ["Crawler", "Page", "Fetcher", "FetchResult", "Frontier", "normalize_url", "PageRecord", "PageStore", "PricePoint", "PriceStore", "Product", "FrontierStore", "ShardFrontier", "crawl_sharded"]
@@ -0,0 +1,87 @@
+"""
+Matching benchmark: build an index over a synthetic multi-retailer catalog, then time
+lookups of the same products as another retailer would title them.
+
+    python -m crawler.bench_matching --catalog 1000000 --queries 2000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+
+from .matching import MatchIndex
+
+BRANDS = "apple samsung oneplus xiaomi realme vivo oppo sony lg boat jbl canon nikon hp dell lenovo asus acer philips bosch".split()
+KINDS = "smartphone laptop headphones earbuds television camera speaker monitor refrigerator washing-machine smartwatch tablet".split()
+COLOURS = "black white blue silver graphite green red midnight starlight grey".split()
+SIZES = ("64 GB", "128 GB", "256 GB", "512 GB", "1 TB", "32 inch", "43 inch", "55 inch", "8 GB RAM", "16 GB RAM")
+FILLER = "with fast charging | official warranty | 2024 edition | dual sim | wireless | noise cancelling".split(" | ")
+RETAILERS = ("www.amazon.in", "www.flipkart.com", "www.croma.com", "www.reliancedigital.in")
+
+
+def product_fields(rng: random.Random, n: int):
+    return (rng.choice(BRANDS), rng.choice(KINDS), f"{rng.choice('ABCDEFGHJKMNPQRSTVXZ')}{n}", rng.choice(SIZES), rng.choice(COLOURS))
+
+
+def listing(rng: random.Random, fields, retailer: int) -> str:
+    """The same product worded the way different shops word it."""
+    brand, kind, model, size, colour = fields
+    if retailer % 2:
+        title = f"{brand.title()} {model} {kind} ({colour.title()}, {size})"
+    else:
+        title = f"{brand.upper()} {kind} {model} {size} - {colour}"
+    return title + (f" {rng.choice(FILLER)}" if rng.random() < 0.5 else "")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--catalog", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=1_000)
+    parser.add_argument("--batch", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    products = [product_fields(rng, n) for n in range(args.catalog)]
+    index = MatchIndex()
+    start = time.perf_counter()
+    for offset in range(0, args.catalog, args.batch):
+        chunk = products[offset : offset + args.batch]
+        index.add_many((offset + i, listing(rng, fields, 0), RETAILERS[0]) for i, fields in enumerate(chunk))
+    index.flush()
+    build = time.perf_counter() - start
+
+    sample = rng.sample(range(args.catalog), min(args.queries, args.catalog))
+    latencies, hits = [], 0
+    for n in sample:
+        title = listing(rng, products[n], 1)
+        start = time.perf_counter()
+        matches = index.match(title, limit=3, exclude_retailer=RETAILERS[1])
+        latencies.append(time.perf_counter() - start)
+        hits += bool(matches) and matches[0].item_id == n
+
+    start = time.perf_counter()
+    inserts = 1_000
+    for i in range(inserts):
+        index.add(args.catalog + i, listing(rng, product_fields(rng, args.catalog + i), 2), RETAILERS[2])
+    insert = time.perf_counter() - start
+
+    ms = np.array(latencies) * 1000
+    report = {
+        "catalog": args.catalog,
+        "buildSeconds": round(build, 2),
+        "itemsPerSecond": round(args.catalog / build),
+        "queries": len(sample),
+        "top1Accuracy": round(hits / len(sample), 4),
+        "queryMs": {"mean": round(float(ms.mean()), 3), "p50": round(float(np.percentile(ms, 50)), 3), "p99": round(float(np.percentile(ms, 99)), 3)},
+        "singleInsertMs": round(insert / inserts * 1000, 3),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Parsing benchmark over saved HTML pages.
+
+    python -m crawler.bench_parse                 # the site's own *.html pages
+    python -m crawler.bench_parse pages/ --repeat 20 --workers 4
+
+Times the old BeautifulSoup pass, the streaming and lxml link extractors, the full pipeline
+(links + product extraction) and the pipeline spread over a process pool.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+from urllib.parse import urljoin
+
+from . import parse
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent.parent
+
+
+def load_corpus(paths: List[str]) -> List[Tuple[str, str]]:
+    files: List[Path] = []
+    for path in map(Path, paths or [DEFAULT_CORPUS]):
+        files += sorted(path.rglob("*.htm*")) if path.is_dir() else [path]
+    return [(f"https://example.com/{file.name}", file.read_text(encoding="utf-8", errors="replace")) for file in files]
+
+
+def _bs4(url: str, html: str):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    title = soup.title.string if soup.title else "No Title"
+    return title, [urljoin(url, link["href"]) for link in soup.find_all("a", href=True)]
+
+
+def _parse_pair(pair: Tuple[str, str]):
+    return parse.parse_page(*pair)
+
+
+def time_inline(fn: Callable, pages: List[Tuple[str, str]], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for url, html in pages:
+            fn(url, html)
+    return time.perf_counter() - start
+
+
+def time_pool(pages: List[Tuple[str, str]], repeat: int, workers: int) -> float:
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(_parse_pair, pages[:workers]))  # start the workers outside the timing
+        start = time.perf_counter()
+        list(pool.map(_parse_pair, pages * repeat, chunksize=max(1, len(pages) * repeat // (workers * 8))))
+        return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="*", help="HTML files or directories (default: the site's pages)")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus)
+    if not pages:
+        raise SystemExit("No HTML pages found")
+    total_bytes = sum(len(html.encode("utf-8")) for _, html in pages) * args.repeat
+    count = len(pages) * args.repeat
+
+    timings: Dict[str, float] = {}
+    try:
+        timings["bs4 html.parser"] = time_inline(_bs4, pages, args.repeat)
+    except ImportError:
+        pass
+    timings["streaming links+meta"] = time_inline(parse._extract_stdlib, pages, args.repeat)
+    if parse.lxml is not None:
+        timings["lxml links+meta"] = time_inline(parse._extract_lxml, pages, args.repeat)
+    timings["pipeline"] = time_inline(parse.parse_page, pages, args.repeat)
+    timings[f"pipeline x{args.workers} processes"] = time_pool(pages, args.repeat, args.workers)
+
+    report = {
+        "pages": len(pages),
+        "repeat": args.repeat,
+        "results": {
+            name: {
+                "seconds": round(seconds, 4),
+                "pagesPerSecond": round(count / seconds, 1),
+                "mbPerSecond": round(total_bytes / seconds / 1e6, 2),
+            }
+            for name, seconds in timings.items()
+        },
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Price store benchmark: ingest synthetic observations, then time the read queries.
+
+    python -m crawler.bench_prices --products 100000 --observations 2000000 --change-rate 0.05
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from .pricestore import PriceStore
+from .products import Product
+
+RETAILERS = ("www.amazon.in", "www.flipkart.com", "www.croma.com", "www.reliancedigital.in")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=50_000)
+    parser.add_argument("--observations", type=int, default=1_000_000)
+    parser.add_argument("--change-rate", type=float, default=0.05, help="share of observations with a new price")
+    parser.add_argument("--batch", type=int, default=5_000)
+    parser.add_argument("--db", help="database file (default: a temporary file)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    path = args.db or os.path.join(tempfile.mkdtemp(), "prices.sqlite3")
+    store = PriceStore(path)
+    catalog = [
+        Product(f"https://{RETAILERS[i % len(RETAILERS)]}/p/{i}", RETAILERS[i % len(RETAILERS)], f"Product {i}", rng.uniform(100, 90_000), "INR", str(i))
+        for i in range(args.products)
+    ]
+
+    start_at = int(time.time()) - 86_400
+    changes = 0
+    started = time.perf_counter()
+    batch = []
+    for n in range(args.observations):
+        product = catalog[rng.randrange(args.products)]
+        if rng.random() < args.change_rate:
+            product.price = round(product.price * rng.uniform(0.9, 1.1), 2)
+        batch.append((product, start_at + n * 86_400 // args.observations))
+        if len(batch) >= args.batch:
+            changes += store.add_many(batch)
+            batch.clear()
+    changes += store.add_many(batch)
+    ingest = time.perf_counter() - started
+
+    ids = [store.product_id(p.retailer, p.sku) for p in rng.sample(catalog, 200)]
+    started = time.perf_counter()
+    for i in range(0, len(ids), 4):
+        store.latest_prices(ids[i : i + 4])
+    latest_ms = (time.perf_counter() - started) / (len(ids) / 4) * 1000
+    started = time.perf_counter()
+    for product_id in ids:
+        store.history(product_id, since=start_at + 3_600)
+    history_ms = (time.perf_counter() - started) / len(ids) * 1000
+    store.close()
+
+    print(json.dumps({
+        "observations": args.observations,
+        "priceChanges": changes,
+        "ingestSeconds": round(ingest, 2),
+        "observationsPerSecond": round(args.observations / ingest),
+        "dbBytes": os.path.getsize(path),
+        "latestPricesMs": round(latest_ms, 3),
+        "historyMs": round(history_ms, 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
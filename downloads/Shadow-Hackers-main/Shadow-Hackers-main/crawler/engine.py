@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from .fetcher import Fetcher
+from .frontier import Frontier, host_of, normalize_url
+from .pagestore import PageRecord, PageStore
+from .parse import ParsedPage, parse_page
+from .products import Product
+from .robots import RobotsCache
+
+
+@dataclass
+class Page:
+    url: str
+    depth: int
+    status: int = 0
+    title: str = ""
+    links: List[str] = field(default_factory=list)
+    product: Product | None = None
+    error: str = ""
+    # False when a conditional GET answered 304 or the extracted content hashed the same as
+    # last time; ``title``, ``links`` and ``product`` are then left empty.
+    changed: bool = True
+    etag: str | None = None
+    last_modified: str | None = None
+    content_hash: str | None = None
+
+
+def content_hash(parsed: ParsedPage) -> str:
+    """
+    Hash of what is extracted from a page rather than of its body, so session tokens and
+    timestamps in the markup do not make every visit look like a change.
+    """
+    product = asdict(parsed.product) if parsed.product is not None else None
+    payload = json.dumps([parsed.title, sorted(set(parsed.links)), product], sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class Crawler:
+    """
+    Breadth-first crawler: ``workers`` threads fetch in parallel through a pooled
+    ``Fetcher``, at most ``per_host`` requests per host at a time, spaced by the host's
+    robots.txt crawl-delay (or ``delay``). With ``state_path`` the frontier is checkpointed
+    every ``checkpoint_every`` pages, by appending only what changed since the previous
+    checkpoint, and a later run resumes from it. With a ``page_store`` known pages are
+    fetched conditionally and only reported as changed when their extracted content is.
+    ``parse_workers`` > 0 moves parsing into that many processes, so fetch threads do not
+    compete for the GIL with HTML parsing. A ``frontier`` passed in (e.g. a ``ShardFrontier``)
+    replaces the in-memory one and is given the crawler's politeness delays. ``on_checkpoint``
+    runs at every checkpoint just before the frontier and page store are saved, so data the
+    caller buffers per page is persisted no later than the pages it came from.
+    """
+
+    def __init__(
+        self,
+        workers: int = 8,
+        per_host: int = 2,
+        delay: float = 1.0,
+        max_depth: int | None = None,
+        allowed_hosts: Iterable[str] | None = None,
+        state_path: str | None = None,
+        checkpoint_every: int = 100,
+        respect_robots: bool = True,
+        fetcher: Fetcher | None = None,
+        on_page: Callable[[Page], None] | None = None,
+        page_store: PageStore | None = None,
+        parse_workers: int = 0,
+        frontier: Frontier | None = None,
+        on_checkpoint: Callable[[], None] | None = None,
+    ):
+        self.workers = workers
+        self.max_depth = max_depth
+        self.allowed_hosts = {host.lower() for host in allowed_hosts} if allowed_hosts else None
+        self.state_path = state_path
+        self.checkpoint_every = checkpoint_every
+        self.fetcher = fetcher or Fetcher(pool_maxsize=max(per_host, 1))
+        self.robots = RobotsCache(self.fetcher, default_delay=delay) if respect_robots else None
+        self.frontier = frontier if frontier is not None else Frontier(per_host)
+        self.frontier.delay_for = self.robots.delay if self.robots else (lambda host: delay)
+        self.on_page = on_page
+        self.on_checkpoint = on_checkpoint
+        self.page_store = page_store
+        self.parse_workers = parse_workers
+        self._parse_pool: ProcessPoolExecutor | None = None
+        self.pages = 0
+        # Frontier changes since the last checkpoint: newly queued URLs and finished ones.
+        self._queued_since: List[Tuple[str, int]] = []
+        self._done_since: List[str] = []
+        if state_path and os.path.exists(state_path):
+            self.load_state()
+
+    def add(self, url: str, depth: int = 0) -> bool:
+        url = normalize_url(url)
+        if url is None or (self.allowed_hosts is not None and host_of(url) not in self.allowed_hosts):
+            return False
+        if self.max_depth is not None and depth > self.max_depth:
+            return False
+        return self._queue(url, depth)
+
+    def _queue(self, url: str, depth: int) -> bool:
+        if not self.frontier.add(url, depth):
+            return False
+        if self.state_path:
+            self._queued_since.append((url, depth))
+        return True
+
+    def _parse(self, url: str, html: str) -> ParsedPage:
+        if self._parse_pool is None:
+            return parse_page(url, html)
+        return self._parse_pool.submit(parse_page, url, html).result()
+
+    def _fetch(self, url: str, depth: int, previous: PageRecord | None = None) -> Page:
+        if self.robots is not None and not self.robots.allowed(url):
+            return Page(url, depth, error="disallowed by robots.txt")
+        result = self.fetcher.get(url, headers=previous.validators() if previous else None)
+        page = Page(url, depth, result.status, error=result.error)
+        page.etag = result.headers.get("ETag")
+        page.last_modified = result.headers.get("Last-Modified")
+        if result.status == 304 and previous is not None:
+            page.changed = False
+        elif result.ok and result.text:
+            parsed = self._parse(url, result.text)
+            page.content_hash = content_hash(parsed)
+            if previous is not None and page.content_hash == previous.content_hash:
+                page.changed = False
+            else:
+                page.title, page.links, page.product = parsed.title, parsed.links, parsed.product
+        elif not result.error and result.status != 200:
+            page.error = f"HTTP {result.status}"
+        return page
+
+    def _handle(self, page: Page) -> None:
+        self.pages += 1
+        if self.page_store is not None and not page.error:
+            self.page_store.record(
+                page.url, page.depth, page.changed, page.etag, page.last_modified, page.content_hash
+            )
+        for link in page.links:
+            self.add(link, page.depth + 1)
+        if self.on_page is not None:
+            self.on_page(page)
+        if self.state_path:
+            self._done_since.append(page.url)
+        if self.pages % self.checkpoint_every == 0:
+            self._checkpoint()
+
+    def _checkpoint(self) -> None:
+        if self.on_checkpoint is not None:
+            self.on_checkpoint()
+        if self.state_path:
+            self.save_state()
+        if self.page_store is not None:
+            self.page_store.commit()
+
+    def run(self, start_urls: Iterable[str] = (), max_pages: int | None = None) -> int:
+        """Crawl until the frontier is empty or ``max_pages`` pages were fetched; returns pages fetched."""
+        for url in start_urls:
+            self.add(url)
+        budget = None if max_pages is None else self.pages + max_pages
+        if self.parse_workers:
+            self._parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+        try:
+            self._crawl(budget)
+        finally:
+            if self._parse_pool is not None:
+                self._parse_pool.shutdown()
+                self._parse_pool = None
+        self._checkpoint()
+        return self.pages
+
+    def _crawl(self, budget: int | None) -> None:
+        pending: Dict[Future, Tuple[str, int]] = {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="crawler") as pool:
+            while not self.frontier.finished() or pending:
+                now = time.monotonic()
+                while len(pending) < self.workers and (budget is None or self.pages + len(pending) < budget):
+                    item = self.frontier.pop(now)
+                    if item is None:
+                        break
+                    previous = self.page_store.get(item[0]) if self.page_store is not None else None
+                    pending[pool.submit(self._fetch, *item, previous)] = item
+                if not pending:
+                    if budget is not None and self.pages >= budget:
+                        break
+                    time.sleep(min(self.frontier.next_ready_in(now) or 0.0, 1.0))
+                    continue
+                ready_in = self.frontier.next_ready_in(now)
+                done, _ = wait(pending, timeout=ready_in if ready_in else None, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, depth = pending.pop(future)
+                    self.frontier.done(url)
+                    try:
+                        page = future.result()
+                    except Exception as e:
+                        # A page that breaks parsing or an extractor is recorded as failed; the crawl goes on.
+                        page = Page(url, depth, error=f"{type(e).__name__}: {e}")
+                    self._handle(page)
+
+    def queue_due(self, limit: int | None = None) -> int:
+        """Queue the stored pages that are due for a revisit; returns how many were queued."""
+        return sum(self._queue(url, depth) for url, depth in self.page_store.due(limit=limit))
+
+    def save_state(self) -> None:
+        """
+        Append the URLs queued and finished since the previous checkpoint as one JSON line,
+        so a checkpoint costs O(pages since the last one), not O(URLs seen).
+        """
+        if not self._queued_since and not self._done_since and os.path.exists(self.state_path):
+            return
+        entry = {"pages": self.pages, "queued": self._queued_since, "done": self._done_since}
+        with open(self.state_path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._queued_since = []
+        self._done_since = []
+
+    def load_state(self) -> None:
+        """
+        Replay the checkpoint lines (URLs queued but not finished are queued again, including
+        the ones in flight at a crash), then compact the file into a single line.
+        """
+        seen: set[str] = set()
+        queued: Dict[str, int] = {}
+        with open(self.state_path, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # A line torn by a crash mid-write; everything before it is intact.
+                self.pages = entry.get("pages", self.pages)
+                seen.update(entry.get("seen", ()))
+                for url, depth in entry.get("queued", ()):
+                    seen.add(url)
+                    queued[url] = depth
+                for url in entry.get("done", ()):
+                    queued.pop(url, None)
+        state = {"pages": self.pages, "seen": sorted(seen), "queued": [[url, depth] for url, depth in queued.items()]}
+        self.frontier.restore(state)
+        # Written atomically so a crash mid-write never loses the previous checkpoint.
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            fh.write(json.dumps(state, separators=(",", ":")) + "\n")
+        os.replace(tmp_path, self.state_path)
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, MutableMapping
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36"
+)
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: int = 0
+    text: str = ""
+    # Case-insensitive like ``requests``' own headers: proxies often lowercase ``etag``.
+    headers: MutableMapping[str, str] = field(default_factory=CaseInsensitiveDict)
+    error: str = ""
+
+    def __post_init__(self):
+        if not isinstance(self.headers, CaseInsensitiveDict):
+            self.headers = CaseInsensitiveDict(self.headers)
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 200 and not self.error
+
+
+class Fetcher:
+    """
+    Thread-safe page fetcher. Worker threads each get their own ``requests.Session`` but
+    share one keep-alive connection pool (up to ``pool_maxsize`` connections per host).
+    """
+
+    def __init__(self, pool_maxsize: int = 8, pool_connections: int = 64, timeout: float = 10.0, user_agent: str = USER_AGENT):
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self._adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers["User-Agent"] = self.user_agent
+            session.mount("https://", self._adapter)
+            session.mount("http://", self._adapter)
+            self._local.session = session
+        return session
+
+    def get(self, url: str, headers: Dict[str, str] | None = None) -> FetchResult:
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            return FetchResult(url, error=str(e))
+        content_type = response.headers.get("Content-Type", "")
+        text = response.text if not content_type or "html" in content_type or "text" in content_type else ""
+        return FetchResult(url, response.status_code, text, response.headers)
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import heapq
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Tuple
+from urllib.parse import urldefrag, urlsplit, urlunsplit
+
+
+def normalize_url(url: str) -> str | None:
+    """Canonical form used for de-duplication: http(s) only, lowercase host, no fragment."""
+    url, _ = urldefrag(url.strip())
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.netloc:
+        return None
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path or "/", parts.query, ""))
+
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc
+
+
+class Frontier:
+    """
+    URLs waiting to be crawled, one FIFO queue per host. ``pop`` only hands out a URL whose
+    host has a free slot (``per_host`` requests in flight) and whose politeness delay since
+    the previous request has passed; hosts are ordered by when they become ready, so popping
+    is O(log hosts). ``seen`` covers queued, in-flight and finished URLs, so nothing is queued twice.
+    """
+
+    def __init__(self, per_host: int = 2, delay_for: Callable[[str], float] | None = None):
+        self.per_host = per_host
+        self.delay_for = delay_for or (lambda host: 0.0)
+        self.seen: set[str] = set()
+        self._queues: Dict[str, Deque[Tuple[str, int]]] = {}
+        self._leased: Dict[str, int] = {}
+        self._active: Dict[str, int] = {}
+        self._next_at: Dict[str, float] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._scheduled: set[str] = set()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._leased)
+
+    def add(self, url: str, depth: int = 0) -> bool:
+        """Queue ``url`` unless it was seen before. Returns whether it was queued."""
+        if url in self.seen:
+            return False
+        self.seen.add(url)
+        self._enqueue(url, depth)
+        return True
+
+    def _enqueue(self, url: str, depth: int) -> None:
+        host = host_of(url)
+        self._queues.setdefault(host, deque()).append((url, depth))
+        self._size += 1
+        self._schedule(host)
+
+    def _schedule(self, host: str) -> None:
+        if host in self._scheduled or not self._queues.get(host) or self._active.get(host, 0) >= self.per_host:
+            return
+        self._scheduled.add(host)
+        heapq.heappush(self._heap, (self._next_at.get(host, 0.0), host))
+
+    def pop(self, now: float) -> Tuple[str, int] | None:
+        """The next ``(url, depth)`` that may be fetched at ``now``, or None if every host must wait."""
+        if not self._heap or self._heap[0][0] > now:
+            return None
+        _, host = heapq.heappop(self._heap)
+        self._scheduled.discard(host)
+        queue = self._queues[host]
+        url, depth = queue.popleft()
+        if not queue:
+            del self._queues[host]
+        self._size -= 1
+        self._active[host] = self._active.get(host, 0) + 1
+        self._leased[url] = depth
+        self._next_at[host] = now + self.delay_for(host)
+        self._schedule(host)
+        return url, depth
+
+    def done(self, url: str) -> None:
+        """Release the host slot taken by ``pop``."""
+        self._leased.pop(url, None)
+        host = host_of(url)
+        self._active[host] -= 1
+        if not self._active[host]:
+            del self._active[host]
+        self._schedule(host)
+
+    def finished(self) -> bool:
+        """Nothing left to hand out (URLs in flight may still add more)."""
+        return not self._size
+
+    def next_ready_in(self, now: float) -> float | None:
+        """Seconds until some host may be fetched again (None when nothing is queued)."""
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - now)
+
+    def snapshot(self) -> Dict[str, list]:
+        """JSON-friendly state; in-flight URLs are saved as queued so a resumed crawl retries them."""
+        queued = [[url, depth] for url, depth in self._leased.items()]
+        queued += [[url, depth] for queue in self._queues.values() for url, depth in queue]
+        return {"seen": sorted(self.seen), "queued": queued}
+
+    def restore(self, state: Dict[str, Iterable]) -> None:
+        self.seen.update(state.get("seen", ()))
+        for url, depth in state.get("queued", ()):
+            self._enqueue(url, depth)
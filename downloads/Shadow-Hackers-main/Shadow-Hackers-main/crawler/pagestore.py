@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    depth INTEGER NOT NULL DEFAULT 0,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT,
+    fetched_at REAL,
+    changed_at REAL,
+    checks INTEGER NOT NULL DEFAULT 0,
+    changes INTEGER NOT NULL DEFAULT 0,
+    interval REAL NOT NULL,
+    next_visit REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS pages_next_visit ON pages (next_visit);
+"""
+
+
+@dataclass
+class PageRecord:
+    url: str
+    depth: int
+    etag: str | None
+    last_modified: str | None
+    content_hash: str | None
+    interval: float
+
+    def validators(self) -> Dict[str, str]:
+        """Headers for a conditional GET."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageStore:
+    """
+    What the crawler knows about each URL it fetched: HTTP validators, a hash of the body and
+    when to look again. The revisit interval adapts to how often the content really changes:
+    it halves after a change and grows by ``backoff`` after an unchanged visit, within
+    ``[min_interval, max_interval]`` seconds. Used from the crawler's scheduling thread only.
+    """
+
+    def __init__(self, path: str, min_interval: float = 3600, max_interval: float = 30 * 86400, backoff: float = 1.5):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        # WAL and a long busy timeout let sharded crawler processes share one file.
+        self._conn = sqlite3.connect(path, timeout=60)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def get(self, url: str) -> PageRecord | None:
+        row = self._conn.execute(
+            "SELECT url, depth, etag, last_modified, content_hash, interval FROM pages WHERE url = ?", (url,)
+        ).fetchone()
+        return PageRecord(*row) if row else None
+
+    def record(
+        self,
+        url: str,
+        depth: int,
+        changed: bool,
+        etag: str | None = None,
+        last_modified: str | None = None,
+        content_hash: str | None = None,
+        now: float | None = None,
+    ) -> float:
+        """Store the outcome of a visit and return the next revisit time."""
+        now = time.time() if now is None else now
+        previous = self.get(url)
+        if previous is None:
+            interval = self.min_interval
+        elif changed:
+            interval = max(self.min_interval, previous.interval / 2)
+        else:
+            interval = min(self.max_interval, previous.interval * self.backoff)
+        if previous is not None and not changed:
+            # A 304 carries no body: keep the validators and hash we already have.
+            etag = etag or previous.etag
+            last_modified = last_modified or previous.last_modified
+            content_hash = content_hash or previous.content_hash
+        next_visit = now + interval
+        self._conn.execute(
+            """
+            INSERT INTO pages (url, depth, etag, last_modified, content_hash, fetched_at, changed_at, checks, changes, interval, next_visit)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 1, 1, ?, ?)
+            ON CONFLICT (url) DO UPDATE SET
+                etag = excluded.etag,
+                last_modified = excluded.last_modified,
+                content_hash = excluded.content_hash,
+                fetched_at = excluded.fetched_at,
+                changed_at = CASE WHEN ? THEN excluded.fetched_at ELSE pages.changed_at END,
+                checks = pages.checks + 1,
+                changes = pages.changes + ?,
+                interval = excluded.interval,
+                next_visit = excluded.next_visit
+            """,
+            (url, depth, etag, last_modified, content_hash, now, now, interval, next_visit, changed, int(changed)),
+        )
+        return next_visit
+
+    def due(self, now: float | None = None, limit: int | None = None) -> List[Tuple[str, int]]:
+        """``(url, depth)`` of pages whose revisit time has come, most overdue first."""
+        now = time.time() if now is None else now
+        sql = "SELECT url, depth FROM pages WHERE next_visit <= ? ORDER BY next_visit"
+        params: tuple = (now,)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (limit,)
+        return self._conn.execute(sql, params).fetchall()
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.commit()
+        self._conn.close()
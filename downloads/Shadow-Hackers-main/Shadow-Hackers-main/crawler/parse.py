@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Dict, List
+from urllib.parse import urljoin
+
+try:
+    import lxml.etree
+    import lxml.html
+except ImportError:  # optional (pip install lxml): the stdlib streaming parser is used instead
+    lxml = None
+
+from .products import Product, extract_product
+
+
+@dataclass
+class ParsedPage:
+    title: str = "No Title"
+    links: List[str] = field(default_factory=list)
+    # <meta name=...>/<meta property=...> contents plus the canonical URL, keyed by lowercase name.
+    meta: Dict[str, str] = field(default_factory=dict)
+    product: Product | None = None
+
+
+class _LinkMetaParser(HTMLParser):
+    """Single pass over the markup collecting title, hrefs and meta tags; no tree is built."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.base: str | None = None
+        self.title_parts: List[str] = []
+        self.hrefs: List[str] = []
+        self.meta: Dict[str, str] = {}
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            href = dict(attrs).get("href")
+            if href:
+                self.hrefs.append(href)
+        elif tag == "meta":
+            attrs = dict(attrs)
+            name = attrs.get("name") or attrs.get("property") or attrs.get("itemprop")
+            if name and attrs.get("content") is not None:
+                self.meta.setdefault(name.lower(), attrs["content"])
+        elif tag == "link":
+            attrs = dict(attrs)
+            if "canonical" in (attrs.get("rel") or "").lower().split() and attrs.get("href"):
+                self.meta.setdefault("canonical", attrs["href"])
+        elif tag == "title" and not self.title_parts:
+            self._in_title = True
+        elif tag == "base" and self.base is None:
+            self.base = dict(attrs).get("href")
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title_parts.append(data)
+
+
+def _extract_stdlib(url: str, html: str) -> ParsedPage:
+    parser = _LinkMetaParser()
+    parser.feed(html)
+    parser.close()
+    base = urljoin(url, parser.base) if parser.base else url
+    title = "".join(parser.title_parts).strip() or "No Title"
+    return ParsedPage(title, [urljoin(base, href) for href in parser.hrefs], parser.meta)
+
+
+def _extract_lxml(url: str, html: str) -> ParsedPage:
+    doc = lxml.html.document_fromstring(html)
+    base = doc.xpath("string(//base/@href)")
+    base = urljoin(url, base) if base else url
+    meta: Dict[str, str] = {}
+    for tag in doc.iter("meta"):
+        name = tag.get("name") or tag.get("property") or tag.get("itemprop")
+        if name and tag.get("content") is not None:
+            meta.setdefault(name.lower(), tag.get("content"))
+    canonical = doc.xpath("string(//link[@rel='canonical']/@href)")
+    if canonical:
+        meta.setdefault("canonical", canonical)
+    title = (doc.findtext(".//title") or "").strip() or "No Title"
+    return ParsedPage(title, [urljoin(base, href) for href in doc.xpath("//a/@href") if href], meta)
+
+
+def extract_links(url: str, html: str) -> ParsedPage:
+    """
+    Title, absolute links and meta tags, via lxml when it is installed. Documents lxml
+    rejects (an XML declaration with an encoding in a str, nothing but comments) go through
+    the stdlib parser instead.
+    """
+    if lxml is not None and html.strip():
+        try:
+            return _extract_lxml(url, html)
+        except (ValueError, lxml.etree.LxmlError):
+            pass
+    return _extract_stdlib(url, html)
+
+
+def parse_page(url: str, html: str) -> ParsedPage:
+    """Links and metadata for every page; product data only on pages an extractor claims."""
+    page = extract_links(url, html)
+    page.product = extract_product(url, html, page.meta)
+    return page
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from .products import Product
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    retailer TEXT NOT NULL,
+    product_key TEXT NOT NULL,
+    url TEXT NOT NULL,
+    name TEXT NOT NULL,
+    currency TEXT NOT NULL,
+    UNIQUE (retailer, product_key)
+);
+-- Clustered on (product, time): a product's history is one contiguous range scan.
+CREATE TABLE IF NOT EXISTS observations (
+    product_id INTEGER NOT NULL,
+    observed_at INTEGER NOT NULL,
+    price_minor INTEGER NOT NULL,
+    PRIMARY KEY (product_id, observed_at)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS latest (
+    product_id INTEGER PRIMARY KEY,
+    observed_at INTEGER NOT NULL,
+    checked_at INTEGER NOT NULL,
+    price_minor INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+@dataclass
+class PricePoint:
+    product_id: int
+    retailer: str
+    name: str
+    url: str
+    price: float
+    currency: str
+    # Last time the crawler saw this price.
+    checked_at: int
+
+
+def to_minor(price: float) -> int:
+    """Prices are stored as integer minor units (paise, cents) to keep rows small and exact."""
+    return round(price * 100)
+
+
+class PriceStore:
+    """
+    Append-only price observations for crawled products, stored in SQLite.
+
+    Only price changes become rows. An observation with the same price as the product's
+    latest one just bumps ``latest.checked_at``, so a price that sits still for a month
+    costs one row. The price at any moment is the last change at or before it.
+    """
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, timeout=60)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._ids: Dict[Tuple[str, str], int] = {}
+        # product id -> (observed_at of the current price, checked_at, price_minor)
+        self._latest: Dict[int, Tuple[int, int, int]] = {}
+
+    @staticmethod
+    def product_key(product: Product) -> str:
+        return product.sku or product.url
+
+    def _product_id(self, product: Product) -> int:
+        key = (product.retailer, self.product_key(product))
+        product_id = self._ids.get(key)
+        if product_id is None:
+            self._conn.execute(
+                """
+                INSERT INTO products (retailer, product_key, url, name, currency) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (retailer, product_key) DO UPDATE SET url = excluded.url, name = excluded.name
+                """,
+                (*key, product.url, product.name, product.currency),
+            )
+            product_id = self._conn.execute(
+                "SELECT id FROM products WHERE retailer = ? AND product_key = ?", key
+            ).fetchone()[0]
+            self._ids[key] = product_id
+        return product_id
+
+    def _latest_for(self, product_id: int) -> Tuple[int, int, int] | None:
+        if product_id not in self._latest:
+            row = self._conn.execute(
+                "SELECT observed_at, checked_at, price_minor FROM latest WHERE product_id = ?", (product_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._latest[product_id] = row
+        return self._latest[product_id]
+
+    def add_many(self, observations: Iterable[Tuple[Product, int | None]]) -> int:
+        """
+        Ingest ``(product, observed_at)`` pairs (``None`` = now) in one transaction.
+        Returns how many were price changes (and so new rows).
+        """
+        now = int(time.time())
+        rows: List[Tuple[int, int, int]] = []
+        touched: set[int] = set()
+        with self._conn:
+            for product, observed_at in observations:
+                observed_at = now if observed_at is None else int(observed_at)
+                product_id = self._product_id(product)
+                price = to_minor(product.price)
+                latest = self._latest_for(product_id)
+                if latest is not None and (observed_at < latest[1] or (observed_at == latest[1] and price == latest[2])):
+                    continue  # older than the last check, or a repeat of it: history is append-only
+                if latest is None or latest[2] != price:
+                    rows.append((product_id, observed_at, price))
+                    self._latest[product_id] = (observed_at, observed_at, price)
+                else:
+                    self._latest[product_id] = (latest[0], observed_at, price)
+                touched.add(product_id)
+            # A change seen in the same second as the previous one replaces it: the later price wins.
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO observations (product_id, observed_at, price_minor) VALUES (?, ?, ?)", rows
+            )
+            self._conn.executemany(
+                """
+                INSERT INTO latest (product_id, observed_at, checked_at, price_minor) VALUES (?, ?, ?, ?)
+                ON CONFLICT (product_id) DO UPDATE SET
+                    observed_at = excluded.observed_at,
+                    checked_at = excluded.checked_at,
+                    price_minor = excluded.price_minor
+                """,
+                [(product_id, *self._latest[product_id]) for product_id in touched],
+            )
+        return len(rows)
+
+    def add(self, product: Product, observed_at: int | None = None) -> bool:
+        return bool(self.add_many([(product, observed_at)]))
+
+    def latest_prices(self, product_ids: Sequence[int]) -> List[PricePoint]:
+        """Current price of each product (e.g. one product across retailers), cheapest first."""
+        if not product_ids:
+            return []
+        marks = ",".join("?" * len(product_ids))
+        rows = self._conn.execute(
+            f"""
+            SELECT p.id, p.retailer, p.name, p.url, l.price_minor, p.currency, l.checked_at
+            FROM latest l JOIN products p ON p.id = l.product_id
+            WHERE l.product_id IN ({marks})
+            ORDER BY l.price_minor
+            """,
+            list(product_ids),
+        ).fetchall()
+        return [PricePoint(pid, retailer, name, url, price / 100, currency, at) for pid, retailer, name, url, price, currency, at in rows]
+
+    def latest_by_retailer(self, retailer: str, limit: int = 100, offset: int = 0) -> List[PricePoint]:
+        rows = self._conn.execute(
+            """
+            SELECT p.id, p.retailer, p.name, p.url, l.price_minor, p.currency, l.checked_at
+            FROM products p JOIN latest l ON l.product_id = p.id
+            WHERE p.retailer = ?
+            ORDER BY p.id LIMIT ? OFFSET ?
+            """,
+            (retailer, limit, offset),
+        ).fetchall()
+        return [PricePoint(pid, r, name, url, price / 100, currency, at) for pid, r, name, url, price, currency, at in rows]
+
+    def history(self, product_id: int, since: int | None = None, until: int | None = None) -> List[Tuple[int, float]]:
+        """
+        ``(timestamp, price)`` for each price change in ``[since, until]``, oldest first,
+        starting with the price already in force at ``since``.
+        """
+        since = since or 0
+        until = until if until is not None else 2**62
+        start = self._conn.execute(
+            """
+            SELECT observed_at, price_minor FROM observations
+            WHERE product_id = ? AND observed_at <= ? ORDER BY observed_at DESC LIMIT 1
+            """,
+            (product_id, since),
+        ).fetchall()
+        rows = self._conn.execute(
+            """
+            SELECT observed_at, price_minor FROM observations
+            WHERE product_id = ? AND observed_at > ? AND observed_at <= ? ORDER BY observed_at
+            """,
+            (product_id, since, until),
+        ).fetchall()
+        return [(at, price / 100) for at, price in start + rows]
+
+    def products(self) -> Iterator[Tuple[int, str, str]]:
+        """``(product_id, name, retailer)`` for every known product."""
+        yield from self._conn.execute("SELECT id, name, retailer FROM products ORDER BY id")
+
+    def product_id(self, retailer: str, product_key: str) -> int | None:
+        row = self._conn.execute(
+            "SELECT id FROM products WHERE retailer = ? AND product_key = ?", (retailer, product_key)
+        ).fetchone()
+        return row[0] if row else None
+
+    def close(self) -> None:
+        self._conn.close()
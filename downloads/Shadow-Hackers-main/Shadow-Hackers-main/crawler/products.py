@@ -0,0 +1,178 @@
+"""
+Per-site product extractors. Each extractor says which pages it handles (host and URL
+pattern, cheap to check) and only those pages pay for product extraction. Register extra
+sites with ``register``; do it at import time so process-pool workers see them too.
+"""
+from __future__ import annotations
+
+import html as htmllib
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Tuple
+from urllib.parse import urlsplit
+
+CURRENCY_SYMBOLS = {"₹": "INR", "Rs": "INR", "$": "USD", "€": "EUR", "£": "GBP"}
+_PRICE = re.compile(r"\d[\d,]*(?:\.\d+)?")
+_LD_JSON = re.compile(r"<script[^>]+application/ld\+json[^>]*>(.*?)</script>", re.I | re.S)
+_TAGS = re.compile(r"<[^>]+>")
+
+
+@dataclass
+class Product:
+    url: str
+    retailer: str
+    name: str
+    price: float
+    currency: str
+    sku: str = ""
+
+
+def parse_price(text: Any) -> float | None:
+    """``"₹1,23,456.00"`` -> ``123456.0``; None when there is no number."""
+    match = _PRICE.search(str(text or ""))
+    return float(match.group().replace(",", "")) if match else None
+
+
+def detect_currency(text: str, default: str) -> str:
+    return next((code for symbol, code in CURRENCY_SYMBOLS.items() if symbol in text), default)
+
+
+def _clean(fragment: str) -> str:
+    return " ".join(htmllib.unescape(_TAGS.sub(" ", fragment)).split())
+
+
+class ProductExtractor:
+    """Base class: ``hosts`` are host suffixes (empty = any host), ``product_path`` a URL path regex."""
+
+    hosts: Tuple[str, ...] = ()
+    product_path: re.Pattern | None = None
+    currency = "INR"
+
+    def handles(self, url: str, html: str, meta: Dict[str, str]) -> bool:
+        parts = urlsplit(url)
+        host = parts.netloc.lower()
+        if self.hosts and not any(host == h or host.endswith("." + h) for h in self.hosts):
+            return False
+        return self.product_path is None or bool(self.product_path.search(parts.path))
+
+    def extract(self, url: str, html: str, meta: Dict[str, str]) -> Product | None:
+        raise NotImplementedError
+
+    def currency_for(self, url: str) -> str:
+        return self.currency
+
+    def sku(self, url: str) -> str:
+        match = self.product_path.search(urlsplit(url).path) if self.product_path else None
+        return match.group(match.lastindex or 0) if match else ""
+
+
+def _ld_products(html: str) -> Iterator[Dict[str, Any]]:
+    for block in _LD_JSON.findall(html):
+        try:
+            data = json.loads(block)
+        except ValueError:
+            continue
+        stack = [data]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, list):
+                stack.extend(item)
+            elif isinstance(item, dict):
+                kind = item.get("@type")
+                if kind == "Product" or (isinstance(kind, list) and "Product" in kind):
+                    yield item
+                stack.extend(item.get("@graph", []) if isinstance(item.get("@graph"), list) else [])
+
+
+class StructuredDataExtractor(ProductExtractor):
+    """schema.org ``Product`` JSON-LD, then OpenGraph ``product:price:*`` meta tags."""
+
+    def handles(self, url: str, html: str, meta: Dict[str, str]) -> bool:
+        if self.hosts or self.product_path is not None:
+            return super().handles(url, html, meta)
+        return (
+            meta.get("og:type", "").lower() == "product"
+            or "product:price:amount" in meta
+            or ("application/ld+json" in html and '"Product"' in html)
+        )
+
+    def extract(self, url: str, html: str, meta: Dict[str, str]) -> Product | None:
+        retailer = urlsplit(url).netloc.lower()
+        for item in _ld_products(html):
+            offers = item.get("offers") or {}
+            offer = offers[0] if isinstance(offers, list) and offers else offers
+            if not isinstance(offer, dict):
+                continue
+            price = parse_price(offer.get("price") or offer.get("lowPrice"))
+            if price is not None:
+                return Product(
+                    url,
+                    retailer,
+                    str(item.get("name") or meta.get("og:title") or ""),
+                    price,
+                    str(offer.get("priceCurrency") or self.currency_for(url)),
+                    str(item.get("sku") or self.sku(url)),
+                )
+        price = parse_price(meta.get("product:price:amount") or meta.get("og:price:amount"))
+        if price is None:
+            return None
+        currency = meta.get("product:price:currency") or meta.get("og:price:currency") or self.currency_for(url)
+        return Product(url, retailer, meta.get("og:title", ""), price, currency, self.sku(url))
+
+
+class RegexExtractor(ProductExtractor):
+    """Pulls name and price out of the markup with ``name_re``/``price_re`` (first group)."""
+
+    name_re: re.Pattern
+    price_re: re.Pattern
+
+    def extract(self, url: str, html: str, meta: Dict[str, str]) -> Product | None:
+        price_match = self.price_re.search(html)
+        price = parse_price(price_match.group(1)) if price_match else None
+        if price is None:
+            return None
+        name_match = self.name_re.search(html)
+        name = _clean(name_match.group(1)) if name_match else meta.get("og:title", "")
+        currency = detect_currency(price_match.group(0), self.currency_for(url))
+        return Product(url, urlsplit(url).netloc.lower(), name, price, currency, self.sku(url))
+
+
+class AmazonExtractor(RegexExtractor):
+    hosts = ("amazon.in", "amazon.com")
+    product_path = re.compile(r"/(?:dp|gp/product)/([A-Z0-9]{10})")
+    name_re = re.compile(r'id="productTitle"[^>]*>(.*?)</span>', re.S)
+    price_re = re.compile(r'class="a-(?:price-whole|offscreen)">\s*([^<]+)<')
+
+    def currency_for(self, url: str) -> str:
+        return "USD" if urlsplit(url).netloc.endswith("amazon.com") else "INR"
+
+
+class FlipkartExtractor(RegexExtractor):
+    hosts = ("flipkart.com",)
+    product_path = re.compile(r"/p/(itm[0-9a-z]+)")
+    name_re = re.compile(r'<span class="(?:B_NuCI|VU-ZEz)[^"]*"[^>]*>(.*?)</span>', re.S)
+    price_re = re.compile(r'<div class="(?:_30jeq3|Nx9bqj)[^"]*"[^>]*>\s*(₹?[\d,]+)')
+
+
+class CromaExtractor(StructuredDataExtractor):
+    hosts = ("croma.com",)
+    product_path = re.compile(r"/p/(\d+)")
+
+
+# Site-specific extractors first; the structured-data fallback catches any other shop.
+_EXTRACTORS: List[ProductExtractor] = [AmazonExtractor(), FlipkartExtractor(), CromaExtractor(), StructuredDataExtractor()]
+
+
+def register(extractor: ProductExtractor) -> None:
+    """Add a site extractor; it is tried before the generic structured-data one."""
+    _EXTRACTORS.insert(len(_EXTRACTORS) - 1, extractor)
+
+
+def extract_product(url: str, html: str, meta: Dict[str, str]) -> Product | None:
+    for extractor in _EXTRACTORS:
+        if extractor.handles(url, html, meta):
+            product = extractor.extract(url, html, meta)
+            if product is not None:
+                return product
+    return None
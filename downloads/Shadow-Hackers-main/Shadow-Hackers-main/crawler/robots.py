@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import threading
+from typing import Dict
+from urllib.robotparser import RobotFileParser
+
+from .fetcher import Fetcher
+from .frontier import host_of
+
+
+class RobotsCache:
+    """robots.txt per host, fetched once (concurrent first requests for a host wait for it)."""
+
+    def __init__(self, fetcher: Fetcher, user_agent: str = "*", default_delay: float = 1.0):
+        self.fetcher = fetcher
+        self.user_agent = user_agent
+        self.default_delay = default_delay
+        self._parsers: Dict[str, RobotFileParser | None] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _parser(self, url: str) -> RobotFileParser | None:
+        host = host_of(url)
+        if host in self._parsers:
+            return self._parsers[host]
+        with self._lock:
+            host_lock = self._locks.setdefault(host, threading.Lock())
+        with host_lock:
+            if host not in self._parsers:
+                self._parsers[host] = self._load(url.split("://", 1)[0], host)
+        return self._parsers[host]
+
+    def _load(self, scheme: str, host: str) -> RobotFileParser | None:
+        result = self.fetcher.get(f"{scheme}://{host}/robots.txt")
+        # Missing robots.txt (or an unreachable one) places no restrictions.
+        if not result.ok:
+            return None
+        parser = RobotFileParser()
+        parser.parse(result.text.splitlines())
+        return parser
+
+    def allowed(self, url: str) -> bool:
+        parser = self._parser(url)
+        return parser is None or parser.can_fetch(self.user_agent, url)
+
+    def delay(self, host: str) -> float:
+        """Crawl-delay for ``host`` once its robots.txt is known, else the default."""
+        parser = self._parsers.get(host)
+        delay = parser.crawl_delay(self.user_agent) if parser else None
+        return float(delay) if delay is not None else self.default_delay
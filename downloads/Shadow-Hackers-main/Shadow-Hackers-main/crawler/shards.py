@@ -0,0 +1,320 @@
+"""
+Persistent, sharded crawl frontier for multi-process crawling.
+
+Every URL lives in one SQLite table together with its shard (a stable hash of its host)
+and its state: queued, leased to a worker, or done. The table doubles as the global
+seen-set. Worker ``i`` of ``n`` owns the shards ``s`` with ``s % n == i``, so each host is
+crawled by exactly one process and per-host politeness stays a local concern of that
+process's in-memory ``Frontier``. Workers lease URLs from their shards in batches, write
+discovered links (for any shard) and finished URLs back in short transactions, and the
+coordinator returns leases of a previous run to the queue, so a crashed or interrupted
+crawl resumes where it stopped (URLs in flight at the crash are fetched again).
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import zlib
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Callable, ContextManager, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from .frontier import Frontier, host_of, normalize_url
+
+QUEUED, LEASED, DONE = 0, 1, 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    shard INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    state INTEGER NOT NULL DEFAULT 0
+);
+-- Leasing reads one shard's queued URLs in discovery order.
+CREATE INDEX IF NOT EXISTS urls_shard_state ON urls (shard, state, id);
+CREATE TABLE IF NOT EXISTS shards (
+    shard INTEGER PRIMARY KEY,
+    queued INTEGER NOT NULL DEFAULT 0,
+    leased INTEGER NOT NULL DEFAULT 0,
+    done INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER);
+"""
+
+
+def shard_of(url: str, shards: int) -> int:
+    """Stable across processes and runs (unlike ``hash``)."""
+    return zlib.crc32(host_of(url).encode()) % shards
+
+
+class FrontierStore:
+    """
+    The shared frontier table. Each process opens its own store on the same file; all
+    writes are short ``BEGIN IMMEDIATE`` transactions in WAL mode, so readers never block
+    and writers queue behind each other for milliseconds.
+    """
+
+    def __init__(self, path: str, shards: int = 64, timeout: float = 60.0):
+        self._conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        with self._transaction():
+            self._conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('shards', ?)", (shards,))
+            # The shard count is fixed when the store is created: changing it would move hosts.
+            self.shards = self._conn.execute("SELECT value FROM meta WHERE key = 'shards'").fetchone()[0]
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO shards (shard) VALUES (?)", [(shard,) for shard in range(self.shards)]
+            )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _insert(self, conn: sqlite3.Connection, items: Iterable[Tuple[str, int]]) -> int:
+        added: Dict[int, int] = {}
+        for url, depth in items:
+            shard = shard_of(url, self.shards)
+            cursor = conn.execute("INSERT OR IGNORE INTO urls (url, shard, depth) VALUES (?, ?, ?)", (url, shard, depth))
+            if cursor.rowcount:
+                added[shard] = added.get(shard, 0) + 1
+        conn.executemany("UPDATE shards SET queued = queued + ? WHERE shard = ?", [(n, s) for s, n in added.items()])
+        return sum(added.values())
+
+    def add_many(self, items: Iterable[Tuple[str, int]]) -> int:
+        """Queue ``(url, depth)`` pairs not seen before; returns how many were new."""
+        with self._transaction() as conn:
+            return self._insert(conn, items)
+
+    def sync(
+        self,
+        links: Sequence[Tuple[str, int]],
+        done: Sequence[str],
+        shards: Sequence[int],
+        want: int,
+    ) -> List[Tuple[str, int]]:
+        """
+        One worker round trip: queue discovered ``links``, mark ``done`` URLs finished and
+        lease up to ``want`` queued URLs from ``shards`` (within the run's page budget).
+        """
+        with self._transaction() as conn:
+            if links:
+                self._insert(conn, links)
+            if done:
+                finished: Dict[int, int] = {}
+                for url in done:
+                    row = conn.execute(
+                        "UPDATE urls SET state = ? WHERE url = ? AND state = ? RETURNING shard", (DONE, url, LEASED)
+                    ).fetchone()
+                    if row:
+                        finished[row[0]] = finished.get(row[0], 0) + 1
+                conn.executemany(
+                    "UPDATE shards SET leased = leased - ?, done = done + ? WHERE shard = ?",
+                    [(n, n, s) for s, n in finished.items()],
+                )
+            budget = conn.execute("SELECT value FROM meta WHERE key = 'budget'").fetchone()
+            if budget is not None and budget[0] is not None:
+                want = min(want, budget[0])
+            leased: List[Tuple[str, int]] = []
+            if want > 0 and shards:
+                marks = ",".join("?" * len(shards))
+                ready = conn.execute(
+                    f"SELECT shard FROM shards WHERE queued > 0 AND shard IN ({marks})", list(shards)
+                ).fetchall()
+                for (shard,) in ready:
+                    rows = conn.execute(
+                        "SELECT id, url, depth FROM urls WHERE shard = ? AND state = ? ORDER BY id LIMIT ?",
+                        (shard, QUEUED, want - len(leased)),
+                    ).fetchall()
+                    conn.executemany("UPDATE urls SET state = ? WHERE id = ?", [(LEASED, row[0]) for row in rows])
+                    conn.execute(
+                        "UPDATE shards SET queued = queued - ?, leased = leased + ? WHERE shard = ?",
+                        (len(rows), len(rows), shard),
+                    )
+                    leased += [(url, depth) for _, url, depth in rows]
+                    if len(leased) >= want:
+                        break
+                if budget is not None and budget[0] is not None:
+                    conn.execute("UPDATE meta SET value = value - ? WHERE key = 'budget'", (len(leased),))
+            return leased
+
+    def begin_run(self, pages: int | None = None) -> int:
+        """
+        Prepare a run while no worker is running: return leases of an interrupted run to the
+        queue, cap how many URLs may be leased (None = unlimited) and clear a stop request.
+        Returns how many leases were released.
+        """
+        with self._transaction() as conn:
+            count = conn.execute("UPDATE urls SET state = ? WHERE state = ?", (QUEUED, LEASED)).rowcount
+            conn.execute("UPDATE shards SET queued = queued + leased, leased = 0")
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('budget', ?)", (pages,))
+            conn.execute("DELETE FROM meta WHERE key = 'stopped'")
+            return count
+
+    def stop(self) -> None:
+        """Ask every worker to finish what it holds and exit."""
+        with self._transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('stopped', 1)")
+
+    def counts(self) -> Dict[str, int]:
+        queued, leased, done = self._conn.execute(
+            "SELECT COALESCE(SUM(queued), 0), COALESCE(SUM(leased), 0), COALESCE(SUM(done), 0) FROM shards"
+        ).fetchone()
+        return {"queued": queued, "leased": leased, "done": done}
+
+    def has_work(self) -> bool:
+        """True while any shard has queued URLs (within budget) or URLs still being fetched."""
+        meta = dict(self._conn.execute("SELECT key, value FROM meta WHERE key IN ('budget', 'stopped')").fetchall())
+        if meta.get("stopped"):
+            return False
+        counts = self.counts()
+        budget = meta.get("budget")
+        queued = counts["queued"] if budget is None else min(counts["queued"], budget)
+        return bool(queued or counts["leased"])
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class ShardFrontier(Frontier):
+    """
+    A ``Frontier`` backed by a ``FrontierStore``: it owns a set of shards, keeps a leased
+    batch of their URLs in memory for the usual per-host scheduling, and sends new links and
+    finished URLs to the store every ``sync_interval`` seconds or ``batch`` items. It is
+    finished only when no shard anywhere has work left, since other workers keep finding
+    links on this worker's hosts until they are done themselves.
+    """
+
+    def __init__(
+        self,
+        store: FrontierStore,
+        shards: Sequence[int],
+        per_host: int = 2,
+        delay_for: Callable[[str], float] | None = None,
+        batch: int = 200,
+        sync_interval: float = 0.25,
+    ):
+        super().__init__(per_host, delay_for)
+        self.store = store
+        self.shards = list(shards)
+        self.batch = batch
+        self.sync_interval = sync_interval
+        self._links: List[Tuple[str, int]] = []
+        self._done: List[str] = []
+        self._synced_at = float("-inf")
+        self._store_has_work = True
+
+    def add(self, url: str, depth: int = 0) -> bool:
+        """Send ``url`` to the store, which de-duplicates globally; ``seen`` only saves repeats."""
+        if url in self.seen:
+            return False
+        self.seen.add(url)
+        self._links.append((url, depth))
+        return True
+
+    def done(self, url: str) -> None:
+        super().done(url)
+        self._done.append(url)
+
+    def sync(self, now: float) -> None:
+        want = max(0, 2 * self.batch - len(self) - self.in_flight)
+        for url, depth in self.store.sync(self._links, self._done, self.shards, want):
+            self.seen.add(url)
+            self._enqueue(url, depth)
+        self._links.clear()
+        self._done.clear()
+        self._synced_at = now
+        self._store_has_work = self.store.has_work()
+
+    def _maybe_sync(self, now: float) -> None:
+        overdue = now - self._synced_at >= self.sync_interval
+        if len(self._links) + len(self._done) >= self.batch or (overdue and (self._links or self._done or len(self) < self.batch)):
+            self.sync(now)
+
+    def pop(self, now: float) -> Tuple[str, int] | None:
+        self._maybe_sync(now)
+        return super().pop(now)
+
+    def next_ready_in(self, now: float) -> float | None:
+        ready_in = super().next_ready_in(now)
+        if self.finished():
+            return ready_in
+        poll = max(0.0, self._synced_at + self.sync_interval - now)
+        return poll if ready_in is None else min(ready_in, poll)
+
+    def finished(self) -> bool:
+        return not len(self) and not self.in_flight and not self._links and not self._done and not self._store_has_work
+
+    def restore(self, state: Dict[str, Iterable]) -> None:
+        raise TypeError("ShardFrontier state lives in its FrontierStore")
+
+
+def owned_shards(worker: int, workers: int, shards: int) -> List[int]:
+    return [shard for shard in range(shards) if shard % workers == worker]
+
+
+def _run_worker(
+    path: str,
+    worker: int,
+    workers: int,
+    setup: Callable[[int], ContextManager[Dict]] | None,
+    options: Dict,
+) -> int:
+    from .engine import Crawler
+
+    store = FrontierStore(path)
+    try:
+        frontier = ShardFrontier(store, owned_shards(worker, workers, store.shards), per_host=options.get("per_host", 2))
+        with (setup(worker) if setup else _no_setup()) as extra:
+            crawler = Crawler(frontier=frontier, **options, **extra)
+            return crawler.run()
+    finally:
+        store.close()
+
+
+@contextmanager
+def _no_setup() -> Iterator[Dict]:
+    yield {}
+
+
+def crawl_sharded(
+    path: str,
+    start_urls: Iterable[str] = (),
+    processes: int | None = None,
+    max_pages: int | None = None,
+    shards: int = 64,
+    setup: Callable[[int], ContextManager[Dict]] | None = None,
+    **options,
+) -> int:
+    """
+    Crawl with ``processes`` worker processes sharing the frontier stored at ``path``;
+    returns the pages fetched by this run. An existing store is resumed: leases left by an
+    interrupted run are queued again and ``start_urls`` already known are ignored.
+    ``options`` go to each worker's ``Crawler``; ``setup(worker)`` is entered in each
+    worker and yields extra ``Crawler`` options (``on_page``, ``page_store``, ...) built in
+    that process. Both must be picklable: module-level functions or partials of them.
+    Stores are committed after every page by default (``checkpoint_every=1``) so processes
+    sharing a page or price store never wait on each other's open transactions. If a
+    worker fails the others are stopped and the error is raised; the next run resumes.
+    """
+    processes = processes or os.cpu_count() or 1
+    options.setdefault("checkpoint_every", 1)
+    store = FrontierStore(path, shards)
+    try:
+        store.begin_run(max_pages)
+        store.add_many((url, 0) for url in filter(None, map(normalize_url, start_urls)))
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [pool.submit(_run_worker, path, worker, processes, setup, dict(options)) for worker in range(processes)]
+            wait(futures, return_when=FIRST_EXCEPTION)
+            if any(future.done() and future.exception() for future in futures):
+                store.stop()
+            return sum(future.result() for future in futures)
+    finally:
+        store.close()
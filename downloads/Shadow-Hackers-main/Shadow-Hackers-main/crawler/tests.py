@@ -0,0 +1,256 @@
+"""
+Crawler tests; run from the repository root with ``python -m unittest crawler.tests``.
+No network access is needed: fetches are answered by ``StubFetcher``.
+"""
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import unittest
+from typing import Dict
+from unittest import mock
+
+from .engine import Crawler
+from .fetcher import FetchResult
+from .pagestore import PageStore
+from .pricestore import PriceStore
+from .products import Product
+from .parse import extract_links
+from .shards import FrontierStore, crawl_sharded
+
+
+def html(title: str, *links: str) -> str:
+    anchors = "".join(f'<a href="{link}">{link}</a>' for link in links)
+    return f"<html><head><title>{title}</title></head><body>{anchors}</body></html>"
+
+
+class StubFetcher:
+    """Serves ``pages`` (url -> html) and records the headers of every request."""
+
+    def __init__(self, pages: Dict[str, str], headers: Dict[str, Dict[str, str]] | None = None):
+        self.pages = pages
+        self.headers = headers or {}
+        self.requests: list = []
+
+    def get(self, url: str, headers: Dict[str, str] | None = None) -> FetchResult:
+        self.requests.append((url, dict(headers or {})))
+        if url not in self.pages:
+            return FetchResult(url, 404)
+        return FetchResult(url, 200, self.pages[url], dict(self.headers.get(url, {})))
+
+
+SITE = {
+    "http://shop.test/": html("Home", "/a", "/b"),
+    "http://shop.test/a": html("A", "/c"),
+    "http://shop.test/b": html("B"),
+    "http://shop.test/c": html("C"),
+}
+
+
+def crawler_for(fetcher: StubFetcher, **options) -> Crawler:
+    return Crawler(workers=2, delay=0, respect_robots=False, fetcher=fetcher, **options)
+
+
+class CrawlerTests(unittest.TestCase):
+    def test_crawls_every_reachable_page_once(self):
+        fetcher = StubFetcher(SITE)
+        self.assertEqual(crawler_for(fetcher).run(["http://shop.test/"]), 4)
+        self.assertEqual(sorted(url for url, _ in fetcher.requests), sorted(SITE))
+
+    def test_page_that_fails_to_parse_does_not_stop_the_crawl(self):
+        from . import parse
+
+        real = parse.parse_page
+        seen = []
+
+        def flaky(url, text):
+            if url.endswith("/a"):
+                raise ValueError("malformed page")
+            return real(url, text)
+
+        crawler = crawler_for(StubFetcher(SITE), on_page=seen.append)
+        with mock.patch("crawler.engine.parse_page", side_effect=flaky):
+            self.assertEqual(crawler.run(["http://shop.test/"]), 3)
+        failed = [page for page in seen if page.error]
+        self.assertEqual([page.url for page in failed], ["http://shop.test/a"])
+        self.assertIn("malformed page", failed[0].error)
+
+
+class ParseTests(unittest.TestCase):
+    XHTML = '<?xml version="1.0" encoding="utf-8"?><html><head><title>X</title></head><body><a href="/a">a</a></body></html>'
+
+    def test_xhtml_with_encoding_declaration(self):
+        page = extract_links("http://shop.test/", self.XHTML)
+        self.assertEqual((page.title, page.links), ("X", ["http://shop.test/a"]))
+
+    def test_comment_only_document(self):
+        page = extract_links("http://shop.test/", "<!-- nothing here -->")
+        self.assertEqual((page.title, page.links), ("No Title", []))
+
+
+class CheckpointTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.state = os.path.join(tmp.name, "state.jsonl")
+
+    def test_resume_fetches_only_the_rest(self):
+        first = StubFetcher(SITE)
+        crawler_for(first, state_path=self.state, checkpoint_every=1).run(["http://shop.test/"], max_pages=2)
+        second = StubFetcher(SITE)
+        resumed = crawler_for(second, state_path=self.state)
+        self.assertEqual(resumed.run(["http://shop.test/"]), 4)
+        fetched = [url for url, _ in first.requests + second.requests]
+        self.assertEqual(sorted(fetched), sorted(SITE))
+
+    def test_checkpoint_hook_follows_the_restored_page_count(self):
+        crawler_for(StubFetcher(SITE), state_path=self.state, checkpoint_every=1).run(["http://shop.test/"], max_pages=1)
+        checkpoints = []
+        resumed = crawler_for(StubFetcher(SITE), state_path=self.state, checkpoint_every=2)
+        resumed.on_checkpoint = lambda: checkpoints.append(resumed.pages)
+        resumed.run(["http://shop.test/"])
+        # Pages 2 and 4 are the crawler's own checkpoints; the last call is the final save.
+        self.assertEqual(checkpoints, [2, 4, 4])
+
+    def test_checkpoints_append_deltas_and_survive_a_torn_line(self):
+        crawler = crawler_for(StubFetcher(SITE), state_path=self.state, checkpoint_every=1)
+        crawler.run(["http://shop.test/"], max_pages=3)
+        with open(self.state, encoding="utf-8") as fh:
+            entries = [json.loads(line) for line in fh]
+        self.assertGreaterEqual(len(entries), 3)
+        self.assertTrue(all(len(entry["done"]) <= 1 for entry in entries))
+        with open(self.state, "a", encoding="utf-8") as fh:
+            fh.write('{"pages": 9, "queued": [["http://shop.test/x"')
+        resumed = crawler_for(StubFetcher(SITE), state_path=self.state)
+        self.assertEqual(resumed.pages, 3)
+        self.assertEqual([url for url, _ in resumed.frontier._queues["shop.test"]], ["http://shop.test/c"])
+        with open(self.state, encoding="utf-8") as fh:
+            self.assertEqual(len(fh.readlines()), 1)
+
+
+class RecrawlTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = PageStore(os.path.join(tmp.name, "pages.db"))
+        self.addCleanup(self.store.close)
+
+    def crawl(self, fetcher: StubFetcher) -> list:
+        pages = []
+        crawler_for(fetcher, page_store=self.store, on_page=pages.append).run(["http://shop.test/b"])
+        return pages
+
+    def test_lowercase_validators_are_sent_back(self):
+        headers = {"http://shop.test/b": {"etag": '"v1"', "last-modified": "Mon, 01 Jan 2024 00:00:00 GMT"}}
+        self.crawl(StubFetcher(SITE, headers))
+        self.assertEqual(self.store.get("http://shop.test/b").etag, '"v1"')
+        fetcher = StubFetcher(SITE, headers)
+        self.crawl(fetcher)
+        sent = fetcher.requests[0][1]
+        self.assertEqual(sent["If-None-Match"], '"v1"')
+        self.assertEqual(sent["If-Modified-Since"], "Mon, 01 Jan 2024 00:00:00 GMT")
+
+    def test_volatile_markup_is_not_a_change(self):
+        page = html("B") + "<!-- rendered at {} token {} -->"
+        self.assertTrue(self.crawl(StubFetcher({"http://shop.test/b": page.format(1, "abc")}))[0].changed)
+        self.assertFalse(self.crawl(StubFetcher({"http://shop.test/b": page.format(2, "xyz")}))[0].changed)
+        self.assertTrue(self.crawl(StubFetcher({"http://shop.test/b": html("B2")}))[0].changed)
+
+
+class PriceStoreTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = PriceStore(os.path.join(tmp.name, "prices.db"))
+        self.addCleanup(self.store.close)
+
+    def observe(self, price: float, at: int) -> bool:
+        return self.store.add(Product("http://shop.test/p", "shop.test", "Phone", price, "INR", "p1"), at)
+
+    def test_only_changes_become_history(self):
+        self.assertTrue(self.observe(100, 10))
+        self.assertFalse(self.observe(100, 20))
+        self.assertFalse(self.observe(90, 5))
+        self.assertTrue(self.observe(90, 30))
+        product_id = self.store.product_id("shop.test", "p1")
+        self.assertEqual(self.store.history(product_id), [(10, 100.0), (30, 90.0)])
+        self.assertEqual(self.store.latest_prices([product_id])[0].checked_at, 30)
+
+    def test_change_within_the_same_second_is_kept(self):
+        self.observe(100, 10)
+        self.observe(100, 20)
+        self.assertTrue(self.observe(80, 20))
+        self.assertTrue(self.observe(70, 20))
+        self.assertFalse(self.observe(70, 20))
+        self.assertEqual(self.store.history(self.store.product_id("shop.test", "p1")), [(10, 100.0), (20, 70.0)])
+
+
+class ShardedFrontierTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "frontier.db")
+
+    def test_interrupted_leases_are_queued_again(self):
+        store = FrontierStore(self.path, shards=4)
+        self.addCleanup(store.close)
+        self.assertEqual(store.add_many([("http://a.test/", 0), ("http://b.test/", 0), ("http://a.test/", 0)]), 2)
+        leased = store.sync([], [], range(4), want=10)
+        self.assertEqual(len(leased), 2)
+        store.sync([("http://a.test/x", 1)], [leased[0][0]], range(4), want=0)
+        self.assertEqual(store.counts(), {"queued": 1, "leased": 1, "done": 1})
+        # The worker holding the second lease "crashed"; the next run queues it again.
+        self.assertEqual(store.begin_run(), 1)
+        self.assertEqual(store.counts(), {"queued": 2, "leased": 0, "done": 1})
+
+    def test_budgeted_run_resumes_without_refetching(self):
+        options = {"fetcher": StubFetcher(SITE), "respect_robots": False, "delay": 0, "workers": 2}
+        first = crawl_sharded(self.path, ["http://shop.test/"], processes=2, max_pages=2, shards=4, **options)
+        second = crawl_sharded(self.path, ["http://shop.test/"], processes=2, shards=4, **options)
+        self.assertEqual((first, second), (2, 2))
+        store = FrontierStore(self.path)
+        self.addCleanup(store.close)
+        self.assertEqual(store.counts(), {"queued": 0, "leased": 0, "done": 4})
+
+
+class MatchIndexTests(unittest.TestCase):
+    def setUp(self):
+        try:
+            from .matching import MatchIndex
+        except ImportError:
+            self.skipTest("crawler.matching needs NumPy")
+        self.index = MatchIndex()
+
+    def test_signature_is_the_exact_universal_hash(self):
+        import zlib
+
+        from .matching import shingles
+
+        text = "apple iphone 15 128gb black"
+        mersenne = (1 << 61) - 1
+        values = [zlib.crc32(word.encode()) for word in shingles(text)]
+        expected = [
+            min((int(a) * x + int(b)) % mersenne for x in values) & 0xFFFFFFFF
+            for a, b in zip(self.index._a, self.index._b)
+        ]
+        self.assertEqual(self.index.signature(text).tolist(), expected)
+
+    def test_matches_the_same_product_across_retailers(self):
+        self.index.add_many(
+            [
+                (1, "Apple iPhone 15 (Black, 128 GB)", "www.flipkart.com"),
+                (2, "Apple iPhone 14 (Black, 128 GB)", "www.flipkart.com"),
+                (3, "Sony WH-1000XM5 Wireless Headphones", "www.flipkart.com"),
+            ]
+        )
+        matches = self.index.match("APPLE iPhone 15 128GB - Black", exclude_retailer="www.amazon.in")
+        self.assertEqual(matches[0].item_id, 1)
+        self.assertNotIn(3, [match.item_id for match in matches])
+        scores = {match.item_id: match.score for match in self.index.match("Apple iPhone 15 128 GB Black", min_score=0)}
+        self.assertGreater(scores[1], scores.get(2, 0))
+        self.assertEqual(self.index.match("Apple iPhone 15 128 GB Black", exclude_retailer="www.flipkart.com"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,46 +1,127 @@
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
-
-def web_crawler(start_url, max_pages=5):
-    visited = set()  
-    to_visit = [start_url]  
-    for _ in range(max_pages):
-        if not to_visit:
-            break
-
-        
-        current_url = to_visit.pop(0)
-        if current_url in visited:
-            continue
-
-        print(f"Crawling: {current_url}")
-        try:
-            # Send a request and fetch the HTML content
-            response = requests.get(current_url, headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36"
-            })
-            if response.status_code != 200:
-                print(f"Failed to fetch {current_url}: {response.status_code}")
-                continue
-            
-            # Parse the HTML
-            soup = BeautifulSoup(response.text, "html.parser")
-            
-            # Extract and print page title
-            title = soup.title.string if soup.title else "No Title"
-            print(f"Title: {title}")
-            
-            # Extract all links on the page
-            for link in soup.find_all("a", href=True):
-                full_url = urljoin(current_url, link["href"])
-                if full_url not in visited:
-                    to_visit.append(full_url)
-            
-            visited.add(current_url)  # Mark this page as visited
-        except Exception as e:
-            print(f"Error crawling {current_url}: {e}")
-
-# Start the crawler
-start_url = "https://amazon.com"
-web_crawler(start_url)
\ No newline at end of file
+import argparse
+import time
+from contextlib import contextmanager
+from functools import partial
+
+from crawler import Crawler, PageStore, PriceStore, crawl_sharded
+
+
+def print_page(page):
+    print(f"Crawling: {page.url}")
+    if page.error:
+        print(f"Failed to fetch {page.url}: {page.error}")
+    elif not page.changed:
+        print("Unchanged since the last visit")
+    else:
+        print(f"Title: {page.title}")
+        if page.product:
+            print(f"Product: {page.product.name} - {page.product.price} {page.product.currency}")
+
+
+@contextmanager
+def crawl_options(worker=0, pages_db=None, prices_db=None):
+    """
+    Per-process page/price stores and the page callback; yields extra Crawler options.
+    Prices are stamped when their page is seen and written at each crawler checkpoint, so
+    they are saved before the pages they came from are marked as fetched.
+    """
+    page_store = PageStore(pages_db) if pages_db else None
+    price_store = PriceStore(prices_db) if prices_db else None
+    observed = []
+
+    def on_page(page):
+        print_page(page)
+        if price_store is not None and page.product:
+            observed.append((page.product, int(time.time())))
+
+    def on_checkpoint():
+        if observed:
+            price_store.add_many(observed)
+            observed.clear()
+
+    try:
+        yield {"on_page": on_page, "page_store": page_store, "on_checkpoint": on_checkpoint}
+    finally:
+        if price_store is not None:
+            price_store.add_many(observed)
+            price_store.close()
+
+
+def web_crawler(
+    start_url,
+    max_pages=5,
+    workers=8,
+    per_host=2,
+    delay=1.0,
+    state_path=None,
+    same_host=False,
+    pages_db=None,
+    recrawl=False,
+    parse_workers=0,
+    prices_db=None,
+    frontier_db=None,
+    processes=1,
+):
+    allowed_hosts = [start_url.split("/")[2]] if same_host else None
+    if frontier_db:
+        return crawl_sharded(
+            frontier_db,
+            [start_url],
+            processes=processes,
+            max_pages=max_pages,
+            setup=partial(crawl_options, pages_db=pages_db, prices_db=prices_db),
+            workers=workers,
+            per_host=per_host,
+            delay=delay,
+            allowed_hosts=allowed_hosts,
+            parse_workers=parse_workers,
+        )
+    with crawl_options(0, pages_db, prices_db) as options:
+        crawler = Crawler(
+            workers=workers,
+            per_host=per_host,
+            delay=delay,
+            allowed_hosts=allowed_hosts,
+            state_path=state_path,
+            parse_workers=parse_workers,
+            **options,
+        )
+        if recrawl and options["page_store"] is not None:
+            crawler.queue_due()
+            return crawler.run(max_pages=max_pages)
+        return crawler.run([start_url], max_pages=max_pages)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl pages starting from a URL.")
+    parser.add_argument("start_url", nargs="?", default="https://amazon.com")
+    parser.add_argument("--max-pages", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=8, help="pages fetched in parallel")
+    parser.add_argument("--per-host", type=int, default=2, help="parallel requests per host")
+    parser.add_argument("--delay", type=float, default=1.0, help="seconds between requests to a host without a robots.txt Crawl-delay")
+    parser.add_argument("--state", help="checkpoint file; an existing one is resumed")
+    parser.add_argument("--same-host", action="store_true", help="only follow links on the start URL's host")
+    parser.add_argument("--pages-db", help="SQLite file with validators, content hashes and revisit times per URL")
+    parser.add_argument("--recrawl", action="store_true", help="revisit the pages in --pages-db that are due instead of crawling from start_url")
+    parser.add_argument("--parse-workers", type=int, default=0, help="processes for HTML parsing (0 parses in the fetch threads)")
+    parser.add_argument("--prices-db", help="SQLite file where prices found on product pages are recorded")
+    parser.add_argument("--frontier-db", help="SQLite frontier shared by --processes workers; an existing one is resumed")
+    parser.add_argument("--processes", type=int, default=1, help="crawler processes, each owning a share of the hosts (needs --frontier-db)")
+    args = parser.parse_args()
+    if args.frontier_db and (args.state or args.recrawl):
+        parser.error("--frontier-db keeps its own state and cannot be combined with --state or --recrawl")
+    web_crawler(
+        args.start_url,
+        args.max_pages,
+        args.workers,
+        args.per_host,
+        args.delay,
+        args.state,
+        args.same_host,
+        args.pages_db,
+        args.recrawl,
+        args.parse_workers,
+        args.prices_db,
+        args.frontier_db,
+        args.processes,
+    )